@@ -0,0 +1,62 @@
+# ------------------------------------------------------------------------------
+# bench_memory.py - Database memory benchmark
+# ------------------------------------------------------------------------------
+
+"""
+Measure the memory used by a database parsed from a large synthetic log.
+
+Usage::
+
+    python -m benchmarks.bench_memory [N_TARGETS]
+
+"""
+
+import gc
+import pathlib
+import sys
+import tempfile
+import tracemalloc
+
+from jamjar import database
+from jamjar import parsers
+
+from . import synthlog
+
+
+def _report(label: str, n_targets: int, size: int) -> None:
+    print(
+        f"{label:<12} {size / 2**20:9,.1f} MiB  "
+        f"{size / n_targets:8,.0f} bytes/target  "
+        f"{size / n_targets * 1e6 / 2**20:8,.0f} MiB/million targets"
+    )
+
+
+def main(n_targets: int) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logfile = pathlib.Path(tmpdir) / "jam.log"
+        synthlog.write_log(logfile, n_targets)
+
+        gc.collect()
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        db = database.Database()
+        parsers.CombinedParser(db).parse(parsers.scan_lines(logfile))
+        gc.collect()
+        normal = tracemalloc.get_traced_memory()[0] - base
+
+        db.compact()
+        gc.collect()
+        compacted = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+
+    targets = list(db.find_targets(""))
+    n_targets = len(targets)
+    n_edges = sum(len(target.deps) + len(target.incs) for target in targets)
+    print(f"{n_targets:,} targets, {n_edges:,} dependencies and inclusions")
+    _report("normal", n_targets, normal)
+    _report("compacted", n_targets, compacted)
+    print(f"reduction    {1 - compacted / normal:9.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
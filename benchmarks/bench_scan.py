@@ -0,0 +1,71 @@
+# ------------------------------------------------------------------------------
+# bench_scan.py - Log reading benchmark
+# ------------------------------------------------------------------------------
+
+"""
+Compare reading a jam log in text mode against the memory-mapped scanner.
+
+Usage::
+
+    python -m benchmarks.bench_scan [N_TARGETS [NOISE]]
+
+where NOISE is the number of uninteresting lines to add per object.
+
+"""
+
+import gc
+import pathlib
+import sys
+import tempfile
+import time
+from typing import Callable, Iterable
+
+from jamjar import database
+from jamjar import parsers
+from jamjar.parsers import _scan
+
+from . import synthlog
+
+
+def _text_lines(logfile: pathlib.Path) -> Iterable[str]:
+    with open(logfile) as logs:
+        yield from logs
+
+
+def _time(label: str, n_lines: int, func: Callable[[], None]) -> None:
+    # Don't let garbage from the previous run skew the results.
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:7.2f}s  {n_lines / elapsed:12,.0f} lines/sec")
+
+
+def main(n_targets: int, noise: int) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logfile = pathlib.Path(tmpdir) / "jam.log"
+        synthlog.write_log(logfile, n_targets, noise=noise)
+        with open(logfile, "rb") as f:
+            n_lines = sum(1 for _ in f)
+        size = logfile.stat().st_size
+        print(f"{n_lines:,} lines, {size / 2**20:,.1f} MiB")
+
+        def read(lines: Iterable[str]) -> Callable[[], None]:
+            return lambda: sum(1 for _ in lines)
+
+        def parse(lines: Iterable[str]) -> Callable[[], None]:
+            return lambda: parsers.CombinedParser(database.Database()).parse(
+                lines
+            )
+
+        _time("read (text mode)", n_lines, read(_text_lines(logfile)))
+        _time("read (scanner)", n_lines, read(_scan.scan_lines(logfile)))
+        _time("parse (text mode)", n_lines, parse(_text_lines(logfile)))
+        _time("parse (scanner)", n_lines, parse(_scan.scan_lines(logfile)))
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 0,
+    )
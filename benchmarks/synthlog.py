@@ -0,0 +1,109 @@
+# ------------------------------------------------------------------------------
+# synthlog.py - Synthetic jam log generation for benchmarks
+# ------------------------------------------------------------------------------
+
+"""Generate synthetic 'jam -ddmc' logs."""
+
+__all__ = ("write_log",)
+
+
+import pathlib
+import random
+from typing import TextIO
+
+_TIMESTAMPS = [
+    "Tue Nov 17 10:23:45 2015",
+    "Mon Nov  2 09:03:05 2015",
+    "Wed Dec 30 23:59:59 2015",
+    "Fri Jan  1 00:00:01 2016",
+]
+
+
+def write_log(
+    path: pathlib.Path, n_targets: int, *, noise: int = 0, seed: int = 0
+) -> None:
+    """
+    Write a synthetic log with roughly `n_targets` targets to a file.
+
+    The log contains '-dd', '-dm' and '-dc' output for a build of objects
+    from sources that include a shared pool of headers, along with some
+    uninteresting output (make lines, compiler invocations).
+
+    :param noise:
+        Number of extra uninteresting lines (e.g. compiler warnings) to write
+        per object.
+
+    """
+    rng = random.Random(seed)
+    n_headers = max(1, n_targets // 10)
+    n_objects = max(1, (n_targets - n_headers) // 2)
+    with open(path, "w") as f:
+        _write_dd(f, rng, n_objects, n_headers)
+        _write_dmc(f, rng, n_objects, n_headers, noise)
+
+
+def _header(idx: int) -> str:
+    return f"<p!lib{idx % 37}>h{idx}.h"
+
+
+def _source(idx: int) -> str:
+    return f"<p!src{idx % 101}!obj>s{idx}.c"
+
+
+def _object(idx: int) -> str:
+    return f"<p!src{idx % 101}!obj>s{idx}.o"
+
+
+def _write_dd(
+    f: TextIO, rng: random.Random, n_objects: int, n_headers: int
+) -> None:
+    for idx in range(n_objects):
+        f.write(f'Depends "all" : "{_object(idx)}" ;\n')
+        f.write(f'Depends "{_object(idx)}" : "{_source(idx)}" ;\n')
+        for hdr in rng.sample(range(n_headers), min(n_headers, 5)):
+            f.write(f'Includes "{_source(idx)}" : "{_header(hdr)}" ;\n')
+    for idx in range(n_headers):
+        if idx:
+            f.write(f'Includes "{_header(idx)}" : "{_header(idx - 1)}" ;\n')
+
+
+def _write_dmc(
+    f: TextIO, rng: random.Random, n_objects: int, n_headers: int, noise: int
+) -> None:
+    f.write("make\t--\tall\n")
+    for idx in range(n_headers):
+        f.write(f"make\t--\t  {_header(idx)}\n")
+        f.write(f"bind\t--\t  {_header(idx)}: inc/h{idx}.h\n")
+        f.write(f"time\t--\t  {_header(idx)}: {rng.choice(_TIMESTAMPS)}\n")
+        f.write(f"made\tstable\t  {_header(idx)}\n")
+    for idx in range(n_objects):
+        obj, src = _object(idx), _source(idx)
+        f.write(f"make\t--\t {obj}\n")
+        f.write(f"make\t--\t  {src}\n")
+        f.write(f"bind\t--\t  {src}: src/s{idx}.c\n")
+        f.write(f"time\t--\t  {src}: {rng.choice(_TIMESTAMPS)}\n")
+        f.write(f"made\tstable\t  {src}\n")
+        f.write(f"bind\t--\t {obj}: obj/s{idx}.o\n")
+        if rng.random() < 0.2:
+            f.write(f"time\t--\t {obj}: missing\n")
+            f.write(f"missing {obj}\n")
+            f.write(f'Rebuilding "{obj}": it doesn\'t exist\n')
+            f.write(f"made+\tmissing\t {obj}\n")
+        elif rng.random() < 0.3:
+            f.write(f"time\t--\t {obj}: {rng.choice(_TIMESTAMPS)}\n")
+            f.write(f"newer {src}\n")
+            f.write(f"newer than: {obj}\n")
+            f.write(f'Rebuilding "{obj}": it is older than "{src}"\n')
+            f.write(f'    "{obj}.d" inherits timestamp from "{obj}"\n')
+            f.write(f"made+\tupdate\t {obj}\n")
+        else:
+            f.write(f"time\t--\t {obj}: {rng.choice(_TIMESTAMPS)}\n")
+            f.write(f"made\tstable\t {obj}\n")
+    for idx in range(n_objects):
+        f.write(f"Cc {_object(idx)}\n")
+        f.write(f"gcc -c -O2 -Iinc -o obj/s{idx}.o src/s{idx}.c\n")
+        for line in range(noise):
+            f.write(
+                f"src/s{idx}.c:{line + 1}:5: warning: unused variable 'x'"
+                f" [-Wunused-variable]\n"
+            )
@@ -5,39 +5,405 @@
 
 """Main entrypoint!"""
 
-
 import argparse
+import contextlib
+import functools
+import glob
 import pathlib
 import sys
+import time
+from typing import Iterator, Optional, TextIO
 
+from . import batch
 from . import database
+from . import diff
+from . import export
 from . import parsers
+from . import server
+from . import snapshot
 from . import ui
 
 
 def parse_args(argv: list[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "command",
+        help=(
+            "'serve' to answer queries from other processes over a socket, "
+            "instead of starting the interactive prompt"
+        ),
+        nargs="?",
+        choices=("serve",),
+    )
     parser.add_argument(
         "-f",
         "--logfile",
-        help="Path to the jam log file to parse",
-        required=True,
+        help=(
+            "Path to the jam log file to parse (may be compressed), or '-' to "
+            "read from stdin. May be repeated, or a glob pattern, to merge "
+            "several logs (e.g. one per phase of a build) in order"
+        ),
+        action="append",
+        dest="logfiles",
+        metavar="LOGFILE",
+    )
+    parser.add_argument(
+        "--diff",
+        help=(
+            "Compare the targets from two jam log files (e.g. from "
+            "yesterday's and today's builds), instead of starting the "
+            "interactive prompt"
+        ),
+        nargs=2,
+        metavar=("OLD_LOGFILE", "NEW_LOGFILE"),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of processes to use for parsing the log file(s)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--follow",
+        help=(
+            "Keep parsing lines as they're appended to the log file (e.g. "
+            "while jam is still running)"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--compact",
+        help=(
+            "Store the parsed targets compactly, using much less memory for "
+            "large logs (incompatible with --follow)"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="Always parse the log file, ignoring any cached snapshot",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory to cache parsed snapshots of log files in",
+        type=pathlib.Path,
+        default=snapshot.default_cache_dir(),
+    )
+    parser.add_argument(
+        "--stats",
+        help=(
+            "Print statistics about parsing the log file(s) (time taken, "
+            "lines matched, targets created) and the size of the database"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--query",
+        help=(
+            "Run a command (e.g. 'deps <target>') and print its result, "
+            "instead of starting the interactive prompt. May be repeated"
+        ),
+        metavar="COMMAND",
+        action="append",
+        default=[],
+    )
+    parser.add_argument(
+        "--script",
+        help=(
+            "Run the commands in a file (one per line) and print their "
+            "results, instead of starting the interactive prompt"
+        ),
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "--format",
+        help="Output format for the results of --query and --script",
+        choices=batch.FORMATS,
+        default="json",
+    )
+    parser.add_argument(
+        "--export",
+        help=(
+            "Write out every target, instead of starting the interactive "
+            "prompt"
+        ),
+        choices=export.FORMATS,
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help=(
+            "File to write the output of --query, --script, --export or "
+            "--diff to (default: stdout)"
+        ),
+        default="-",
+    )
+    parser.add_argument(
+        "--host",
+        help="Address for the server to listen on (default: %(default)s)",
+        default="127.0.0.1",
+    )
+    parser.add_argument(
+        "--port", help="TCP port for the server to listen on", type=int
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--socket",
+        help="Path of a Unix socket for the server to listen on",
+        type=pathlib.Path,
+    )
+    args = parser.parse_args(argv)
+    if (args.logfiles is None) == (args.diff is None):
+        parser.error("exactly one of -f/--logfile and --diff is required")
+    if args.logfiles is not None:
+        try:
+            args.logfiles = expand_logfiles(args.logfiles)
+        except ValueError as e:
+            parser.error(str(e))
+        if len(args.logfiles) > 1 and parsers.STDIN in args.logfiles:
+            parser.error("can't read stdin along with other log files")
+        if len(args.logfiles) > 1 and args.follow:
+            parser.error("--follow can only be used with a single log file")
+    if args.diff and (args.follow or args.query or args.script or args.export):
+        parser.error(
+            "--diff can't be used with --follow, --query, --script or --export"
+        )
+    if args.diff and str(parsers.STDIN) in args.diff:
+        parser.error("--diff can't read a log file from stdin")
+    if args.stats and (args.diff or args.follow):
+        parser.error("--stats can't be used with --diff or --follow")
+    if args.compact and args.follow:
+        parser.error("--compact can't be used with --follow")
+    if args.follow and (args.query or args.script or args.export):
+        parser.error(
+            "--query, --script and --export can't be used with --follow"
+        )
+    if args.export and (args.query or args.script):
+        parser.error("--export can't be used with --query or --script")
+    if args.command == "serve":
+        if (args.port is None) == (args.socket is None):
+            parser.error("serve needs exactly one of --port and --socket")
+        if (
+            args.diff
+            or args.follow
+            or args.query
+            or args.script
+            or args.export
+        ):
+            parser.error(
+                "serve can't be used with --diff, --follow, --query, "
+                "--script or --export"
+            )
+    elif args.port is not None or args.socket is not None:
+        parser.error("--port and --socket can only be used with serve")
+    return args
+
+
+def expand_logfiles(patterns: list[str]) -> list[pathlib.Path]:
+    """
+    Get the log files to parse from the -f arguments, expanding any globs.
+
+    Files are in the order of the arguments, with the matches for each glob
+    sorted by name. Each file is only included once.
+
+    :raises ValueError:
+        If a glob doesn't match any files.
+
+    """
+    logfiles: dict[pathlib.Path, None] = {}
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise ValueError(f"no log files match {pattern!r}")
+            logfiles.update(dict.fromkeys(map(pathlib.Path, matches)))
+        else:
+            logfiles[pathlib.Path(pattern)] = None
+    return list(logfiles)
+
+
+def load_db(
+    args: argparse.Namespace, stats: Optional[parsers.ParseStats] = None
+) -> database.Database:
+    """
+    Get the database for the log files, reusing snapshots if possible.
+
+    Several log files are parsed concurrently (using up to the number of jobs
+    given) and merged in order.
+
+    :param stats:
+        Statistics to add the work done parsing the log files to.
+
+    """
+    if len(args.logfiles) == 1:
+        db = load_log(
+            args.logfiles[0],
+            jobs=args.jobs,
+            cache_dir=args.cache_dir,
+            use_cache=not args.no_cache,
+            stats=stats,
+        )
+        source = str(args.logfiles[0])
+        for target in db.targets():
+            target.add_source(source)
+        return db
+
+    db = database.Database()
+    parsers.parse_many(
+        db,
+        args.logfiles,
+        jobs=args.jobs,
+        load=functools.partial(
+            load_log,
+            jobs=1,
+            cache_dir=args.cache_dir,
+            use_cache=not args.no_cache,
+        ),
+        stats=stats,
+    )
+    return db
+
+
+def load_log(
+    logfile: pathlib.Path,
+    *,
+    jobs: int,
+    cache_dir: pathlib.Path,
+    use_cache: bool = True,
+    stats: Optional[parsers.ParseStats] = None,
+) -> database.Database:
+    """
+    Get the database for a log file, reusing a snapshot if possible.
+
+    :param cache_dir:
+        Directory to load and save snapshots in.
+    :param use_cache:
+        If `False`, always parse the log file (but still save a snapshot).
+    :param stats:
+        Statistics to add the work done parsing the log file, or loading its
+        snapshot, to.
+
+    """
+    if logfile == parsers.STDIN:
+        db = database.Database()
+        parsers.parse(db, logfile, jobs=jobs, stats=stats)
+        return db
+
+    key = snapshot.log_key(logfile)
+    if use_cache:
+        start = time.perf_counter()
+        cached = snapshot.load(cache_dir, key)
+        if cached is not None:
+            if stats is not None:
+                stats.snapshots_loaded += 1
+                stats.snapshot_time += time.perf_counter() - start
+            print("Loaded {} from snapshot".format(logfile), file=sys.stderr)
+            return cached
+
+    db = database.Database()
+    parsers.parse(db, logfile, jobs=jobs, stats=stats)
+    try:
+        snapshot.save(db, cache_dir, key)
+    except OSError as e:
+        print("Couldn't save snapshot: {}".format(e), file=sys.stderr)
+    return db
+
+
+def print_stats(stats: parsers.ParseStats, db: database.Database) -> None:
+    """Print parsing statistics and a summary of the database to stderr."""
+    stats.write_report(sys.stderr)
+    summary = db.summary()
+    print(
+        f"Database: {summary.targets:,} targets ({summary.rebuilt:,} "
+        f"rebuilt), {summary.deps:,} deps, {summary.incs:,} incs, "
+        f"{summary.newer_than:,} newer_than, "
+        f"{summary.inherits_timestamp:,} inherits_timestamp, "
+        f"{summary.rebuild_causes:,} rebuild_causes",
+        file=sys.stderr,
+    )
+
+
+@contextlib.contextmanager
+def open_output(path: str) -> Iterator[TextIO]:
+    """Open a file to write output to, or stdout if the path is '-'."""
+    if path == "-":
+        yield sys.stdout
+    else:
+        with open(path, "w") as f:
+            yield f
 
 
 def main(argv: list[str]) -> None:
     args = parse_args(argv)
-    db = database.Database()
-    parsers.parse(db, pathlib.Path(args.logfile))
-    cli_ui = ui.UI(db)
-    cli_ui.cmdloop()
+    if args.diff:
+        load = functools.partial(
+            load_log,
+            jobs=args.jobs,
+            cache_dir=args.cache_dir,
+            use_cache=not args.no_cache,
+        )
+        old_db, new_db = diff.load_pair(
+            load, pathlib.Path(args.diff[0]), pathlib.Path(args.diff[1])
+        )
+        with open_output(args.output) as out:
+            diff.write_report(diff.diff(old_db, new_db), out)
+        return
+    follower: Optional[parsers.LogFollower] = None
+    if args.follow:
+        db = database.Database()
+        try:
+            follower = parsers.LogFollower(db, args.logfiles[0])
+        except ValueError as e:
+            sys.exit(str(e))
+        print("Following {}".format(args.logfiles[0]), file=sys.stderr)
+        follower.start()
+    else:
+        stats = parsers.ParseStats() if args.stats else None
+        db = load_db(args, stats)
+        if stats is not None:
+            print_stats(stats, db)
+        if args.compact:
+            db.compact()
+    if args.command == "serve":
+        server.serve(db, host=args.host, port=args.port, path=args.socket)
+        return
+    if args.query or args.script:
+        commands = list(args.query)
+        if args.script is not None:
+            try:
+                commands.extend(batch.read_script(args.script))
+            except OSError as e:
+                sys.exit(f"Couldn't read script: {e}")
+        results = batch.run_commands(db, commands)
+        with open_output(args.output) as out:
+            ok = batch.write_results(results, out, args.format)
+        if not ok:
+            sys.exit(1)
+        return
+    if args.export:
+        with open_output(args.output) as out:
+            count = export.export(db, out, args.export)
+        print(f"Exported {count} targets", file=sys.stderr)
+        return
+    if parsers.STDIN in args.logfiles and not sys.stdin.isatty():
+        # The logs came down a pipe: take commands from the terminal instead.
+        try:
+            sys.stdin = open("/dev/tty")
+        except OSError:
+            pass
+    try:
+        cli_ui = ui.UI(db)
+        cli_ui.cmdloop()
+    finally:
+        if follower is not None:
+            follower.stop()
 
 
 if __name__ == "__main__":
     try:
         main(sys.argv[1:])
-    except (KeyboardInterrupt, SystemExit):
+    except KeyboardInterrupt:
         # Exit gracefully.
         pass
     # Uncomment for debugging.
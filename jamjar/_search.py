@@ -0,0 +1,152 @@
+# ------------------------------------------------------------------------------
+# _search.py - Target name search
+#
+# Index for searching target names by regex, without running the regex against
+# every name.
+# ------------------------------------------------------------------------------
+
+"""Target name search index."""
+
+__all__ = ("NameIndex", "required_literals")
+
+
+import array
+import bisect
+import re
+from typing import Any, Iterator, Sequence
+
+try:
+    from re import _constants as _sre_constants  # type: ignore[attr-defined]
+    from re import _parser as _sre_parse  # type: ignore[attr-defined]
+except ImportError:  # Python < 3.11
+    import sre_constants as _sre_constants
+    import sre_parse as _sre_parse
+
+# Opcodes of the parsed regex items that literals are found in. The parser is
+# internal to CPython, so these are looked up once here rather than used as
+# attributes (which linters can't see): if any are missing, searches just
+# aren't narrowed.
+_LITERAL = getattr(_sre_constants, "LITERAL", None)
+_SUBPATTERN = getattr(_sre_constants, "SUBPATTERN", None)
+_MAX_REPEAT = getattr(_sre_constants, "MAX_REPEAT", None)
+_MIN_REPEAT = getattr(_sre_constants, "MIN_REPEAT", None)
+_OPCODES_FOUND = None not in (_LITERAL, _SUBPATTERN, _MAX_REPEAT, _MIN_REPEAT)
+
+
+# Separates names in the index's text. Can't appear in a target name (jam's
+# debug output is line-based).
+_SEP = "\n"
+
+# Proportion of the names that a literal can be found in before it's no longer
+# worth using it to narrow a search.
+_MAX_CANDIDATE_FRACTION = 0.1
+
+
+class NameIndex:
+    """
+    Index of names, for fast regex searches.
+
+    The names are joined into a single string. A search finds occurrences of a
+    literal that any match must contain within that string (which is fast),
+    and only runs the full regex against the names containing them.
+
+    """
+
+    def __init__(self, names: Sequence[str]) -> None:
+        self._names = names
+        self._text = _SEP.join(names)
+        # Offset of the start of each name in the text (plus one past the
+        # end).
+        self._starts = array.array("q", bytes(8 * (len(names) + 1)))
+        pos = 0
+        for idx, name in enumerate(names):
+            pos += len(name) + len(_SEP)
+            self._starts[idx + 1] = pos
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def search(self, regex: re.Pattern[str]) -> Iterator[str]:
+        """
+        Yield the names that the regex matches (as for `re.search`).
+
+        Names are yielded in index order.
+
+        """
+        literals = [
+            literal
+            for literal in required_literals(regex)
+            if _SEP not in literal
+        ]
+        if not literals:
+            yield from filter(regex.search, self._names)
+            return
+
+        # Use the longest literal, which is likely the most selective. If it's
+        # still in a large proportion of the names, it's quicker just to try
+        # the regex against every name.
+        literal = max(literals, key=len)
+        text, starts, names = self._text, self._starts, self._names
+        if text.count(literal) > len(names) * _MAX_CANDIDATE_FRACTION:
+            yield from filter(regex.search, names)
+            return
+
+        pos = text.find(literal)
+        while pos >= 0:
+            idx = bisect.bisect_right(starts, pos) - 1
+            if regex.search(names[idx]):
+                yield names[idx]
+            # Skip straight to the next name.
+            pos = text.find(literal, starts[idx + 1])
+
+
+def required_literals(regex: re.Pattern[str]) -> list[str]:
+    """
+    Find literal strings that any string the regex matches must contain.
+
+    Not all such literals are necessarily found (e.g. none are for
+    alternations), but any that are returned are guaranteed to be required.
+    Nothing is returned for case-insensitive regexes, or if the regex can't
+    be analysed (e.g. because this version of Python parses regexes
+    differently).
+
+    """
+    if regex.flags & re.IGNORECASE or not _OPCODES_FOUND:
+        return []
+    literals: list[str] = []
+    try:
+        parsed = _sre_parse.parse(regex.pattern, regex.flags)
+        if parsed.state.flags & re.IGNORECASE:
+            return []
+        _find_literals(parsed, literals)
+    except Exception:  # pylint: disable=broad-except
+        # Shouldn't happen for a compiled pattern, unless the parser's output
+        # isn't shaped as expected - but just don't narrow.
+        return []
+    return [literal for literal in literals if literal]
+
+
+def _find_literals(items: Any, literals: list[str]) -> None:
+    """
+    Add the runs of literals that must match in a sequence of regex items.
+
+    Runs are only extended through items that must each match exactly once,
+    in sequence.
+
+    """
+    run: list[str] = []
+    for op, av in items:
+        if op == _LITERAL:
+            run.append(chr(av))
+            continue
+        literals.append("".join(run))
+        run = []
+        if op == _SUBPATTERN:
+            _, add_flags, _, subpattern = av
+            if not add_flags & re.IGNORECASE:
+                _find_literals(subpattern, literals)
+        elif op in (_MAX_REPEAT, _MIN_REPEAT):
+            min_repeats, _, subpattern = av
+            if min_repeats >= 1:
+                _find_literals(subpattern, literals)
+    literals.append("".join(run))
@@ -0,0 +1,290 @@
+# ------------------------------------------------------------------------------
+# batch.py - Batch query module
+#
+# Non-interactive queries, for running jamjar from scripts and CI jobs.
+# ------------------------------------------------------------------------------
+
+"""Non-interactive queries with machine-readable results."""
+
+__all__ = (
+    "COMMANDS",
+    "FORMATS",
+    "read_script",
+    "run_command",
+    "run_commands",
+    "write_results",
+)
+
+
+import itertools
+import json
+import pathlib
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO
+
+from . import database
+from . import graph
+from . import query
+
+# Maximum number of rebuild chains to include in a result.
+_MAX_REBUILD_CHAINS = 10
+
+# Output formats: a single JSON array, or one JSON object per line.
+FORMATS = ("json", "ndjson")
+
+_Command = Callable[[database.Database, str], Any]
+
+
+def _target(db: database.Database, name: str) -> database.Target:
+    """Get the target with an exact name, for a command argument."""
+    if not name:
+        raise ValueError("No target name given")
+    target = db.find_target(name)
+    if target is None:
+        raise ValueError(f"No target named {name!r}")
+    return target
+
+
+def _names(targets: Iterable[database.Target]) -> list[str]:
+    return [target.name for target in targets]
+
+
+def _rebuilt_only(arg: str) -> bool:
+    """Parse the argument to a command with an optional 'rebuilt' flag."""
+    if arg not in ("", "rebuilt"):
+        raise ValueError(f"Expected 'rebuilt' or nothing, not {arg!r}")
+    return arg == "rebuilt"
+
+
+def _targets(db: database.Database, match: str) -> list[str]:
+    """Names of the targets matching a regex."""
+    return _names(db.find_targets(match))
+
+
+def _rebuilt_targets(db: database.Database, match: str) -> list[str]:
+    """Names of the rebuilt targets matching a regex."""
+    return _names(db.find_rebuilt_targets(match))
+
+
+def _deps(db: database.Database, name: str) -> list[str]:
+    """Direct dependencies of a target, including those from includes."""
+    return _names(query.deps(_target(db, name)))
+
+
+def _deps_rebuilt(db: database.Database, name: str) -> list[str]:
+    """Direct dependencies of a target that have been rebuilt."""
+    return _names(query.deps_rebuilt(_target(db, name)))
+
+
+def _effective_deps(db: database.Database, name: str) -> list[str]:
+    """Direct dependencies of a target, applying includes of includes."""
+    return _names(query.effective_deps(_target(db, name)))
+
+
+def _impact(db: database.Database, name: str) -> dict[str, Any]:
+    """Number of targets that depend on a target, directly or indirectly."""
+    distances = query.dependents_closure(_target(db, name))
+    return {
+        "dependents": len(distances),
+        "direct": sum(1 for distance in distances.values() if distance == 1),
+        "rebuilt": sum(1 for dependent in distances if dependent.rebuilt),
+    }
+
+
+def _rebuild_chains(db: database.Database, name: str) -> dict[str, Any]:
+    """The first few chains of targets that caused a target's rebuild."""
+    causes = query.RebuildCauses(_target(db, name))
+    return {
+        "count": causes.count(),
+        "chains": [
+            [
+                {
+                    "target": target.name,
+                    "reason": None if reason is None else reason.value,
+                }
+                for target, reason in chain
+            ]
+            for chain in itertools.islice(causes.chains(), _MAX_REBUILD_CHAINS)
+        ],
+    }
+
+
+def _timestamp_inheritance_chain(
+    db: database.Database, name: str
+) -> Optional[list[str]]:
+    """Chain of targets a target inherits its timestamp from, if any."""
+    chain = query.timestamp_inheritance_chain(_target(db, name))
+    return None if chain is None else _names(chain)
+
+
+def _show(db: database.Database, name: str) -> dict[str, Any]:
+    """All the information about a target."""
+    target = _target(db, name)
+
+    def name_of(other: Optional[database.Target]) -> Optional[str]:
+        return None if other is None else other.name
+
+    return {
+        "name": target.name,
+        "deps": _names(target.deps),
+        "deps_rev": sorted(_names(target.deps_rev)),
+        "incs": _names(target.incs),
+        "incs_rev": sorted(_names(target.incs_rev)),
+        "newer_than": _names(target.newer_than),
+        "older_than": sorted(_names(target.older_than)),
+        "timestamp": (
+            None if target.timestamp is None else target.timestamp.isoformat()
+        ),
+        "inherits_timestamp_from": name_of(target.inherits_timestamp_from),
+        "bequeaths_timestamp_to": sorted(
+            _names(target.bequeaths_timestamp_to)
+        ),
+        "binding": target.binding,
+        "fate": None if target.fate is None else target.fate.value,
+        "rebuild_reason": (
+            None
+            if target.rebuild_reason is None
+            else target.rebuild_reason.value
+        ),
+        "rebuild_reason_target": name_of(target.rebuild_reason_target),
+        "sources": list(target.sources),
+    }
+
+
+def _cycles(db: database.Database, arg: str) -> list[list[str]]:
+    """Groups of targets that depend on or include each other."""
+    if arg:
+        raise ValueError(f"Unexpected argument {arg!r}")
+    return [
+        sorted(_names(component)) for component in graph.condense(db).cycles()
+    ]
+
+
+def _root_causes(db: database.Database, arg: str) -> list[dict[str, Any]]:
+    """Root causes of all the rebuilds, grouped by reason."""
+    if arg:
+        raise ValueError(f"Unexpected argument {arg!r}")
+    return [
+        {
+            "reason": None if reason is None else reason.value,
+            "causes": [
+                {"target": cause.target.name, "rebuilds": cause.rebuilds}
+                for cause in causes
+            ],
+        }
+        for reason, causes in query.root_causes(db).items()
+    ]
+
+
+def _critical_path(db: database.Database, arg: str) -> dict[str, Any]:
+    """Longest dependency chain, and the width of each level of the graph."""
+    profile = query.build_profile(db, rebuilt_only=_rebuilt_only(arg))
+    return {
+        "critical_path": _names(profile.critical_path),
+        "widths": profile.widths,
+    }
+
+
+# Commands that can be run, by name. Each takes the database and the rest of
+# the command line (a regex, an exact target name, or a flag), and returns a
+# JSON-serializable result.
+COMMANDS: dict[str, _Command] = {
+    "targets": _targets,
+    "rebuilt_targets": _rebuilt_targets,
+    "deps": _deps,
+    "deps_rebuilt": _deps_rebuilt,
+    "effective_deps": _effective_deps,
+    "impact": _impact,
+    "rebuild_chains": _rebuild_chains,
+    "timestamp_inheritance_chain": _timestamp_inheritance_chain,
+    "show": _show,
+    "cycles": _cycles,
+    "root_causes": _root_causes,
+    "critical_path": _critical_path,
+}
+
+
+def run_command(
+    db: database.Database, line: str, *, lock: bool = True
+) -> dict[str, Any]:
+    """
+    Run a single command against a database.
+
+    :param line:
+        The command name, optionally followed by a space and an argument
+        (which may itself contain spaces, e.g. a target name).
+    :param lock:
+        Whether to hold the database's lock while running the command. Not
+        needed if nothing can be modifying the database, and skipping it lets
+        commands run concurrently.
+
+    :return:
+        Dict with the command line, and either its ``result`` or an
+        ``error`` message.
+
+    """
+    name, _, arg = line.strip().partition(" ")
+    try:
+        command = COMMANDS[name]
+    except KeyError:
+        return {"command": line, "error": f"Unknown command {name!r}"}
+    try:
+        if lock:
+            with db.lock:
+                result = command(db, arg.strip())
+        else:
+            result = command(db, arg.strip())
+    except ValueError as e:
+        return {"command": line, "error": str(e)}
+    return {"command": line, "result": result}
+
+
+def run_commands(
+    db: database.Database, lines: Iterable[str]
+) -> Iterator[dict[str, Any]]:
+    """Yield the result of each command in turn (see `run_command`)."""
+    for line in lines:
+        yield run_command(db, line)
+
+
+def read_script(path: pathlib.Path) -> list[str]:
+    """
+    Read the commands from a script file.
+
+    Each line is a command. Blank lines and lines starting with '#' are
+    ignored.
+
+    """
+    with open(path) as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def write_results(
+    results: Iterable[dict[str, Any]], file: TextIO, fmt: str = "json"
+) -> bool:
+    """
+    Write command results to a file, as they're produced.
+
+    :param fmt:
+        One of `FORMATS`.
+
+    :return:
+        `True` if all the commands succeeded.
+
+    """
+    ok = True
+    if fmt == "ndjson":
+        for result in results:
+            ok = ok and "error" not in result
+            file.write(json.dumps(result) + "\n")
+            file.flush()
+    elif fmt == "json":
+        file.write("[")
+        for idx, result in enumerate(results):
+            ok = ok and "error" not in result
+            file.write(",\n" if idx else "\n")
+            file.write(json.dumps(result))
+        file.write("\n]\n")
+    else:
+        raise ValueError(f"Unknown output format {fmt!r}")
+    return ok
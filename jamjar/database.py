@@ -8,15 +8,41 @@
 
 from __future__ import annotations
 
-__all__ = ("Database", "Fate", "Target", "Rule", "RuleCall")
-
-
+__all__ = (
+    "Database",
+    "DatabaseSummary",
+    "Fate",
+    "Target",
+    "TargetRecord",
+    "Rule",
+    "RuleCall",
+)
+
+
+import array
 import collections
 import datetime
 import enum
+import itertools
+import json
 import re
+import threading
+
+from typing import (
+    AbstractSet,
+    Any,
+    BinaryIO,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    NoReturn,
+    Optional,
+    Sequence,
+    Union,
+)
 
-from typing import Any, Iterator, Optional, Union
+from . import _search
 
 
 class Fate(enum.Enum):
@@ -50,38 +76,401 @@ class RebuildReason(enum.Enum):
     UPDATED_DEPENDENCY = "dependency was updated"
 
 
+class TargetRecord(NamedTuple):
+    """
+    Self-contained summary of a target, referring to other targets by name.
+
+    Used to move targets between databases (e.g. across processes).
+
+    """
+
+    name: str
+    deps: tuple[str, ...]
+    incs: tuple[str, ...]
+    newer_than: tuple[str, ...]
+    timestamp: Optional[datetime.datetime]
+    inherits_timestamp_from: Optional[str]
+    binding: Optional[str]
+    fate: Optional[Fate]
+    rebuild_reason: Optional[RebuildReason]
+    rebuild_reason_target: Optional[str]
+    sources: tuple[str, ...] = ()
+
+
+class DatabaseSummary(NamedTuple):
+    """
+    Size of a database: the number of targets, and of each kind of edge.
+
+    .. attribute:: rebuild_causes
+
+        Number of rebuilt targets whose rebuild reason names another target.
+
+    """
+
+    targets: int
+    rebuilt: int
+    deps: int
+    incs: int
+    newer_than: int
+    inherits_timestamp: int
+    rebuild_causes: int
+
+
+# Identifies a database snapshot file.
+_SNAPSHOT_MAGIC = b"jamjar-db\n"
+
+# Snapshot format version. Bump this whenever the snapshot contents change
+# (including any change to `TargetRecord`), so that old snapshots are
+# rejected rather than misread.
+_SNAPSHOT_VERSION = 3
+
+# Errors from reading a snapshot that's damaged or from an incompatible
+# version of jamjar.
+_SNAPSHOT_ERRORS = (
+    KeyError,
+    IndexError,
+    TypeError,
+    ValueError,
+)
+
+
+def _record_to_json(record: TargetRecord) -> list[Any]:
+    """Convert a target record to JSON-serializable form, for snapshots."""
+    return [
+        record.name,
+        record.deps,
+        record.incs,
+        record.newer_than,
+        None if record.timestamp is None else record.timestamp.isoformat(),
+        record.inherits_timestamp_from,
+        record.binding,
+        None if record.fate is None else record.fate.name,
+        None if record.rebuild_reason is None else record.rebuild_reason.name,
+        record.rebuild_reason_target,
+        record.sources,
+    ]
+
+
+def _record_from_json(data: list[Any]) -> TargetRecord:
+    """
+    Convert a target record back from the form given by `_record_to_json`.
+
+    :raises KeyError, IndexError, TypeError, ValueError:
+        If the data isn't a valid record.
+
+    """
+    (
+        name,
+        deps,
+        incs,
+        newer_than,
+        timestamp,
+        inherits_timestamp_from,
+        binding,
+        fate,
+        rebuild_reason,
+        rebuild_reason_target,
+        sources,
+    ) = data
+    return TargetRecord(
+        name,
+        tuple(deps),
+        tuple(incs),
+        tuple(newer_than),
+        (
+            None
+            if timestamp is None
+            else datetime.datetime.fromisoformat(timestamp)
+        ),
+        inherits_timestamp_from,
+        binding,
+        None if fate is None else Fate[fate],
+        None if rebuild_reason is None else RebuildReason[rebuild_reason],
+        rebuild_reason_target,
+        tuple(sources),
+    )
+
+
 class Database:
-    """Database of jam targets."""
+    """
+    Database of jam targets.
+
+    .. attribute:: lock
+
+        Lock to hold while updating the database, or while reading it if it
+        may be being updated by another thread.
+
+    """
 
     def __init__(self) -> None:
-        self._targets: dict[str, Target] = collections.OrderedDict()
+        self._targets: Union[dict[str, Target], _CompactGraph] = (
+            collections.OrderedDict()
+        )
+        self.lock = threading.RLock()
+        # Names of the targets with each filename and grist, in the order the
+        # targets were added.
+        self._names_by_filename: dict[str, list[str]] = {}
+        self._names_by_grist: dict[str, list[str]] = {}
+        # Index for searching target names, built when first needed.
+        self._name_index: Optional[_search.NameIndex] = None
 
     def __repr__(self) -> str:
         return f"{type(self).__name__}({len(self._targets)} targets)"
 
+    def __len__(self) -> int:
+        return len(self._targets)
+
     def get_target(self, name: str) -> Target:
         """Get a target with a given name, creating it if necessary."""
         try:
             target = self._targets[name]
         except KeyError:
+            if not isinstance(self._targets, dict):
+                raise TypeError(
+                    f"Can't add target {name!r} to a compacted database"
+                ) from None
             target = Target(name)
             self._targets[name] = target
+            grist, filename = target._grist_and_filename()
+            self._names_by_filename.setdefault(filename, []).append(name)
+            self._names_by_grist.setdefault(grist, []).append(name)
         return target
 
+    def move_to_end(self, names: Iterable[str]) -> None:
+        """
+        Move targets to the end of the order they were added in.
+
+        The targets end up in the order given, after all the others.
+
+        """
+        targets = self._targets
+        if not isinstance(targets, collections.OrderedDict):
+            raise TypeError("Can't reorder a compacted database")
+        for name in names:
+            targets.move_to_end(name)
+        # Keep the lists of names by filename and grist in the new order.
+        position = {name: idx for idx, name in enumerate(targets)}
+        for names_list in itertools.chain(
+            self._names_by_filename.values(), self._names_by_grist.values()
+        ):
+            if len(names_list) > 1:
+                names_list.sort(key=position.__getitem__)
+        self._name_index = None
+
+    def find_target(self, name: str) -> Optional[Target]:
+        """Get the target with a given name, or `None` if there isn't one."""
+        return self._targets.get(name)
+
+    def targets_by_filename(self, filename: str) -> list[Target]:
+        """
+        Get all targets with a given filename (i.e. name excluding grist).
+
+        Targets are returned in the order they were added.
+
+        """
+        names = self._names_by_filename.get(filename, ())
+        return [self._targets[name] for name in names]
+
+    def targets_by_grist(self, grist: str) -> list[Target]:
+        """
+        Get all targets with a given grist (e.g. "<foo!bar>", or "" for none).
+
+        Targets are returned in the order they were added.
+
+        """
+        names = self._names_by_grist.get(grist, ())
+        return [self._targets[name] for name in names]
+
+    @property
+    def compacted(self) -> bool:
+        """`True` if the database has been compacted (see `compact`)."""
+        return isinstance(self._targets, _CompactGraph)
+
+    def compact(self) -> None:
+        """
+        Convert the database to a compact, read-only form.
+
+        Targets are given dense integer IDs, and their relationships are
+        stored in arrays rather than as per-target lists and sets. This uses
+        far less memory for large databases.
+
+        Afterwards, targets are lightweight views on the arrays that are
+        created on demand: they behave like normal targets, except that they
+        can't be modified (and are equal to, but not necessarily the same
+        object as, other views of the same target). New targets can't be
+        added.
+
+        """
+        with self.lock:
+            if isinstance(self._targets, dict):
+                self._targets = _CompactGraph(list(self._targets.values()))
+
+    def targets(self) -> Iterator[Target]:
+        """Yield every target, in the order they were added."""
+        yield from self._targets.values()
+
+    def records(self) -> Iterator[TargetRecord]:
+        """Yield a record for every target, in the order they were added."""
+        for target in self._targets.values():
+            yield target.record()
+
+    def summary(self) -> DatabaseSummary:
+        """Count the targets and relationships in the database."""
+        rebuilt = deps = incs = newer_than = inherits = causes = 0
+        for target in self._targets.values():
+            deps += len(target.deps)
+            incs += len(target.incs)
+            newer_than += len(target.newer_than)
+            if target.inherits_timestamp_from is not None:
+                inherits += 1
+            if target.rebuild_reason is not None:
+                rebuilt += 1
+                if target.rebuild_reason_target is not None:
+                    causes += 1
+        return DatabaseSummary(
+            len(self._targets),
+            rebuilt,
+            deps,
+            incs,
+            newer_than,
+            inherits,
+            causes,
+        )
+
+    def add_records(self, records: Sequence[TargetRecord]) -> None:
+        """
+        Add targets from records, merging with any existing targets.
+
+        Targets are added in the order of the records, and relationships are
+        added after any existing ones. So adding the records from several
+        databases in turn gives the same result as if the information in all
+        of them had been added to a single database in the same order.
+
+        Any attribute given in a record overrides an existing value.
+
+        """
+        # Create all the targets first, so they're in the same order as in the
+        # source database.
+        targets = [self.get_target(record.name) for record in records]
+        get = self.get_target
+        for target, record in zip(targets, records):
+            for name in record.deps:
+                target.add_dependency(get(name))
+            for name in record.incs:
+                target.add_inclusion(get(name))
+            for name in record.newer_than:
+                target.add_i_am_newer_than(get(name))
+            if record.timestamp is not None:
+                target.set_timestamp(record.timestamp)
+            if record.inherits_timestamp_from is not None:
+                target.set_inherits_timestamp_from(
+                    get(record.inherits_timestamp_from)
+                )
+            if record.binding is not None:
+                target.set_binding(record.binding)
+            if record.fate is not None:
+                target.set_fate(record.fate)
+            if record.rebuild_reason is not None:
+                target.set_rebuild_reason(
+                    record.rebuild_reason,
+                    (
+                        None
+                        if record.rebuild_reason_target is None
+                        else get(record.rebuild_reason_target)
+                    ),
+                )
+            for source in record.sources:
+                target.add_source(source)
+
+    def save(self, file: BinaryIO, key: Any = None) -> None:
+        """
+        Write a snapshot of the database to a binary file.
+
+        Snapshots only contain data (as JSON, with one line per target), so
+        loading a snapshot can't run code even if it's been tampered with.
+
+        :param file:
+            File to write the snapshot to.
+        :param key:
+            JSON-serializable value identifying what the database was built
+            from. The snapshot can only be loaded with an equal key.
+
+        """
+        encode = json.JSONEncoder(
+            check_circular=False, separators=(",", ":")
+        ).encode
+        file.write(_SNAPSHOT_MAGIC)
+        file.write(encode([_SNAPSHOT_VERSION, key]).encode() + b"\n")
+        for record in self.records():
+            file.write(encode(_record_to_json(record)).encode() + b"\n")
+
+    @classmethod
+    def load(cls, file: BinaryIO, key: Any = None) -> Optional[Database]:
+        """
+        Load a database from a snapshot written by `save`.
+
+        :param file:
+            File to read the snapshot from.
+        :param key:
+            Value identifying what the database should have been built from.
+
+        :return:
+            The loaded database, or `None` if the file isn't a valid snapshot
+            from this version of jamjar, or its key doesn't match.
+
+        """
+        if file.read(len(_SNAPSHOT_MAGIC)) != _SNAPSHOT_MAGIC:
+            return None
+        try:
+            version, snapshot_key = json.loads(file.readline())
+            # Compare the keys as they'd be read back (e.g. with tuples as
+            # lists).
+            if version != _SNAPSHOT_VERSION or snapshot_key != json.loads(
+                json.dumps(key)
+            ):
+                return None
+            records = [_record_from_json(json.loads(line)) for line in file]
+        except _SNAPSHOT_ERRORS:
+            return None
+        db = cls()
+        db.add_records(records)
+        return db
+
     def find_targets(self, name_regex: str) -> Iterator[Target]:
-        """Yield all targets whose name matches a regex."""
-        for name, target in self._targets.items():
-            try:
-                if re.search(name_regex, name):
-                    yield target
-            except re.error as e:
-                raise ValueError(str(e))
+        """
+        Yield all targets whose name matches a regex.
+
+        Targets are yielded in the order they were added.
+
+        :raises ValueError:
+            If the regex is invalid.
+
+        """
+        # Compile the regex up front, so that an invalid one is reported when
+        # this is called rather than when the targets are first iterated over.
+        try:
+            regex = re.compile(name_regex)
+        except re.error as e:
+            raise ValueError(str(e))
+        return self._find_targets(regex)
+
+    def _find_targets(self, regex: re.Pattern[str]) -> Iterator[Target]:
+        """Yield all targets whose name matches a compiled regex."""
+        # Targets are never removed, so the index is up to date if it has the
+        # right number of names.
+        index = self._name_index
+        if index is None or len(index) != len(self._targets):
+            index = self._name_index = _search.NameIndex(list(self._targets))
+        for name in index.search(regex):
+            yield self._targets[name]
 
     def find_rebuilt_targets(self, name_regex: str) -> Iterator[Target]:
         """Yield all rebuilt targets whose name matches a regex."""
-        for target in self.find_targets(name_regex):
-            if target.rebuilt:
-                yield target
+        return (
+            target
+            for target in self.find_targets(name_regex)
+            if target.rebuilt
+        )
 
 
 class Target:
@@ -147,23 +536,50 @@ class Target:
 
         Related target, if applicable for the reason.
 
+    .. attribute:: sources
+
+        Log files that the target was found in, in the order they were
+        merged into the database (empty if not recorded).
+
     """
 
+    # Most targets have few relationships of each kind, so avoid the cost of
+    # a __dict__ and of allocating empty containers: empty relationships share
+    # an immutable sentinel, replaced with a container on the first write.
+    __slots__ = (
+        "name",
+        "deps",
+        "deps_rev",
+        "incs",
+        "incs_rev",
+        "newer_than",
+        "older_than",
+        "timestamp",
+        "inherits_timestamp_from",
+        "bequeaths_timestamp_to",
+        "binding",
+        "fate",
+        "rebuild_reason",
+        "rebuild_reason_target",
+        "sources",
+    )
+
     def __init__(self, name: str) -> None:
         self.name: str = name
-        self.deps: list[Target] = []
-        self.deps_rev: set[Target] = set()
-        self.incs: list[Target] = []
-        self.incs_rev: set[Target] = set()
-        self.newer_than: list[Target] = []
-        self.older_than: set[Target] = set()
+        self.deps: Sequence[Target] = _NO_TARGETS
+        self.deps_rev: AbstractSet[Target] = _NO_TARGET_SET
+        self.incs: Sequence[Target] = _NO_TARGETS
+        self.incs_rev: AbstractSet[Target] = _NO_TARGET_SET
+        self.newer_than: Sequence[Target] = _NO_TARGETS
+        self.older_than: AbstractSet[Target] = _NO_TARGET_SET
         self.timestamp: Optional[datetime.datetime] = None
         self.inherits_timestamp_from: Optional[Target] = None
-        self.bequeaths_timestamp_to: set[Target] = set()
+        self.bequeaths_timestamp_to: AbstractSet[Target] = _NO_TARGET_SET
         self.binding: Optional[str] = None
         self.fate: Optional[Fate] = None
         self.rebuild_reason: Optional[RebuildReason] = None
         self.rebuild_reason_target: Optional[Target] = None
+        self.sources: tuple[str, ...] = ()
 
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self.name})"
@@ -180,20 +596,44 @@ class Target:
     def add_dependency(self, other: Target) -> None:
         """Record the target 'other' as depended on by this target."""
         if self not in other.deps_rev:
-            self.deps.append(other)
-            other.deps_rev.add(self)
+            self.deps = _appended(self.deps, other)
+            other.deps_rev = _added(other.deps_rev, self)
 
     def add_inclusion(self, other: Target) -> None:
         """Record the target 'other' as included by this target."""
         if self not in other.incs_rev:
-            self.incs.append(other)
-            other.incs_rev.add(self)
+            self.incs = _appended(self.incs, other)
+            other.incs_rev = _added(other.incs_rev, self)
 
     def add_i_am_newer_than(self, older: Target) -> None:
         """Record that this target is newer than the target 'older'."""
         if self not in older.older_than:
-            self.newer_than.append(older)
-            older.older_than.add(self)
+            self.newer_than = _appended(self.newer_than, older)
+            older.older_than = _added(older.older_than, self)
+
+    def record(self) -> TargetRecord:
+        """Return a self-contained record of this target."""
+        return TargetRecord(
+            self.name,
+            tuple(dep.name for dep in self.deps),
+            tuple(inc.name for inc in self.incs),
+            tuple(older.name for older in self.newer_than),
+            self.timestamp,
+            (
+                None
+                if self.inherits_timestamp_from is None
+                else self.inherits_timestamp_from.name
+            ),
+            self.binding,
+            self.fate,
+            self.rebuild_reason,
+            (
+                None
+                if self.rebuild_reason_target is None
+                else self.rebuild_reason_target.name
+            ),
+            self.sources,
+        )
 
     def brief_name(self) -> str:
         """Return a summarised version of this target's name."""
@@ -223,10 +663,11 @@ class Target:
     def _grist_and_filename(self) -> tuple[str, str]:
         """Split this target's name into a grist and filename."""
         if self.name.startswith("<"):
-            grist, filename = self.name.split(">", maxsplit=1)
-            return grist + ">", filename
-        else:
-            return "", self.name
+            grist, sep, filename = self.name.partition(">")
+            # A name with no closing '>' has no grist.
+            if sep:
+                return grist + sep, filename
+        return "", self.name
 
     def set_timestamp(self, timestamp: datetime.datetime) -> None:
         """Set the updated timestamp on this target."""
@@ -240,9 +681,17 @@ class Target:
         """Set the fate of this target"""
         # Might end up overwriting an old value if the given log contains debug
         # from a couple of related runs of jam (e.g. in a multiphase build). So
-        # don't check...
+        # don't check... When several logs are parsed, they're merged in order
+        # (see `Database.add_records`), so the last log's fate wins.
         self.fate = fate
 
+    def add_source(self, source: str) -> None:
+        """Record that this target was found in a log file."""
+        if source not in self.sources:
+            sources = self.sources + (source,)
+            # Many targets come from the same logs, so share the tuples.
+            self.sources = _SOURCES.setdefault(sources, sources)
+
     def set_rebuild_reason(
         self, reason: RebuildReason, related_target: Optional[Target] = None
     ) -> None:
@@ -257,4 +706,272 @@ class Target:
             or self.inherits_timestamp_from == source
         )
         self.inherits_timestamp_from = source
-        source.bequeaths_timestamp_to.add(self)
+        source.bequeaths_timestamp_to = _added(
+            source.bequeaths_timestamp_to, self
+        )
+
+
+class _NoTargets(tuple[Target, ...]):
+    """
+    Empty sequence of targets, for targets without a kind of relationship.
+
+    This compares equal to any empty list or tuple, like the list that
+    replaces it would.
+
+    """
+
+    __slots__ = ()
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (list, tuple)):
+            return not other
+        return NotImplemented
+
+    def __ne__(self, other: Any) -> bool:
+        if isinstance(other, (list, tuple)):
+            return bool(other)
+        return NotImplemented
+
+    __hash__ = tuple.__hash__
+
+
+# Shared sentinels for targets without any of a kind of relationship (an
+# empty frozenset already compares equal to an empty set).
+_NO_TARGETS: Sequence[Target] = _NoTargets()
+_NO_TARGET_SET: AbstractSet[Target] = frozenset()
+
+# Interned tuples of target sources (there are only ever a few distinct ones).
+_SOURCES: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+
+def _appended(targets: Sequence[Target], target: Target) -> list[Target]:
+    """Append to a target's relationship list, allocating it if necessary."""
+    if targets is _NO_TARGETS:
+        return [target]
+    assert isinstance(targets, list)
+    targets.append(target)
+    return targets
+
+
+def _added(targets: AbstractSet[Target], target: Target) -> set[Target]:
+    """Add to a target's relationship set, allocating it if necessary."""
+    if targets is _NO_TARGET_SET:
+        return {target}
+    assert isinstance(targets, set)
+    targets.add(target)
+    return targets
+
+
+class _Adjacency:
+    """
+    Adjacency lists for all targets in a compacted database.
+
+    The lists are stored back-to-back in a single array of target IDs (i.e.
+    compressed sparse row format).
+
+    """
+
+    __slots__ = ("_offsets", "_ids")
+
+    def __init__(self, offsets: array.array[int], ids: array.array[int]):
+        self._offsets = offsets
+        self._ids = ids
+
+    @classmethod
+    def from_lists(cls, lists: Iterable[Iterable[int]]) -> _Adjacency:
+        """Create from an adjacency list for each target, in ID order."""
+        offsets = array.array("q", [0])
+        ids = array.array("i")
+        for adjacent in lists:
+            ids.extend(adjacent)
+            offsets.append(len(ids))
+        return cls(offsets, ids)
+
+    def __getitem__(self, target_id: int) -> array.array[int]:
+        """Get the adjacency list for a target."""
+        start = self._offsets[target_id]
+        return self._ids[start : self._offsets[target_id + 1]]
+
+    def reverse(self) -> _Adjacency:
+        """Create the adjacency lists for the reversed edges."""
+        n_targets = len(self._offsets) - 1
+        # Counting sort of the edges by their destination.
+        offsets = array.array("q", bytes(8 * (n_targets + 1)))
+        for target_id in self._ids:
+            offsets[target_id + 1] += 1
+        for target_id in range(n_targets):
+            offsets[target_id + 1] += offsets[target_id]
+        ids = array.array("i", bytes(4 * len(self._ids)))
+        next_pos = offsets[:-1]
+        for source_id in range(n_targets):
+            for target_id in self[source_id]:
+                ids[next_pos[target_id]] = source_id
+                next_pos[target_id] += 1
+        return type(self)(offsets, ids)
+
+
+# Fates and rebuild reasons are stored as a byte each in a compacted database,
+# with zero meaning `None`.
+_fates: list[Optional[Fate]] = [None, *Fate]
+_fate_codes = {fate: code for code, fate in enumerate(_fates)}
+_rebuild_reasons: list[Optional[RebuildReason]] = [None, *RebuildReason]
+_rebuild_reason_codes = {
+    reason: code for code, reason in enumerate(_rebuild_reasons)
+}
+
+
+class _CompactGraph(Mapping[str, "Target"]):
+    """
+    Storage for a compacted database: a mapping of name to target view.
+
+    Each per-target attribute is stored in a list or array indexed by target
+    ID, with targets referred to by ID.
+
+    """
+
+    def __init__(self, targets: Sequence[Target]) -> None:
+        self.names = [target.name for target in targets]
+        self.ids = {name: idx for idx, name in enumerate(self.names)}
+
+        def ids_of(related: Iterable[Target]) -> Iterator[int]:
+            return (self.ids[target.name] for target in related)
+
+        def id_of(target: Optional[Target]) -> int:
+            return -1 if target is None else self.ids[target.name]
+
+        self.deps = _Adjacency.from_lists(ids_of(t.deps) for t in targets)
+        self.incs = _Adjacency.from_lists(ids_of(t.incs) for t in targets)
+        self.newer_than = _Adjacency.from_lists(
+            ids_of(t.newer_than) for t in targets
+        )
+        self.inherits_timestamp_from = array.array(
+            "i", (id_of(t.inherits_timestamp_from) for t in targets)
+        )
+        self.rebuild_reason_targets = array.array(
+            "i", (id_of(t.rebuild_reason_target) for t in targets)
+        )
+        self.deps_rev = self.deps.reverse()
+        self.incs_rev = self.incs.reverse()
+        self.older_than = self.newer_than.reverse()
+        self.bequeaths_timestamp_to = _Adjacency.from_lists(
+            [] if source_id < 0 else [source_id]
+            for source_id in self.inherits_timestamp_from
+        ).reverse()
+        self.timestamps = [target.timestamp for target in targets]
+        self.bindings = [target.binding for target in targets]
+        self.fates = bytes(_fate_codes[target.fate] for target in targets)
+        self.rebuild_reasons = bytes(
+            _rebuild_reason_codes[target.rebuild_reason] for target in targets
+        )
+        # Each distinct tuple of sources is stored once, and referred to by
+        # index.
+        source_codes: dict[tuple[str, ...], int] = {(): 0}
+        self.sources = array.array(
+            "i",
+            (
+                source_codes.setdefault(target.sources, len(source_codes))
+                for target in targets
+            ),
+        )
+        self.source_tuples = list(source_codes)
+
+    def __getitem__(self, name: str) -> Target:
+        return _TargetView(self, self.ids[name])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def view(self, target_id: int) -> Optional[Target]:
+        """Get a view of the target with an ID (`None` for ID -1)."""
+        return None if target_id < 0 else _TargetView(self, target_id)
+
+    def views(self, target_ids: Iterable[int]) -> Iterator[Target]:
+        """Get views of the targets with some IDs."""
+        return (_TargetView(self, target_id) for target_id in target_ids)
+
+
+class _TargetView(Target):
+    """Read-only view of a target in a compacted database."""
+
+    # pylint: disable=super-init-not-called,missing-function-docstring
+
+    __slots__ = ("_graph", "_id")
+
+    def __init__(self, graph: _CompactGraph, target_id: int) -> None:
+        self._graph = graph
+        self._id = target_id
+
+    def __repr__(self) -> str:
+        return f"{Target.__name__}({self.name})"
+
+    @property
+    def name(self) -> str:  # type: ignore[override]
+        return self._graph.names[self._id]
+
+    @property
+    def deps(self) -> Sequence[Target]:  # type: ignore[override]
+        return tuple(self._graph.views(self._graph.deps[self._id]))
+
+    @property
+    def deps_rev(self) -> AbstractSet[Target]:  # type: ignore[override]
+        return frozenset(self._graph.views(self._graph.deps_rev[self._id]))
+
+    @property
+    def incs(self) -> Sequence[Target]:  # type: ignore[override]
+        return tuple(self._graph.views(self._graph.incs[self._id]))
+
+    @property
+    def incs_rev(self) -> AbstractSet[Target]:  # type: ignore[override]
+        return frozenset(self._graph.views(self._graph.incs_rev[self._id]))
+
+    @property
+    def newer_than(self) -> Sequence[Target]:  # type: ignore[override]
+        return tuple(self._graph.views(self._graph.newer_than[self._id]))
+
+    @property
+    def older_than(self) -> AbstractSet[Target]:  # type: ignore[override]
+        return frozenset(self._graph.views(self._graph.older_than[self._id]))
+
+    @property
+    def timestamp(self) -> Optional[datetime.datetime]:  # type: ignore[override]
+        return self._graph.timestamps[self._id]
+
+    @property
+    def inherits_timestamp_from(self) -> Optional[Target]:  # type: ignore[override]
+        return self._graph.view(self._graph.inherits_timestamp_from[self._id])
+
+    @property
+    def bequeaths_timestamp_to(self) -> AbstractSet[Target]:  # type: ignore[override]
+        return frozenset(
+            self._graph.views(self._graph.bequeaths_timestamp_to[self._id])
+        )
+
+    @property
+    def binding(self) -> Optional[str]:  # type: ignore[override]
+        return self._graph.bindings[self._id]
+
+    @property
+    def fate(self) -> Optional[Fate]:  # type: ignore[override]
+        return _fates[self._graph.fates[self._id]]
+
+    @property
+    def rebuild_reason(self) -> Optional[RebuildReason]:  # type: ignore[override]
+        return _rebuild_reasons[self._graph.rebuild_reasons[self._id]]
+
+    @property
+    def rebuild_reason_target(self) -> Optional[Target]:  # type: ignore[override]
+        return self._graph.view(self._graph.rebuild_reason_targets[self._id])
+
+    @property
+    def sources(self) -> tuple[str, ...]:  # type: ignore[override]
+        return self._graph.source_tuples[self._graph.sources[self._id]]
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> NoReturn:
+        raise TypeError("Targets in a compacted database can't be modified")
+
+    add_dependency = add_inclusion = add_i_am_newer_than = _read_only
+    set_timestamp = set_binding = set_fate = _read_only
+    set_rebuild_reason = set_inherits_timestamp_from = add_source = _read_only
@@ -0,0 +1,275 @@
+# ------------------------------------------------------------------------------
+# diff.py - Database comparison module
+#
+# Comparison of the databases from two jam logs, e.g. to find out why one
+# build rebuilt far more than another.
+# ------------------------------------------------------------------------------
+
+"""Comparison of two builds."""
+
+__all__ = (
+    "Change",
+    "DatabaseDiff",
+    "diff",
+    "load_pair",
+    "write_report",
+)
+
+
+import concurrent.futures
+import pathlib
+from typing import Any, Callable, NamedTuple, Sequence, TextIO
+
+from . import database
+
+# Maximum number of items to list in a report for each kind of difference.
+_MAX_REPORT_ITEMS = 20
+
+
+class Change(NamedTuple):
+    """
+    Change to an attribute of a target.
+
+    .. attribute:: name
+
+        Name of the target.
+
+    .. attribute:: old
+
+        Value of the attribute in the old database.
+
+    .. attribute:: new
+
+        Value of the attribute in the new database.
+
+    """
+
+    name: str
+    old: Any
+    new: Any
+
+
+class DatabaseDiff(NamedTuple):
+    """
+    Differences between two databases, with targets matched by name.
+
+    Each list is in the order the targets were added to the new database
+    (or to the old one, for targets that have gone). Edges are only compared
+    for targets in both databases: the edges of added and removed targets
+    aren't listed separately.
+
+    .. attribute:: added
+
+        Names of the targets only in the new database.
+
+    .. attribute:: removed
+
+        Names of the targets only in the old database.
+
+    .. attribute:: newly_rebuilt
+
+        Names of the targets that were rebuilt in the new build, but weren't
+        rebuilt in the old one (or weren't in it at all).
+
+    .. attribute:: no_longer_rebuilt
+
+        Names of the targets that were rebuilt in the old build, but aren't
+        rebuilt in the new one (or aren't in it at all).
+
+    .. attribute:: changed_reasons
+
+        Changes to the rebuild reasons of targets rebuilt in both builds.
+
+    .. attribute:: changed_fates
+
+        Changes to the fates of targets.
+
+    .. attribute:: changed_bindings
+
+        Changes to the bindings of targets.
+
+    .. attribute:: added_deps
+
+        Dependencies only in the new database, as (target, dependency) name
+        pairs.
+
+    .. attribute:: removed_deps
+
+        Dependencies only in the old database.
+
+    .. attribute:: added_incs
+
+        Includes only in the new database, as (target, included target) name
+        pairs.
+
+    .. attribute:: removed_incs
+
+        Includes only in the old database.
+
+    """
+
+    added: list[str]
+    removed: list[str]
+    newly_rebuilt: list[str]
+    no_longer_rebuilt: list[str]
+    changed_reasons: list[Change]
+    changed_fates: list[Change]
+    changed_bindings: list[Change]
+    added_deps: list[tuple[str, str]]
+    removed_deps: list[tuple[str, str]]
+    added_incs: list[tuple[str, str]]
+    removed_incs: list[tuple[str, str]]
+
+
+def diff(old: database.Database, new: database.Database) -> DatabaseDiff:
+    """
+    Find the differences between two databases.
+
+    Targets are looked up by name, so this runs in time linear in the size of
+    the databases.
+
+    """
+    result = DatabaseDiff([], [], [], [], [], [], [], [], [], [], [])
+    for new_target in new.targets():
+        name = new_target.name
+        old_target = old.find_target(name)
+        if old_target is None:
+            result.added.append(name)
+            if new_target.rebuilt:
+                result.newly_rebuilt.append(name)
+            continue
+
+        if new_target.rebuilt and not old_target.rebuilt:
+            result.newly_rebuilt.append(name)
+        elif old_target.rebuilt and not new_target.rebuilt:
+            result.no_longer_rebuilt.append(name)
+        elif new_target.rebuild_reason != old_target.rebuild_reason:
+            result.changed_reasons.append(
+                Change(
+                    name, old_target.rebuild_reason, new_target.rebuild_reason
+                )
+            )
+        if new_target.fate != old_target.fate:
+            result.changed_fates.append(
+                Change(name, old_target.fate, new_target.fate)
+            )
+        if new_target.binding != old_target.binding:
+            result.changed_bindings.append(
+                Change(name, old_target.binding, new_target.binding)
+            )
+        _diff_edges(
+            name,
+            old_target.deps,
+            new_target.deps,
+            result.added_deps,
+            result.removed_deps,
+        )
+        _diff_edges(
+            name,
+            old_target.incs,
+            new_target.incs,
+            result.added_incs,
+            result.removed_incs,
+        )
+
+    for old_target in old.targets():
+        if new.find_target(old_target.name) is None:
+            result.removed.append(old_target.name)
+            if old_target.rebuilt:
+                result.no_longer_rebuilt.append(old_target.name)
+    return result
+
+
+def _diff_edges(
+    name: str,
+    old_targets: Sequence[database.Target],
+    new_targets: Sequence[database.Target],
+    added: list[tuple[str, str]],
+    removed: list[tuple[str, str]],
+) -> None:
+    """Add the edges that differ between two lists of related targets."""
+    old_names = [target.name for target in old_targets]
+    new_names = [target.name for target in new_targets]
+    if old_names == new_names:
+        # By far the most common case.
+        return
+    old_set, new_set = set(old_names), set(new_names)
+    added.extend((name, other) for other in new_names if other not in old_set)
+    removed.extend(
+        (name, other) for other in old_names if other not in new_set
+    )
+
+
+def load_pair(
+    load: Callable[[pathlib.Path], database.Database],
+    old_logfile: pathlib.Path,
+    new_logfile: pathlib.Path,
+) -> tuple[database.Database, database.Database]:
+    """
+    Load the databases for two log files at once.
+
+    The old log is loaded in a worker process while the new one is loaded in
+    this process, and its targets are then copied back.
+
+    :param load:
+        Function that loads the database for a log file. Must be picklable
+        (e.g. a module-level function).
+
+    """
+    with concurrent.futures.ProcessPoolExecutor(1) as pool:
+        old_records = pool.submit(_load_records, load, old_logfile)
+        new_db = load(new_logfile)
+        old_db = database.Database()
+        old_db.add_records(old_records.result())
+    return old_db, new_db
+
+
+def _load_records(
+    load: Callable[[pathlib.Path], database.Database], logfile: pathlib.Path
+) -> list[database.TargetRecord]:
+    """Load the database for a log file (in a worker process)."""
+    return list(load(logfile).records())
+
+
+def write_report(
+    result: DatabaseDiff, file: TextIO, limit: int = _MAX_REPORT_ITEMS
+) -> None:
+    """
+    Write a summary of the differences between two databases.
+
+    :param limit:
+        Maximum number of items to list for each kind of difference.
+
+    """
+
+    def section(
+        title: str, items: Sequence[Any], fmt: Callable[[Any], str] = str
+    ) -> None:
+        file.write(f"{title}: {len(items)}\n")
+        for item in items[:limit]:
+            file.write(f"    {fmt(item)}\n")
+        if len(items) > limit:
+            file.write(f"    ... and {len(items) - limit} more\n")
+
+    def describe(value: Any) -> str:
+        if value is None:
+            return "none"
+        return str(getattr(value, "value", value))
+
+    def change(item: Change) -> str:
+        return f"{item.name}: {describe(item.old)} -> {describe(item.new)}"
+
+    def edge(item: tuple[str, str]) -> str:
+        return f"{item[0]} -> {item[1]}"
+
+    section("Newly rebuilt targets", result.newly_rebuilt)
+    section("No longer rebuilt targets", result.no_longer_rebuilt)
+    section("Changed rebuild reasons", result.changed_reasons, change)
+    section("Changed fates", result.changed_fates, change)
+    section("Changed bindings", result.changed_bindings, change)
+    section("Added targets", result.added)
+    section("Removed targets", result.removed)
+    section("Added dependencies", result.added_deps, edge)
+    section("Removed dependencies", result.removed_deps, edge)
+    section("Added includes", result.added_incs, edge)
+    section("Removed includes", result.removed_incs, edge)
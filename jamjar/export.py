@@ -0,0 +1,243 @@
+# ------------------------------------------------------------------------------
+# export.py - Database export module
+#
+# Writing the contents of a database out for use by other tools.
+# ------------------------------------------------------------------------------
+
+"""Export of the target graph."""
+
+__all__ = (
+    "DOT_DIRECTIONS",
+    "FORMATS",
+    "MAX_DOT_NODES",
+    "export",
+    "record_to_json",
+    "write_dot",
+    "write_ndjson",
+)
+
+
+import json
+from typing import Any, Callable, Iterator, TextIO
+
+from . import database
+from . import query
+
+# Export formats.
+FORMATS = ("ndjson",)
+
+# Default maximum number of targets in a DOT graph.
+MAX_DOT_NODES = 500
+
+# Fill colours for targets in DOT graphs, by rebuild reason (targets with
+# other reasons get the default rebuilt colour).
+_REBUILT_COLOR = "lightpink"
+_REASON_COLORS = {
+    database.RebuildReason.MISSING: "orange",
+    database.RebuildReason.TOUCHED: "yellow",
+}
+
+
+def record_to_json(record: database.TargetRecord) -> dict[str, Any]:
+    """
+    Convert a target record to JSON-serializable form.
+
+    Other targets are referred to by name, timestamps are in ISO 8601 format,
+    and fates and rebuild reasons are given by their descriptions (as shown by
+    the interactive commands).
+
+    """
+    return {
+        "name": record.name,
+        "binding": record.binding,
+        "fate": None if record.fate is None else record.fate.value,
+        "timestamp": (
+            None if record.timestamp is None else record.timestamp.isoformat()
+        ),
+        "rebuild_reason": (
+            None
+            if record.rebuild_reason is None
+            else record.rebuild_reason.value
+        ),
+        "rebuild_reason_target": record.rebuild_reason_target,
+        "deps": record.deps,
+        "incs": record.incs,
+        "newer_than": record.newer_than,
+        "inherits_timestamp_from": record.inherits_timestamp_from,
+        "sources": record.sources,
+    }
+
+
+def write_ndjson(db: database.Database, file: TextIO) -> int:
+    """
+    Write every target in a database to a file, one JSON object per line.
+
+    Targets are written in the order they were added, as they're read from
+    the database, so memory use doesn't grow with the size of the database.
+
+    :return:
+        The number of targets written.
+
+    """
+    encode = json.JSONEncoder(check_circular=False).encode
+    count = 0
+    for record in db.records():
+        file.write(encode(record_to_json(record)))
+        file.write("\n")
+        count += 1
+    return count
+
+
+def export(db: database.Database, file: TextIO, fmt: str) -> int:
+    """
+    Export every target in a database to a file.
+
+    :param fmt:
+        One of `FORMATS`.
+
+    :return:
+        The number of targets written.
+
+    """
+    if fmt == "ndjson":
+        return write_ndjson(db, file)
+    raise ValueError(f"Unknown export format {fmt!r}")
+
+
+def _dot_deps(
+    target: database.Target,
+) -> Iterator[tuple[database.Target, str]]:
+    """Edges from a target to the targets it depends on or includes."""
+    for dep in target.deps:
+        yield dep, ""
+    for inc in target.incs:
+        yield inc, "style=dashed"
+
+
+def _dot_dependents(
+    target: database.Target,
+) -> Iterator[tuple[database.Target, str]]:
+    """Edges to a target from the targets that depend on or include it."""
+    for dependent in target.deps_rev:
+        yield dependent, ""
+    for includer in target.incs_rev:
+        yield includer, "style=dashed"
+
+
+def _dot_causes(
+    target: database.Target,
+) -> Iterator[tuple[database.Target, str]]:
+    """Edges from a target to the targets that caused its rebuild."""
+    reason_target = target.rebuild_reason_target
+    if reason_target is not None:
+        assert target.rebuild_reason is not None
+        label = _dot_quote(target.rebuild_reason.value)
+        yield reason_target, f"style=bold, label={label}"
+    for dep in query.deps_rebuilt(target):
+        if dep != reason_target:
+            yield dep, ""
+
+
+# Ways of finding the neighbourhood of a target, by name: each gives the edges
+# from a target to its neighbours.
+_DOT_EDGES: dict[
+    str, Callable[[database.Target], Iterator[tuple[database.Target, str]]]
+] = {
+    "deps": _dot_deps,
+    "dependents": _dot_dependents,
+    "causes": _dot_causes,
+}
+
+DOT_DIRECTIONS = tuple(_DOT_EDGES)
+
+
+def write_dot(
+    target: database.Target,
+    file: TextIO,
+    *,
+    direction: str = "deps",
+    depth: int = 1,
+    max_nodes: int = MAX_DOT_NODES,
+) -> int:
+    """
+    Write the graph of the targets around a target in Graphviz DOT format.
+
+    Targets are found breadth-first and written as they're found, so only the
+    set of targets written so far is kept in memory. Once `max_nodes` targets
+    have been written the search stops (so the neighbourhood of a target with
+    very many edges is only partly shown), and the graph is labelled as
+    truncated.
+
+    Edges always point from a target to a dependency (dashed for includes),
+    or to a cause of its rebuild. Targets are coloured by rebuild reason, and
+    labelled with their fate.
+
+    :param direction:
+        One of `DOT_DIRECTIONS`: follow dependencies and includes ("deps"),
+        the reverse ("dependents"), or the causes of rebuilds ("causes").
+    :param depth:
+        Maximum number of edges from the target to any other target shown.
+
+    :return:
+        The number of targets written.
+
+    """
+    try:
+        edges = _DOT_EDGES[direction]
+    except KeyError:
+        raise ValueError(f"Unknown direction {direction!r}") from None
+    reverse = direction == "dependents"
+
+    file.write("digraph jamjar {\n")
+    file.write("    node [shape=box, style=filled, fillcolor=white];\n")
+    file.write(_dot_node(target, "penwidth=3"))
+    seen = {target}
+    frontier = [target]
+    truncated = False
+    for _ in range(depth):
+        next_frontier = []
+        for node in frontier:
+            for other, attrs in edges(node):
+                if other not in seen:
+                    if len(seen) >= max_nodes:
+                        truncated = True
+                        break
+                    seen.add(other)
+                    next_frontier.append(other)
+                    file.write(_dot_node(other))
+                src, dest = (other, node) if reverse else (node, other)
+                file.write(
+                    f"    {_dot_quote(src.name)} -> {_dot_quote(dest.name)}"
+                    f"{f' [{attrs}]' if attrs else ''};\n"
+                )
+            if truncated:
+                break
+        if truncated:
+            break
+        frontier = next_frontier
+    if truncated:
+        label = _dot_quote(f"Truncated at {max_nodes} targets")
+        file.write(f"    label={label};\n")
+    file.write("}\n")
+    return len(seen)
+
+
+def _dot_node(target: database.Target, *extra_attrs: str) -> str:
+    """Statement for a target in a DOT graph."""
+    label = target.brief_name()
+    if target.fate is not None:
+        label += f"\n({target.fate.value})"
+    attrs = [f"label={_dot_quote(label)}", *extra_attrs]
+    if target.rebuild_reason is not None:
+        color = _REASON_COLORS.get(target.rebuild_reason, _REBUILT_COLOR)
+        attrs.append(f"fillcolor={color}")
+        attrs.append(f"tooltip={_dot_quote(target.rebuild_reason.value)}")
+    return f"    {_dot_quote(target.name)} [{', '.join(attrs)}];\n"
+
+
+def _dot_quote(text: str) -> str:
+    """Quote a string for use as a DOT ID (including any newlines)."""
+    escaped = (
+        text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+    return f'"{escaped}"'
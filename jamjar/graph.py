@@ -0,0 +1,171 @@
+# ------------------------------------------------------------------------------
+# graph.py - Graph analysis module
+#
+# Whole-graph analysis of the targets in a database.
+# ------------------------------------------------------------------------------
+
+"""Dependency graph analysis."""
+
+__all__ = (
+    "Condensation",
+    "condense",
+    "strongly_connected_components",
+    "successors",
+)
+
+
+import itertools
+from typing import Callable, Iterable, Iterator
+
+from . import database
+
+
+def successors(target: database.Target) -> Iterator[database.Target]:
+    """
+    Iterator that yields the targets a target has edges to in the graph.
+
+    That is, its dependencies and the targets it includes.
+
+    """
+    return itertools.chain(target.deps, target.incs)
+
+
+def strongly_connected_components(
+    targets: Iterable[database.Target],
+    get_successors: Callable[
+        [database.Target], Iterable[database.Target]
+    ] = successors,
+) -> Iterator[list[database.Target]]:
+    """
+    Iterator that yields the strongly connected components of a graph.
+
+    Uses Tarjan's algorithm, without recursion (so graphs of any depth can be
+    handled), in time linear in the size of the graph.
+
+    :param targets:
+        Targets to start searching from. All targets reachable from them are
+        included in the result.
+    :param get_successors:
+        Function giving the targets each target has edges to (by default,
+        `successors`).
+
+    :return:
+        Iterator over the components, each in the order its targets were
+        found. Every component is yielded after all the components it has
+        edges to (i.e. in reverse topological order).
+
+    """
+    index: dict[database.Target, int] = {}
+    lowlink: dict[database.Target, int] = {}
+    stack: list[database.Target] = []
+    on_stack: set[database.Target] = set()
+
+    for root in targets:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(get_successors(root)))]
+        while work:
+            node, node_successors = work[-1]
+            for successor in node_successors:
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(get_successors(successor))))
+                    break
+                elif successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    # The node is the root of a component, which is made up of
+                    # it and everything above it on the stack.
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    component.reverse()
+                    yield component
+
+
+class Condensation:
+    """
+    Condensation of the dependency graph: its components, as a DAG.
+
+    Each strongly connected component of the graph of dependencies and
+    includes (see `successors`) is a node in the DAG. Components are numbered
+    in reverse topological order, so every edge goes from a higher-numbered
+    component to a lower-numbered one. Processing components in order (or in
+    reverse) therefore gives a linear-time, guaranteed-to-terminate walk over
+    the graph, even if it has cycles.
+
+    .. attribute:: components
+
+        The targets in each component, indexed by component number.
+
+    .. attribute:: component_of
+
+        Dict mapping each target to its component number.
+
+    .. attribute:: successors
+
+        Numbers of the components each component has edges to, indexed by
+        component number.
+
+    """
+
+    def __init__(self, targets: Iterable[database.Target]) -> None:
+        self.components: list[list[database.Target]] = list(
+            strongly_connected_components(targets)
+        )
+        self.component_of: dict[database.Target, int] = {
+            target: idx
+            for idx, component in enumerate(self.components)
+            for target in component
+        }
+        self.successors: list[list[int]] = []
+        # Components whose targets have edges to each other (so including
+        # single targets that depend on or include themselves).
+        self._cyclic: list[bool] = []
+        for idx, component in enumerate(self.components):
+            component_successors = {
+                self.component_of[successor]
+                for target in component
+                for successor in successors(target)
+            }
+            self._cyclic.append(idx in component_successors)
+            component_successors.discard(idx)
+            self.successors.append(sorted(component_successors))
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+    def is_cyclic(self, component: int) -> bool:
+        """`True` if a component contains any cycles."""
+        return self._cyclic[component]
+
+    def cycles(self) -> list[list[database.Target]]:
+        """Return the components containing cycles, largest first."""
+        return sorted(
+            (
+                component
+                for idx, component in enumerate(self.components)
+                if self._cyclic[idx]
+            ),
+            key=len,
+            reverse=True,
+        )
+
+
+def condense(db: database.Database) -> Condensation:
+    """Find the condensation of the whole dependency graph of a database."""
+    return Condensation(db.targets())
@@ -6,28 +6,107 @@
 
 """Parsers for Jam debug output."""
 
-__all__ = ("parse", "DDParser", "DMParser", "DCParser")
+__all__ = (
+    "parse",
+    "parse_many",
+    "ParseStats",
+    "scan_lines",
+    "scan_stream",
+    "STDIN",
+    "CombinedParser",
+    "LogFollower",
+    "DDParser",
+    "DMParser",
+    "DCParser",
+)
 
 import pathlib
+import sys
+import time
+from typing import Optional
 
 from .. import database
 
 from ._dd import DDParser
 from ._dm import DMParser
 from ._dc import DCParser
+from ._combined import CombinedParser
+from ._follow import LogFollower
+from ._input import STDIN, open_stream
+from ._parallel import parse_many, parse_parallel
+from ._scan import scan_lines, scan_stream
+from ._stats import ParseStats
 
 
-def parse(db: database.Database, logfile: pathlib.Path) -> None:
+def parse(
+    db: database.Database,
+    logfile: pathlib.Path,
+    *,
+    jobs: int = 1,
+    stats: Optional[ParseStats] = None,
+) -> None:
     """
     Parse as much information as possible from the given log file into a DB.
 
+    The log file is only read once, with each line being passed to whichever
+    parsers are interested in it. Lines that no parser is interested in are
+    skipped without being decoded.
+
+    The log file may be compressed (with gzip, xz or bzip2), or `STDIN`. In
+    either case it's decompressed and parsed incrementally, as a stream.
+
     :param db:
         Target database to populate.
     :param logfile:
         Source jam log file containing debug output.
+    :param jobs:
+        Number of processes to split the parsing between. Streams are always
+        parsed in a single process.
+    :param stats:
+        Statistics to add the work done and the targets created to.
+
+    """
+    print("Running {}".format(CombinedParser.__name__), file=sys.stderr)
+    if stats is None:
+        _parse(db, logfile, jobs, None)
+        return
+
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    before = db.summary()
+    parser = _parse(db, logfile, jobs, stats)
+    if parser is not None:
+        stats.add_matches(parser)
+    stats.add_created(before, db.summary())
+    stats.cpu_time += time.process_time() - start_cpu
+    stats.wall_time += time.perf_counter() - start_wall
 
+
+def _parse(
+    db: database.Database,
+    logfile: pathlib.Path,
+    jobs: int,
+    stats: Optional[ParseStats],
+) -> Optional[CombinedParser]:
     """
-    for parser_cls in [DCParser, DDParser, DMParser]:
-        print("Running {}".format(parser_cls.__name__))
-        with open(logfile) as logs:
-            parser_cls(db).parse(logs)
+    Parse a log file into a DB.
+
+    :return:
+        The parser used, or `None` if the parsing was done by worker
+        processes.
+
+    """
+    parser = CombinedParser(db)
+    with open_stream(logfile) as stream:
+        if stream is not None:
+            if jobs > 1:
+                print(
+                    "Can't split a stream between processes", file=sys.stderr
+                )
+            parser.parse(scan_stream(stream, stats=stats))
+            return parser
+
+    if jobs > 1:
+        parse_parallel(db, logfile, jobs, stats=stats)
+        return None
+    parser.parse(scan_lines(logfile, stats=stats))
+    return parser
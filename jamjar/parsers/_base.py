@@ -10,6 +10,7 @@
 
 __all__ = ("BaseParser",)
 
+import collections
 from typing import Iterable
 
 from .. import database
@@ -23,11 +24,51 @@ class BaseParser:
 
         Database to be updated with parsed debug information.
 
+    .. attribute:: line_prefixes
+
+        Prefixes of the lines that this parser can get information from, or
+        empty if the parser needs to see every line.
+
+    .. attribute:: matches
+
+        Number of lines the parser has got information from, by type of line
+        (e.g. "Depends").
+
     """
 
+    line_prefixes: tuple[str, ...] = ()
+
     def __init__(self, db: database.Database) -> None:
         self.db = db
+        self.matches: collections.defaultdict[str, int] = (
+            collections.defaultdict(int)
+        )
+        # Targets the parser has looked up, in the order it first did so.
+        self._targets: dict[str, database.Target] = {}
 
     def parse(self, logs: Iterable[str]) -> None:
         """Update the database based on parsing the given jam log file."""
+        for line in logs:
+            self.parse_line(line)
+        self.finish()
+
+    def parse_line(self, line: str) -> None:
+        """Update the database based on parsing the next line of the logs."""
         raise NotImplementedError
+
+    def finish(self) -> None:
+        """Handle the end of the logs."""
+
+    def _get_target(self, name: str) -> database.Target:
+        """
+        Get a target from the database, creating it if necessary.
+
+        Unlike looking the target up in the database directly, this records
+        the order the parser first mentioned each target in.
+
+        """
+        try:
+            return self._targets[name]
+        except KeyError:
+            target = self._targets[name] = self.db.get_target(name)
+            return target
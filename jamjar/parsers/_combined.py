@@ -0,0 +1,223 @@
+# ------------------------------------------------------------------------------
+# _combined.py
+#
+# Parser that feeds all of the individual debug parsers from a single pass over
+# the jam logs.
+# ------------------------------------------------------------------------------
+
+"""Single-pass parser for all supported jam debug output"""
+
+__all__ = ("CombinedParser",)
+
+import itertools
+from typing import AbstractSet, Iterable, Sequence
+
+from .. import database
+
+from ._base import BaseParser
+from ._dc import DCParser
+from ._dd import DDParser
+from ._dm import DMParser
+
+
+class CombinedParser(BaseParser):
+    """
+    Parser for '-dc', '-dd' and '-dm' debug output, reading the logs once.
+
+    Each line is handed only to the parsers that might be interested in it,
+    based on a cheap check of the line's prefix.
+
+    The results are the same as running the '-dc', '-dd' and '-dm' parsers
+    over the logs in turn, including the order targets are added to the
+    database in: when the logs end, the targets added are put in that order.
+
+    .. attribute:: dc_parser
+
+        Parser for the '-dc' output.
+
+    .. attribute:: dd_parser
+
+        Parser for the '-dd' output.
+
+    .. attribute:: dm_parser
+
+        Parser for the '-dm' output.
+
+    .. attribute:: dc_fated
+
+        Targets whose fate was last set from '-dc' output. (Fates from '-dm'
+        output take precedence, as if the '-dm' parser had run last.)
+
+    .. attribute:: order_groups
+
+        Once the logs have ended, the number of targets added that were
+        mentioned in '-dc' output, and the number of the others that were
+        mentioned in '-dd' output. The targets added are in that order, with
+        the rest (only mentioned in '-dm' output) after them.
+
+    """
+
+    def __init__(self, db: database.Database) -> None:
+        super().__init__(db)
+        self.dc_fated: set[database.Target] = set()
+        self.dc_parser: DCParser = _DCParser(db, self.dc_fated)
+        self.dd_parser = DDParser(db)
+        self.dm_parser: DMParser = _DMParser(db, self.dc_fated)
+        self.order_groups = (0, 0)
+        # Number of targets in the database before this parser added any.
+        self._existing_targets = len(db)
+        # Names of the targets merged in (see `merge_records`) that were
+        # mentioned in '-dc' output, '-dd' output, and neither, in order.
+        self._merged_order: tuple[list[str], list[str], list[str]] = (
+            [],
+            [],
+            [],
+        )
+
+    def parse_line(self, line: str) -> None:
+        """Pass a line to each of the parsers that might be interested."""
+        # The '-dc' parser relates adjacent lines to each other, so it has to
+        # see every line (even those that are only of interest to the other
+        # parsers) unless it's idle.
+        if line.startswith(self.dd_parser.line_prefixes):
+            self.dd_parser.parse_line(line)
+        elif line.startswith(self.dm_parser.line_prefixes):
+            self.dm_parser.parse_line(line)
+        else:
+            self.dc_parser.parse_line(line)
+            return
+        if not self.dc_parser.idle:
+            self.dc_parser.parse_line(line)
+
+    def finish(self) -> None:
+        """Handle the end of the logs."""
+        self.dc_parser.finish()
+        self.dd_parser.finish()
+        self.dm_parser.finish()
+        self.order_groups = self._restore_order()
+
+    def _restore_order(self) -> tuple[int, int]:
+        """
+        Put the targets added into the order that running the parsers in turn
+        would have added them in.
+
+        That's the targets mentioned in '-dc' output, then those mentioned in
+        '-dd' output, then the rest, each in the order they were first
+        mentioned. (The rest were only mentioned in '-dm' output, so were
+        added when they were first mentioned there: their relative order is
+        already right.)
+
+        :return:
+            The `order_groups`.
+
+        """
+        added = [
+            target.name
+            for target in itertools.islice(
+                self.db.targets(), self._existing_targets, None
+            )
+        ]
+        if not added:
+            return 0, 0
+        dc_merged, dd_merged, other_merged = self._merged_order
+        dc_names: Iterable[str] = itertools.chain(
+            dc_merged, self.dc_parser._targets
+        )
+        dd_names: Iterable[str] = itertools.chain(
+            dd_merged, self.dd_parser._targets
+        )
+        if self._existing_targets:
+            # Only reorder the targets added, not any mentioned that were
+            # already there.
+            added_set = set(added)
+            dc_names = (name for name in dc_names if name in added_set)
+            dd_names = (name for name in dd_names if name in added_set)
+        order = dict.fromkeys(dc_names)
+        dc_count = len(order)
+        order.update(dict.fromkeys(dd_names))
+        dd_count = len(order) - dc_count
+        order.update(dict.fromkeys(other_merged))
+        order.update(dict.fromkeys(added))
+        if list(order) != added:
+            self.db.move_to_end(order)
+        return dc_count, dd_count
+
+    def merge_records(
+        self,
+        records: Sequence[database.TargetRecord],
+        dc_fated: AbstractSet[str],
+        order_groups: tuple[int, int],
+    ) -> None:
+        """
+        Merge in targets parsed separately from the following part of the logs.
+
+        The result is the same as if this parser had parsed that part of the
+        logs itself.
+
+        :param records:
+            Records for the targets parsed from the following part of the logs,
+            in the order the targets were added to their database.
+        :param dc_fated:
+            Names of the targets in `records` whose fate came from '-dc'
+            output.
+        :param order_groups:
+            The `order_groups` of the parser that produced `records`.
+
+        """
+        dc_count, dd_count = order_groups
+        names = [record.name for record in records]
+        dc_merged, dd_merged, other_merged = self._merged_order
+        dc_merged.extend(names[:dc_count])
+        dd_merged.extend(names[dc_count : dc_count + dd_count])
+        other_merged.extend(names[dc_count + dd_count :])
+        self.db.add_records(
+            [
+                (
+                    record._replace(fate=None)
+                    if record.name in dc_fated
+                    else record
+                )
+                for record in records
+            ]
+        )
+        for record in records:
+            if record.fate is not None:
+                target = self.db.get_target(record.name)
+                if record.name in dc_fated:
+                    self.dc_parser._set_fate(target, record.fate)
+                else:
+                    self.dc_fated.discard(target)
+
+
+# When the parsers are run separately, the '-dm' parser runs last, so any fate
+# it reports for a target wins over any from the '-dc' output. Preserve that
+# precedence when the two sets of output are interleaved.
+
+
+class _DCParser(DCParser):
+    """'-dc' parser that defers to fates from '-dm' output."""
+
+    def __init__(
+        self, db: database.Database, dc_fated: set[database.Target]
+    ) -> None:
+        super().__init__(db)
+        self._dc_fated = dc_fated
+
+    def _set_fate(self, target: database.Target, fate: database.Fate) -> None:
+        if target.fate is None or target in self._dc_fated:
+            self._dc_fated.add(target)
+            target.set_fate(fate)
+
+
+class _DMParser(DMParser):
+    """'-dm' parser whose fates override those from '-dc' output."""
+
+    def __init__(
+        self, db: database.Database, dc_fated: set[database.Target]
+    ) -> None:
+        super().__init__(db)
+        self._dc_fated = dc_fated
+
+    def _set_fate(self, target: database.Target, fate: database.Fate) -> None:
+        self._dc_fated.discard(target)
+        target.set_fate(fate)
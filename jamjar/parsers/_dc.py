@@ -11,9 +11,8 @@
 
 __all__ = ("DCParser",)
 
-import collections
 import re
-from typing import Iterable, Iterator, Optional
+from typing import Optional
 
 from .. import database
 
@@ -21,84 +20,107 @@ from ._base import BaseParser
 
 
 class DCParser(BaseParser):
-    """Parser for '-dc' debug output."""
+    """
+    Parser for '-dc' debug output.
+
+    Lines are parsed as they're read. The only state carried between lines is
+    what's needed to relate a line to the one(s) before it:
+
+    - A fate line may be followed by "newer than" information for the same
+      target.
+    - A "rebuilding" line may be followed by a run of timestamp inheritance
+      lines.
+
+    """
 
     # See DEBUG_CAUSES in jam for the relevant debug output.
 
-    def parse(self, logs: Iterable[str]) -> None:
-        """Parse '-dc' debug output from the given jam logs."""
-        lines = collections.deque(logs)
-        while True:
-            line = self._consume_line(lines)
-            if line is None:
-                break
+    def __init__(self, db: database.Database) -> None:
+        super().__init__(db)
+        # Target whose fate was given by the previous line, if any.
+        self._fate_target: Optional[database.Target] = None
+        # Whether the previous line was part of a "rebuilding" line and any
+        # following timestamp inheritance lines.
+        self._in_inherits_run = False
 
+    def parse_line(self, line: str) -> None:
+        """Parse a single line of '-dc' debug output."""
+        line = line.strip()
+
+        if self._in_inherits_run:
+            if self._parse_inherits_timestamp_line(line):
+                return
+            # End of the run: parse this line afresh.
+            self._in_inherits_run = False
+
+        target = self._fate_target
+        if target is not None:
+            self._fate_target = None
+            older_target = self._parse_newer_than_line(line)
+            if older_target is not None:
+                # We've consumed all of the inter-related lines.
+                target.add_i_am_newer_than(older_target)
+                self.matches["newer than"] += 1
+                return
+        else:
             target = self._parse_fate_line(line)
             if target is not None:
-                line = self._consume_line(lines)
-                if line is None:
-                    break
-
-                older_target = self._parse_newer_than_line(line)
-                if older_target is not None:
-                    # Record the info and go back to the top; we've consumed
-                    # all of the inter-related lines.
-                    target.add_i_am_newer_than(older_target)
-                    continue
-
-            # Two possibilities at this point:
-            #   - Still processing the first line from this iteration; it was
-            #     not fate-related
-            #   - First line did give fate information, but the second line
-            #     wasn't giving related "newer than" information.
-            #
-            # Either way we're now on to some form of "rebuilding" line, or a
-            # line that's not interesting at all.
-            rebuilding = self._parse_rebuilding_line(line)
-
-            # May have some timestamp inheritance info to follow.
-            if rebuilding:
-                self._parse_inherits_timestamp_lines(lines)
+                # May have "newer than" information to follow.
+                self._fate_target = target
+                return
 
-    def _consume_line(self, lines: collections.deque[str]) -> Optional[str]:
+        # Two possibilities at this point:
+        #   - This line is not fate-related
+        #   - The previous line gave fate information, but this line doesn't
+        #     give related "newer than" information.
+        #
+        # Either way we're now on to some form of "rebuilding" line, or a line
+        # that's not interesting at all. May have some timestamp inheritance
+        # info to follow a "rebuilding" line.
+        self._in_inherits_run = self._parse_rebuilding_line(line)
+
+    @property
+    def idle(self) -> bool:
         """
-        Read the next line.
+        `True` if no state is being carried over to the next line.
 
-        - Returns `None` if there's no remaining input.
-        - Otherwise returns the next line with whitespace stripped at the start
-          and end.
+        While idle, lines that aren't of interest to this parser can be skipped
+        without affecting the results.
 
         """
-        try:
-            line = lines.popleft()
-        except IndexError:
-            return None
-        else:
-            return line.strip()
+        return self._fate_target is None and not self._in_inherits_run
 
-    def _regurgitate_line(
-        self, lines: collections.deque[str], line: str
-    ) -> None:
+    @classmethod
+    def leaves_idle(cls, line: str) -> bool:
         """
-        Express regret for eating a line,
+        `True` if parsing the given line always leaves the parser idle.
 
-        Makes it available for the next `_consume_line` call.
+        That is, no state is carried over to the next line, regardless of the
+        state before parsing the line.
 
         """
-        lines.appendleft(line)
+        line = line.strip()
+        return not (
+            line.startswith(cls._causes_fates)
+            or line.startswith(cls._rebuilding_prefixes)
+            or cls._inherits_timestamp_regex.search(line)
+        )
+
+    def finish(self) -> None:
+        """Forget any state relating to the final lines of the logs."""
+        self._fate_target = None
+        self._in_inherits_run = False
 
-    _causes_fates = {
+    _causes_fates = (
         database.Fate.NEWER.value,
         database.Fate.TEMP.value,
         database.Fate.TOUCHED.value,
         database.Fate.MISSING.value,
-    }
+    )
 
     def _is_fate(self, line: str) -> bool:
         """Does the given line report a target's fate?"""
-        return any(
-            line.startswith(fate_name) for fate_name in self._causes_fates
-        )
+        return line.startswith(self._causes_fates)
 
     def _parse_fate_line(self, line: str) -> Optional[database.Target]:
         """
@@ -112,11 +134,16 @@ class DCParser(BaseParser):
             return None
         else:
             fate_name, target_name = line.split(maxsplit=1)
-            target = self.db.get_target(target_name)
+            target = self._get_target(target_name)
             fate = database.Fate(fate_name)
-            target.set_fate(fate)
+            self._set_fate(target, fate)
+            self.matches[fate_name] += 1
             return target
 
+    def _set_fate(self, target: database.Target, fate: database.Fate) -> None:
+        """Record a target's fate, as reported in a fate line."""
+        target.set_fate(fate)
+
     def _parse_newer_than_line(self, line: str) -> Optional[database.Target]:
         """
         Attempt to parse "newer than" information.
@@ -129,8 +156,9 @@ class DCParser(BaseParser):
             return None
         else:
             older_target_name = line.split(":", maxsplit=1)[1].strip()
-            return self.db.get_target(older_target_name)
+            return self._get_target(older_target_name)
 
+    _rebuilding_prefixes = ("Rebuilding ", "Inclusions rebuilding for ")
     _rebuilding_target_regex = re.compile(r'[^"]+\s+"(?P<target>[^"]+)"')
     _rebuilding_reason_regex = re.compile(
         r'(?P<reason>[^"]+)\s+"(?P<target>[^"]+)"'
@@ -145,10 +173,7 @@ class DCParser(BaseParser):
         Return `True` if anything was parsed.
 
         """
-        if not (
-            line.startswith("Rebuilding ")
-            or line.startswith("Inclusions rebuilding for ")
-        ):
+        if not line.startswith(self._rebuilding_prefixes):
             return False
 
         else:
@@ -161,7 +186,7 @@ class DCParser(BaseParser):
             match = self._rebuilding_target_regex.match(target_info)
             if match is None:
                 raise ValueError(f"Couldn't parse target from {target_info=}")
-            target = self.db.get_target(match.group("target"))
+            target = self._get_target(match.group("target"))
 
             reason_info = reason_info.strip()
             # Don't need any trailing 'was updated' to disambiguate.
@@ -172,7 +197,7 @@ class DCParser(BaseParser):
             match = self._rebuilding_reason_regex.match(reason_info)
             if match is not None:
                 reason = match.group("reason")
-                related_target = self.db.get_target(match.group("target"))
+                related_target = self._get_target(match.group("target"))
             else:
                 reason = reason_info
                 related_target = None
@@ -214,32 +239,29 @@ class DCParser(BaseParser):
                     f"{reason=}, {target=}, {related_target=}"
                 )
 
+            if line.startswith("Rebuilding "):
+                self.matches["Rebuilding"] += 1
+            else:
+                self.matches["Inclusions rebuilding"] += 1
             return True
 
     _inherits_timestamp_regex = re.compile(
         r'"(?P<target>[^"]+)"\s+inherits timestamp from\s+"(?P<source>[^"]+)"'
     )
 
-    def _parse_inherits_timestamp_lines(
-        self, lines: collections.deque[str]
-    ) -> None:
+    def _parse_inherits_timestamp_line(self, line: str) -> bool:
         """
-        Parse a series of timestamp inheritance lines.
+        Attempt to parse a timestamp inheritance line.
 
-        *Only* timestamp inheritance lines are consumed. Any other line is left
-        to be consumed by the next `_consume_line` call.
+        Return `True` if this was a timestamp inheritance line.
 
         """
-        while True:
-            line = self._consume_line(lines)
-            if line is None:
-                return
-
-            m = self._inherits_timestamp_regex.search(line)
-            if m is None:
-                self._regurgitate_line(lines, line)
-                return
+        m = self._inherits_timestamp_regex.search(line)
+        if m is None:
+            return False
 
-            target = self.db.get_target(m.group("target"))
-            source = self.db.get_target(m.group("source"))
-            target.set_inherits_timestamp_from(source)
+        target = self._get_target(m.group("target"))
+        source = self._get_target(m.group("source"))
+        target.set_inherits_timestamp_from(source)
+        self.matches["inherits timestamp"] += 1
+        return True
@@ -13,7 +13,6 @@ __all__ = ("DDParser",)
 
 
 import re
-from typing import Iterable
 
 from ._base import BaseParser
 
@@ -21,10 +20,7 @@ from ._base import BaseParser
 class DDParser(BaseParser):
     """Parser for '-dd' debug output."""
 
-    def parse(self, logs: Iterable[str]) -> None:
-        """Parse '-dd' debug output from the given jam logs."""
-        for line in logs:
-            self._parse_line(line)
+    line_prefixes = ("Depends ", "Includes ")
 
     # One of:
     #   Depends "<grist>file.name" : "<grist>other.name" ;
@@ -33,7 +29,7 @@ class DDParser(BaseParser):
         r'\s*(?:Depends|Includes)\s+"(?P<from>[^"]+)"\s+:\s+"(?P<onto>[^"]+)"'
     )
 
-    def _parse_line(self, line: str) -> None:
+    def parse_line(self, line: str) -> None:
         """Handle a single line, updating the database if necessary."""
         is_depends = line.startswith("Depends ")
         is_includes = line.startswith("Includes ")
@@ -44,10 +40,12 @@ class DDParser(BaseParser):
                     f"Expected to get dependency information from {line!r} "
                     f"but failed to match the expected format"
                 )
-            from_target = self.db.get_target(match.group("from"))
-            onto_target = self.db.get_target(match.group("onto"))
+            from_target = self._get_target(match.group("from"))
+            onto_target = self._get_target(match.group("onto"))
             if is_depends:
                 from_target.add_dependency(onto_target)
+                self.matches["Depends"] += 1
             else:
                 assert is_includes
                 from_target.add_inclusion(onto_target)
+                self.matches["Includes"] += 1
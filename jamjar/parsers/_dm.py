@@ -13,8 +13,8 @@
 __all__ = ("DMParser",)
 
 import datetime
+import functools
 import re
-from typing import Iterable
 
 from .. import database
 from ._base import BaseParser
@@ -23,16 +23,13 @@ from ._base import BaseParser
 class DMParser(BaseParser):
     """Parser for '-dm' debug output."""
 
-    def parse(self, logs: Iterable[str]) -> None:
-        """Parse '-dm' debug output from the given jam logs."""
-        for line in logs:
-            self._parse_line(line)
+    line_prefixes = ("time", "bind", "made")
 
     _time_re = re.compile(r"time\s+--\s+(?P<target>.+):\s+(?P<info>.+)")
     _bind_re = re.compile(r"bind\s+--\s+(?P<target>.+):\s+(?P<path>.+)")
     _made_re = re.compile(r"made[+*]?\s+(?P<fate>[a-z]+)\s+(?P<target>.+)")
 
-    def _parse_line(self, line: str) -> None:
+    def parse_line(self, line: str) -> None:
         """Parse a single line, updating the database as necessary."""
         # The output we are interested in takes one of the following forms:
         # make -- <target>
@@ -60,10 +57,8 @@ class DMParser(BaseParser):
         # See `target_bind` in jam. A timestamp is output only for "exists"
         # and not the other binding states.
         if m.group("info") not in {"missing", "unbound", "parents"}:
-            dt = datetime.datetime.strptime(
-                m.group("info"), "%a %b %d %H:%M:%S %Y"
-            )
-            target.set_timestamp(dt)
+            target.set_timestamp(_parse_timestamp(m.group("info")))
+        self.matches["time"] += 1
         return True
 
     def _parse_bind_line(self, line: str) -> bool:
@@ -73,6 +68,7 @@ class DMParser(BaseParser):
 
         target = self.db.get_target(m.group("target"))
         target.set_binding(m.group("path"))
+        self.matches["bind"] += 1
         return True
 
     def _parse_made_line(self, line: str) -> bool:
@@ -82,5 +78,57 @@ class DMParser(BaseParser):
 
         target = self.db.get_target(m.group("target"))
         fate = database.Fate(m.group("fate"))
-        target.set_fate(fate)
+        self._set_fate(target, fate)
+        self.matches["made"] += 1
         return True
+
+    def _set_fate(self, target: database.Target, fate: database.Fate) -> None:
+        """Record a target's fate, as reported in a 'made ...' line."""
+        target.set_fate(fate)
+
+
+_TIMESTAMP_FORMAT = "%a %b %d %H:%M:%S %Y"
+
+_months = {
+    month: idx
+    for idx, month in enumerate(
+        [
+            "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+            "Jul", "Aug", "Sep", "Oct", "Nov", "Dec",
+        ],
+        start=1,
+    )
+}  # fmt: skip
+
+_timestamp_re = re.compile(
+    r"(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun)\s+(?P<month>[A-Z][a-z]{2})"
+    r"\s+(?P<day>\d\d?)\s+(?P<hour>\d\d?):(?P<minute>\d\d?)"
+    r":(?P<second>\d\d?)\s+(?P<year>\d{4})",
+    re.ASCII,
+)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _parse_timestamp(timestamp: str) -> datetime.datetime:
+    """
+    Parse a timestamp as output by jam, e.g. "Tue Nov 24 14:39:20 2015".
+
+    Equivalent to `datetime.strptime` with `_TIMESTAMP_FORMAT`, but much
+    faster. Many targets share a timestamp, so results are also cached.
+
+    """
+    m = _timestamp_re.fullmatch(timestamp)
+    if m is not None and m.group("month") in _months:
+        try:
+            return datetime.datetime(
+                int(m.group("year")),
+                _months[m.group("month")],
+                int(m.group("day")),
+                int(m.group("hour")),
+                int(m.group("minute")),
+                int(m.group("second")),
+            )
+        except ValueError:
+            pass
+    # Anything unusual (or invalid) gets strptime's exact handling.
+    return datetime.datetime.strptime(timestamp, _TIMESTAMP_FORMAT)
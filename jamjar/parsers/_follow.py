@@ -0,0 +1,153 @@
+# ------------------------------------------------------------------------------
+# _follow.py
+#
+# Incremental parsing of jam logs that are still being written.
+# ------------------------------------------------------------------------------
+
+"""Jam log follower"""
+
+__all__ = ("LogFollower",)
+
+import contextlib
+import io
+import pathlib
+import threading
+from typing import Optional
+
+from .. import database
+
+from ._combined import CombinedParser
+from ._input import STDIN, open_stream
+from ._scan import _BLOCK_SIZE, _scan_blocks
+
+
+class LogFollower(threading.Thread):
+    """
+    Thread that parses a log file as it's written, like `tail -f`.
+
+    The whole of the existing log is parsed first, then any lines appended to
+    it. A single parser is used throughout, so lines related to each other are
+    handled correctly however the log happens to be split between reads.
+
+    The database is only updated with its `lock` held, so it can be read
+    safely (with the lock held) from other threads.
+
+    If the log file is `STDIN`, it's followed until the end of the input.
+
+    .. attribute:: db
+
+        Database being updated.
+
+    .. attribute:: logfile
+
+        Log file being followed.
+
+    """
+
+    def __init__(
+        self,
+        db: database.Database,
+        logfile: pathlib.Path,
+        *,
+        poll_interval: float = 0.5,
+    ) -> None:
+        """
+        :param db:
+            Target database to populate.
+        :param logfile:
+            Source jam log file containing debug output.
+        :param poll_interval:
+            Time in seconds to wait between checks for new lines.
+
+        :raises ValueError:
+            If the log file is compressed (so can't be read as it's written).
+
+        """
+        super().__init__(name="LogFollower", daemon=True)
+        self.db = db
+        self.logfile = logfile
+        self._poll_interval = poll_interval
+        self._parser = CombinedParser(db)
+        self._stopping = threading.Event()
+        # Number of reads that have found no new data, for waiters.
+        self._idle_reads = 0
+        self._idle_cond = threading.Condition()
+
+        self._exit_stack = contextlib.ExitStack()
+        stream = self._exit_stack.enter_context(open_stream(logfile))
+        if stream is None:
+            stream = self._exit_stack.enter_context(open(logfile, "rb"))
+        elif logfile != STDIN:
+            self._exit_stack.close()
+            raise ValueError("Can't follow a compressed log file")
+        self._stream: io.BufferedIOBase = stream
+
+    def run(self) -> None:
+        """Parse the log until stopped (or the end of `STDIN`)."""
+        with self._exit_stack:
+            partial_line = b""
+            while not self._stopping.is_set():
+                data = self._stream.read1(_BLOCK_SIZE)
+                if data:
+                    data = partial_line + data
+                    block_end = data.rfind(b"\n")
+                    if block_end < 0:
+                        partial_line = data
+                    else:
+                        self._parse_block(data, block_end)
+                        partial_line = data[block_end + 1 :]
+                elif self.logfile == STDIN:
+                    # End of the input: whatever's left is the last line.
+                    self._parse_block(partial_line, len(partial_line))
+                    break
+                else:
+                    # Any partial line may still be being written, so leave it
+                    # for the next read.
+                    self._note_idle_read()
+                    self._stopping.wait(self._poll_interval)
+
+            with self.db.lock:
+                self._parser.finish()
+        self._note_idle_read()
+
+    def stop(self) -> None:
+        """
+        Stop following the log, and wait for the thread to finish.
+
+        (Unless following `STDIN`, when the thread may be blocked waiting for
+        input: it's left to finish by itself.)
+
+        """
+        self._stopping.set()
+        if self.is_alive() and self.logfile != STDIN:
+            self.join()
+
+    def wait_caught_up(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until everything in the log when called has been parsed.
+
+        :return:
+            `False` if the timeout expired first, else `True`.
+
+        """
+        with self._idle_cond:
+            # The next idle read may have started before this call, but the
+            # one after can't have.
+            target = self._idle_reads + 2
+            return self._idle_cond.wait_for(
+                lambda: self._idle_reads >= target or not self.is_alive(),
+                timeout,
+            )
+
+    def _parse_block(self, data: bytes, end: int) -> None:
+        """Parse the complete lines at the start of some data."""
+        lines = list(_scan_blocks([(data, 0, end)]))
+        with self.db.lock:
+            for line in lines:
+                self._parser.parse_line(line)
+
+    def _note_idle_read(self) -> None:
+        """Record a read that found no new data."""
+        with self._idle_cond:
+            self._idle_reads += 1
+            self._idle_cond.notify_all()
@@ -0,0 +1,63 @@
+# ------------------------------------------------------------------------------
+# _input.py
+#
+# Opening of jam log files that have to be read as streams (compressed files
+# and stdin).
+# ------------------------------------------------------------------------------
+
+"""Jam log input streams"""
+
+__all__ = ("STDIN", "open_stream")
+
+import bz2
+import contextlib
+import gzip
+import io
+import lzma
+import pathlib
+import sys
+from typing import Callable, Iterator, Optional
+
+#: Log file path meaning "read from stdin".
+STDIN = pathlib.Path("-")
+
+
+# Magic bytes at the start of supported compressed files, and how to open
+# them for incremental decompression.
+_decompressors: list[
+    tuple[bytes, Callable[[io.BufferedReader], io.BufferedIOBase]]
+] = [
+    (b"\x1f\x8b", lambda f: gzip.GzipFile(fileobj=f)),
+    (b"\xfd7zXZ\x00", lzma.LZMAFile),
+    (b"BZh", bz2.BZ2File),
+]
+_magic_size = max(len(magic) for magic, _ in _decompressors)
+
+
+@contextlib.contextmanager
+def open_stream(
+    logfile: pathlib.Path,
+) -> Iterator[Optional[io.BufferedIOBase]]:
+    """
+    Open a log file, if it has to be read as a stream.
+
+    That's the case for `STDIN` and for compressed files (detected by their
+    magic bytes). The stream yields the (decompressed) contents of the log.
+
+    `None` is yielded for any other file, which can be read directly.
+
+    """
+    with contextlib.ExitStack() as stack:
+        raw: io.BufferedReader
+        if logfile == STDIN:
+            raw = sys.stdin.buffer  # type: ignore[assignment]
+        else:
+            raw = stack.enter_context(open(logfile, "rb"))
+
+        magic = raw.peek(_magic_size)[:_magic_size]
+        for prefix, decompressor in _decompressors:
+            if magic.startswith(prefix):
+                yield stack.enter_context(decompressor(raw))
+                break
+        else:
+            yield raw if logfile == STDIN else None
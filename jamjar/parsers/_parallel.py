@@ -0,0 +1,229 @@
+# ------------------------------------------------------------------------------
+# _parallel.py
+#
+# Parsing of large jam logs using multiple processes.
+# ------------------------------------------------------------------------------
+
+"""Parallel jam log parsing"""
+
+__all__ = ("parse_many", "parse_parallel")
+
+import concurrent.futures
+import itertools
+import locale
+import mmap
+import pathlib
+import time
+from typing import Callable, Optional, Sequence
+
+from .. import database
+
+from ._combined import CombinedParser
+from ._dc import DCParser
+from ._scan import scan_lines
+from ._stats import ParseStats
+
+# Results of parsing a chunk of the logs: records for the targets found, the
+# names of those whose fate came from '-dc' output, the parser's
+# `order_groups`, and statistics about the parsing.
+_ChunkResult = tuple[
+    list[database.TargetRecord], frozenset[str], tuple[int, int], ParseStats
+]
+
+# Number of chunks to split the logs into per worker process. Using several
+# lets the merging of early chunks overlap with the parsing of later ones.
+_CHUNKS_PER_JOB = 4
+
+
+def parse_parallel(
+    db: database.Database,
+    logfile: pathlib.Path,
+    jobs: int,
+    *,
+    stats: Optional[ParseStats] = None,
+) -> None:
+    """
+    Parse a log file into a DB, splitting the work between processes.
+
+    The log file is split into chunks, each of which is parsed into a separate
+    database by a worker process. The results are then merged in order, so the
+    final database is identical to that from parsing the log file serially.
+
+    :param db:
+        Target database to populate.
+    :param logfile:
+        Source jam log file containing debug output.
+    :param jobs:
+        Number of worker processes to use.
+    :param stats:
+        Statistics to add the work done by the worker processes to.
+
+    """
+    bounds = _chunk_bounds(logfile, jobs * _CHUNKS_PER_JOB)
+    merger = CombinedParser(db)
+    with concurrent.futures.ProcessPoolExecutor(jobs) as pool:
+        for records, dc_fated, order_groups, chunk_stats in pool.map(
+            _parse_chunk, itertools.repeat(logfile), bounds[:-1], bounds[1:]
+        ):
+            merger.merge_records(records, dc_fated, order_groups)
+            if stats is not None:
+                stats.merge(chunk_stats)
+    merger.finish()
+
+
+def parse_many(
+    db: database.Database,
+    logfiles: Sequence[pathlib.Path],
+    *,
+    jobs: int = 1,
+    load: Optional[Callable[..., database.Database]] = None,
+    stats: Optional[ParseStats] = None,
+) -> None:
+    """
+    Parse several log files into a DB, parsing the files concurrently.
+
+    Each log file is parsed into a separate database (by a worker process, if
+    there's more than one job), and the results are merged in the order of
+    the files. Each target's `sources` records the files it was found in.
+
+    Where files disagree about an attribute of a target (e.g. its fate, in a
+    multiphase build), the value from the last of them wins.
+
+    :param db:
+        Target database to populate.
+    :param logfiles:
+        Source jam log files containing debug output, in order.
+    :param jobs:
+        Number of worker processes to use (at most one per file).
+    :param load:
+        Function to get the database for a single log file, instead of just
+        parsing it (e.g. to use a cached snapshot). Must be picklable (e.g. a
+        module-level function) to be used in worker processes. If `stats` is
+        given, it's passed the statistics for the file as a `stats` keyword
+        argument.
+    :param stats:
+        Statistics to add the work done for all of the files, and the targets
+        created by merging them, to.
+
+    """
+    if load is None:
+        load = _parse_file
+    start_wall = time.perf_counter()
+    before = None if stats is None else db.summary()
+
+    def add(
+        records: list[database.TargetRecord],
+        file_stats: Optional[ParseStats],
+    ) -> None:
+        start_cpu = time.process_time()
+        db.add_records(records)
+        if stats is not None:
+            assert file_stats is not None
+            stats.merge(file_stats)
+            stats.cpu_time += time.process_time() - start_cpu
+
+    args = (
+        itertools.repeat(load),
+        logfiles,
+        itertools.repeat(stats is not None),
+    )
+    jobs = min(jobs, len(logfiles))
+    if jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(jobs) as pool:
+            for records, file_stats in pool.map(_load_records, *args):
+                add(records, file_stats)
+    else:
+        for records, file_stats in map(_load_records, *args):
+            add(records, file_stats)
+
+    if stats is not None:
+        assert before is not None
+        stats.add_created(before, db.summary())
+        stats.wall_time += time.perf_counter() - start_wall
+
+
+def _parse_file(
+    logfile: pathlib.Path, *, stats: Optional[ParseStats] = None
+) -> database.Database:
+    """Parse a whole log file into a new database."""
+    # Imported here, as this module is imported by the package root.
+    from . import parse
+
+    db = database.Database()
+    parse(db, logfile, stats=stats)
+    return db
+
+
+def _load_records(
+    load: Callable[..., database.Database],
+    logfile: pathlib.Path,
+    collect_stats: bool = False,
+) -> tuple[list[database.TargetRecord], Optional[ParseStats]]:
+    """Load the targets from a log file (in a worker process)."""
+    source = str(logfile)
+    if collect_stats:
+        stats: Optional[ParseStats] = ParseStats()
+        db = load(logfile, stats=stats)
+    else:
+        stats = None
+        db = load(logfile)
+    records = [record._replace(sources=(source,)) for record in db.records()]
+    return records, stats
+
+
+def _parse_chunk(logfile: pathlib.Path, start: int, end: int) -> _ChunkResult:
+    """Parse a chunk of a log file (in a worker process)."""
+    start_cpu = time.process_time()
+    db = database.Database()
+    parser = CombinedParser(db)
+    stats = ParseStats()
+    parser.parse(scan_lines(logfile, start, end, stats=stats))
+    records = list(db.records())
+    stats.add_matches(parser)
+    stats.cpu_time = time.process_time() - start_cpu
+    return (
+        records,
+        frozenset(target.name for target in parser.dc_fated),
+        parser.order_groups,
+        stats,
+    )
+
+
+def _chunk_bounds(logfile: pathlib.Path, max_chunks: int) -> list[int]:
+    """
+    Find offsets to split a log file into (up to) a given number of chunks.
+
+    Chunks are split at line boundaries where the '-dc' parser doesn't relate
+    the lines either side to each other, so each chunk can be parsed
+    independently.
+
+    """
+    size = logfile.stat().st_size
+    bounds = [0]
+    if size > 0:
+        with open(logfile, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as buf:
+            for idx in range(1, max_chunks):
+                pos = max(size * idx // max_chunks, bounds[-1])
+                pos = _safe_bound(buf, pos)
+                if pos >= size:
+                    break
+                if pos > bounds[-1]:
+                    bounds.append(pos)
+    bounds.append(size)
+    return bounds
+
+
+def _safe_bound(buf: mmap.mmap, pos: int) -> int:
+    """Find the first safe chunk boundary after a given offset."""
+    encoding = locale.getpreferredencoding(False)
+    line_start = buf.rfind(b"\n", 0, pos) + 1
+    while True:
+        line_end = buf.find(b"\n", pos)
+        if line_end < 0:
+            return len(buf)
+        line = str(buf[line_start:line_end], encoding, errors="replace")
+        if DCParser.leaves_idle(line):
+            return line_end + 1
+        line_start = pos = line_end + 1
@@ -0,0 +1,183 @@
+# ------------------------------------------------------------------------------
+# _scan.py
+#
+# Fast scanning of jam log files for lines that are of interest to the parsers.
+# ------------------------------------------------------------------------------
+
+"""Memory-mapped jam log scanner"""
+
+__all__ = ("scan_lines", "scan_stream")
+
+import io
+import locale
+import mmap
+import operator
+import pathlib
+import re
+import time
+from typing import Iterable, Iterator, Optional, Union
+
+from ._stats import ParseStats
+
+# Start of a line that any of the parsers might be interested in:
+#
+# - '-dd' and '-dm' lines, which start with fixed prefixes.
+# - '-dc' fate, "rebuilding" and timestamp inheritance lines, which may be
+#   indented.
+#
+# This must match every line that the parsers would get any information from.
+# (The '-dc' parser would find timestamp inheritance info anywhere in a line,
+# but jam only ever prints it at the start of a line.)
+_candidate = (
+    rb"(?:Depends |Includes |time|bind|made|[^\S\n]*(?:newer|temp|touched"
+    rb"|missing|Rebuilding |Inclusions rebuilding "
+    rb'|"[^"\n]*"[^\S\n]+inherits timestamp from))'
+)
+
+# Each match is either a candidate line (captured without its terminator), or
+# a run of uninteresting lines (captured as an empty string).
+_scan_regex = re.compile(
+    rb"^(" + _candidate + rb"[^\r\n]*)"
+    rb"|^(?!" + _candidate + rb")[^\n]*(?:\n(?!" + _candidate + rb")[^\n]*)*",
+    re.MULTILINE,
+)
+
+# Amount of the file to scan at a time (bounding the memory used).
+_BLOCK_SIZE = 1 << 20
+
+
+def scan_lines(
+    logfile: pathlib.Path,
+    start: int = 0,
+    end: Optional[int] = None,
+    *,
+    stats: Optional[ParseStats] = None,
+) -> Iterator[str]:
+    """
+    Yield the lines from a log file that might be of interest to the parsers.
+
+    The file is memory-mapped and searched as bytes, and only the candidate
+    lines are decoded. Lines are yielded without their terminators.
+
+    Each run of uninteresting lines is replaced by a single empty line, so
+    that parsers relating adjacent lines to each other see the same sequence
+    of related lines as when reading the whole file.
+
+    :param logfile:
+        Log file to scan.
+    :param start:
+        Offset of the start of the first line to scan.
+    :param end:
+        Offset just past the end of the last line to scan (defaults to the end
+        of the file).
+    :param stats:
+        Statistics to add the amount read and the time taken to.
+
+    """
+    with open(logfile, "rb") as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file: can't be mapped, and has nothing to yield anyway.
+            return
+        with buf:
+            if end is None:
+                end = len(buf)
+            if stats is not None:
+                stats.bytes_read += end - start
+            yield from _scan_blocks(_mapped_blocks(buf, start, end), stats)
+
+
+def scan_stream(
+    stream: io.BufferedIOBase, *, stats: Optional[ParseStats] = None
+) -> Iterator[str]:
+    """
+    Yield the lines from a stream that might be of interest to the parsers.
+
+    As for `scan_lines`, but reading the stream incrementally (so that it can
+    be used for pipes or decompressed data).
+
+    """
+    yield from _scan_blocks(_stream_blocks(stream, stats), stats)
+
+
+# Region of a buffer to scan: the buffer, and the offsets of the start of the
+# first line and the end of the last line (excluding its terminator).
+_Block = tuple[Union[bytes, mmap.mmap], int, int]
+
+
+def _mapped_blocks(buf: mmap.mmap, start: int, end: int) -> Iterator[_Block]:
+    """Split a region of a mapped file into blocks."""
+    pos = start
+    while pos < end:
+        # Exclude the terminator of the last line, so that it isn't followed
+        # by a spurious empty match.
+        block_end = buf.find(b"\n", min(pos + _BLOCK_SIZE, end - 1), end)
+        if block_end < 0:
+            block_end = end
+        yield buf, pos, block_end
+        pos = block_end + 1
+
+
+def _stream_blocks(
+    stream: io.BufferedIOBase, stats: Optional[ParseStats] = None
+) -> Iterator[_Block]:
+    """Read a stream in blocks."""
+    partial_line = b""
+    while data := stream.read(_BLOCK_SIZE):
+        if stats is not None:
+            stats.bytes_read += len(data)
+        data = partial_line + data
+        block_end = data.rfind(b"\n")
+        if block_end < 0:
+            partial_line = data
+        else:
+            yield data, 0, block_end
+            partial_line = data[block_end + 1 :]
+    if partial_line:
+        yield partial_line, 0, len(partial_line)
+
+
+def _scan_blocks(
+    blocks: Iterable[_Block], stats: Optional[ParseStats] = None
+) -> Iterator[str]:
+    """
+    Yield candidate lines from consecutive blocks.
+
+    If there are statistics to update, each block's candidate lines are
+    decoded up front so that all the work on a block is timed together (with
+    the clock only read once per block).
+
+    """
+    decode = operator.methodcaller(
+        "decode", locale.getpreferredencoding(False)
+    )
+    # Whether the previous block ended in a run of uninteresting lines.
+    skipping = False
+    start_time = time.thread_time()
+    for buf, start, end in blocks:
+        lines = _scan_regex.findall(buf, start, end)
+        if skipping and lines and not lines[0]:
+            # Continuing the same run of uninteresting lines.
+            del lines[0]
+        if lines:
+            skipping = not lines[-1]
+        if stats is None:
+            yield from map(decode, lines)
+            continue
+        decoded = list(map(decode, lines))
+        stats.lines_read += _count_lines(buf, start, end)
+        stats.candidate_lines += len(decoded)
+        stats.scan_time += time.thread_time() - start_time
+        yield from decoded
+        start_time = time.thread_time()
+    if stats is not None:
+        stats.scan_time += time.thread_time() - start_time
+
+
+def _count_lines(buf: Union[bytes, mmap.mmap], start: int, end: int) -> int:
+    """Count the lines in a block (which excludes its last terminator)."""
+    if isinstance(buf, mmap.mmap):
+        with memoryview(buf) as view:
+            return view[start:end].tobytes().count(b"\n") + 1
+    return buf.count(b"\n", start, end) + 1
@@ -0,0 +1,188 @@
+# ------------------------------------------------------------------------------
+# _stats.py
+#
+# Instrumentation of the parsing of jam logs.
+# ------------------------------------------------------------------------------
+
+"""Jam log parsing statistics"""
+
+__all__ = ("ParseStats",)
+
+import collections
+from typing import TextIO
+
+from .. import database
+
+from ._combined import CombinedParser
+
+# Kinds of edge in the database (as counted by `database.DatabaseSummary`),
+# and the parser that creates each of them.
+_EDGE_PARSERS = {
+    "deps": "-dd",
+    "incs": "-dd",
+    "newer_than": "-dc",
+    "inherits_timestamp": "-dc",
+    "rebuild_causes": "-dc",
+}
+
+
+class ParseStats:
+    """
+    Statistics about parsing jam logs, to show where the time goes.
+
+    These are cheap enough to always collect: the parsers count the lines
+    they get information from as they go, and everything else is measured
+    once per block of the logs read, or once per parse.
+
+    The '-dc', '-dd' and '-dm' parsers share a single pass over the logs, so
+    time is measured for the pass as a whole (split into reading and scanning
+    the logs, and parsing the candidate lines found).
+
+    .. attribute:: wall_time
+
+        Elapsed time, in seconds.
+
+    .. attribute:: cpu_time
+
+        CPU time, in seconds, including that used in any worker processes.
+
+    .. attribute:: scan_time
+
+        CPU time spent reading the logs and finding the candidate lines for
+        the parsers (included in `cpu_time`).
+
+    .. attribute:: bytes_read
+
+        Number of bytes of (decompressed) logs read.
+
+    .. attribute:: lines_read
+
+        Number of lines of logs read.
+
+    .. attribute:: candidate_lines
+
+        Number of lines passed to the parsers (with each run of uninteresting
+        lines counting as one).
+
+    .. attribute:: matches
+
+        For each parser (e.g. "-dd"), the number of lines it got information
+        from, by type of line.
+
+    .. attribute:: targets_created
+
+        Number of targets added to the database.
+
+    .. attribute:: edges_created
+
+        Number of relationships added to the database, by kind (named as in
+        `database.DatabaseSummary`).
+
+    .. attribute:: snapshots_loaded
+
+        Number of log files whose database was loaded from a snapshot, rather
+        than parsed.
+
+    .. attribute:: snapshot_time
+
+        Elapsed time spent loading snapshots, in seconds.
+
+    """
+
+    def __init__(self) -> None:
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.scan_time = 0.0
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.candidate_lines = 0
+        self.matches: dict[str, collections.Counter[str]] = {
+            "-dc": collections.Counter(),
+            "-dd": collections.Counter(),
+            "-dm": collections.Counter(),
+        }
+        self.targets_created = 0
+        self.edges_created: collections.Counter[str] = collections.Counter()
+        self.snapshots_loaded = 0
+        self.snapshot_time = 0.0
+
+    def add_matches(self, parser: CombinedParser) -> None:
+        """Add the lines matched by each of a parser's parsers."""
+        self.matches["-dc"].update(parser.dc_parser.matches)
+        self.matches["-dd"].update(parser.dd_parser.matches)
+        self.matches["-dm"].update(parser.dm_parser.matches)
+
+    def add_created(
+        self, before: database.DatabaseSummary, after: database.DatabaseSummary
+    ) -> None:
+        """Add the targets and edges created between two database summaries."""
+        self.targets_created += after.targets - before.targets
+        for kind in _EDGE_PARSERS:
+            self.edges_created[kind] += getattr(after, kind) - getattr(
+                before, kind
+            )
+
+    def merge(self, other: "ParseStats") -> None:
+        """
+        Add the work done in another parse, e.g. of part of the same logs in a
+        worker process.
+
+        Only CPU time, the amounts read and matched, and the snapshots loaded
+        are added: elapsed time and the numbers of targets and edges created
+        are only meaningful for the database being populated, so are left to
+        be measured for that.
+
+        """
+        self.cpu_time += other.cpu_time
+        self.scan_time += other.scan_time
+        self.bytes_read += other.bytes_read
+        self.lines_read += other.lines_read
+        self.candidate_lines += other.candidate_lines
+        for name, matches in other.matches.items():
+            self.matches[name].update(matches)
+        self.snapshots_loaded += other.snapshots_loaded
+        self.snapshot_time += other.snapshot_time
+
+    def write_report(self, file: TextIO) -> None:
+        """
+        Write a human-readable report of the statistics.
+
+        The parsing statistics are left out if nothing was parsed, because
+        everything was loaded from snapshots.
+
+        """
+        if self.snapshots_loaded:
+            file.write(
+                f"Loaded {self.snapshots_loaded:,} snapshot(s) "
+                f"in {self.snapshot_time:.2f}s\n"
+            )
+            if not self.lines_read:
+                return
+        file.write(
+            f"Read {self.bytes_read / 2**20:,.1f} MiB, "
+            f"{self.lines_read:,} lines "
+            f"({self.candidate_lines:,} candidate lines) "
+            f"in {self.wall_time:.2f}s\n"
+        )
+        file.write(
+            f"CPU time: {self.cpu_time:.2f}s "
+            f"({self.scan_time:.2f}s reading and scanning, "
+            f"{self.cpu_time - self.scan_time:.2f}s parsing)\n"
+        )
+        for name, matches in self.matches.items():
+            details = ", ".join(
+                f"{line_type} {count:,}"
+                for line_type, count in matches.most_common()
+            )
+            file.write(
+                f"{name} parser: {sum(matches.values()):,} lines matched"
+                f"{f' ({details})' if details else ''}\n"
+            )
+            edges = ", ".join(
+                f"{kind} {self.edges_created[kind]:,}"
+                for kind, parser in _EDGE_PARSERS.items()
+                if parser == name
+            )
+            if edges:
+                file.write(f"    edges created: {edges}\n")
+        file.write(f"Targets created: {self.targets_created:,}\n")
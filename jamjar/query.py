@@ -7,21 +7,39 @@
 """Higher-level query functions (vs. raw database reads)."""
 
 __all__ = (
+    "BuildProfile",
     "Chain",
+    "EffectiveDeps",
+    "RebuildCauses",
     "RebuildChain",
+    "RootCause",
+    "build_profile",
+    "count_rebuild_chains",
     "deps",
     "deps_rebuilt",
+    "dependents_closure",
+    "deps_closure",
+    "effective_deps",
+    "iter_rebuild_chains",
     "rebuild_chains",
+    "root_causes",
     "timestamp_inheritance_chain",
 )
 
 
 import collections
-from typing import Callable, Iterator, Optional
+import itertools
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    TypeVar,
+)
 
 from . import database
 
-
 Chain = list[database.Target]
 
 RebuildChain = list[tuple[database.Target, Optional[database.RebuildReason]]]
@@ -57,21 +75,465 @@ def deps_rebuilt(target: database.Target) -> Iterator[database.Target]:
             yield dep
 
 
+def dependents_closure(target: database.Target) -> dict[database.Target, int]:
+    """
+    Find all the targets that depend on a target, directly or indirectly.
+
+    This is the reverse of `deps`, applied transitively: a target depends on
+    another if it's one of its `deps`, including those arising from includes.
+
+    Runs in time linear in the size of the graph.
+
+    :return:
+        Dict mapping each dependent to its distance from the target (1 for
+        direct dependents), ordered by distance. The target itself is only
+        included if it depends on itself via a cycle.
+
+    """
+    distances: dict[database.Target, int] = {}
+    # Targets whose includers have been added. If X includes Y, X depends on
+    # everything Y depends on: but all of those have the same effect (making
+    # X a dependent), so Y's includers need adding only once.
+    expanded: set[database.Target] = set()
+    queue = collections.deque([(target, 0)])
+    while queue:
+        current, distance = queue.popleft()
+        for dependent in current.deps_rev:
+            if dependent not in distances:
+                distances[dependent] = distance + 1
+                queue.append((dependent, distance + 1))
+            if dependent not in expanded:
+                expanded.add(dependent)
+                for includer in dependent.incs_rev:
+                    if includer not in distances:
+                        distances[includer] = distance + 1
+                        queue.append((includer, distance + 1))
+    return distances
+
+
+class EffectiveDeps:
+    """
+    Dependencies of targets as Jam sees them, with includes fully applied.
+
+    `deps` only looks one level of includes deep. Jam applies them
+    transitively: if X includes Y and Y includes Z, X depends on everything
+    that Z depends on too (hence `RebuildReason.UPDATED_INCLUDE_OF_INCLUDE`).
+
+    Each query is a single walk, in time linear in the size of the part of
+    the graph it reaches. Results are cached for the targets queried, and a
+    walk that reaches a target with a cached result reuses it rather than
+    walking on from there, so querying many targets reuses the work done for
+    shared includes and dependencies.
+
+    """
+
+    def __init__(self) -> None:
+        self._includes: dict[database.Target, tuple[database.Target, ...]] = {}
+        self._deps: dict[database.Target, tuple[database.Target, ...]] = {}
+        self._closure: dict[database.Target, tuple[database.Target, ...]] = {}
+
+    def includes(self, target: database.Target) -> tuple[database.Target, ...]:
+        """
+        Find the targets a target includes, directly or indirectly.
+
+        The target itself is only included if it includes itself via a cycle.
+        Nearer includes come first.
+
+        """
+        try:
+            return self._includes[target]
+        except KeyError:
+            pass
+        found: dict[database.Target, None] = {}
+        queue = collections.deque([target])
+        while queue:
+            for inc in queue.popleft().incs:
+                if inc in found:
+                    continue
+                found[inc] = None
+                # Everything the include includes is in its cached result.
+                cached = self._includes.get(inc)
+                if cached is None:
+                    queue.append(inc)
+                else:
+                    found.update(dict.fromkeys(cached))
+        result = self._includes[target] = tuple(found)
+        return result
+
+    def deps(self, target: database.Target) -> tuple[database.Target, ...]:
+        """
+        Find the immediate dependencies of a target.
+
+        As `deps`, but including the dependencies of every target in
+        `includes`, in order and without duplicates.
+
+        """
+        try:
+            return self._deps[target]
+        except KeyError:
+            pass
+        found = dict.fromkeys(target.deps)
+        for inc in self.includes(target):
+            found.update(dict.fromkeys(inc.deps))
+        result = self._deps[target] = tuple(found)
+        return result
+
+    def closure(self, target: database.Target) -> tuple[database.Target, ...]:
+        """
+        Find all the targets a target depends on, directly or indirectly.
+
+        This is the transitive closure of `deps`. The target itself is only
+        included if it depends on itself via a cycle.
+
+        """
+        try:
+            return self._closure[target]
+        except KeyError:
+            pass
+        # A target's effective dependencies are its own and those of the
+        # targets it includes, so walk both dependencies and includes, but
+        # only targets reached through a dependency are in the closure.
+        found: dict[database.Target, None] = {}
+        walked = {target}
+        queue = collections.deque([target])
+        while queue:
+            current = queue.popleft()
+            for dep in current.deps:
+                if dep not in found:
+                    found[dep] = None
+                    cached = self._closure.get(dep)
+                    if cached is not None:
+                        found.update(dict.fromkeys(cached))
+                        walked.add(dep)
+                if dep not in walked:
+                    walked.add(dep)
+                    queue.append(dep)
+            for inc in current.incs:
+                if inc not in walked:
+                    walked.add(inc)
+                    queue.append(inc)
+        result = self._closure[target] = tuple(found)
+        return result
+
+
+def effective_deps(target: database.Target) -> tuple[database.Target, ...]:
+    """
+    Find the immediate dependencies of a target, applying includes fully.
+
+    Use an `EffectiveDeps` directly to reuse results across several targets.
+    """
+    return EffectiveDeps().deps(target)
+
+
+def deps_closure(target: database.Target) -> tuple[database.Target, ...]:
+    """
+    Find all the targets a target depends on, applying includes fully.
+
+    Use an `EffectiveDeps` directly to reuse results across several targets.
+    """
+    return EffectiveDeps().closure(target)
+
+
 def rebuild_chains(target: database.Target) -> list[RebuildChain]:
     """
     Return the chains of targets that caused a given target to be rebuilt.
+
+    There may be very many chains: see `iter_rebuild_chains` and
+    `count_rebuild_chains`.
     """
-    chains: list[RebuildChain] = [_basic_rebuild_chain(target)]
-    while True:
-        extended_chains = []
-        for chain in chains:
-            for dep in deps_rebuilt(chain[-1][0]):
-                extended_chains.append(chain + _basic_rebuild_chain(dep))
-        if extended_chains:
-            chains = extended_chains
+    return list(iter_rebuild_chains(target))
+
+
+def iter_rebuild_chains(
+    target: database.Target, limit: Optional[int] = None
+) -> Iterator[RebuildChain]:
+    """
+    Iterator that yields the chains of targets that caused a rebuild.
+
+    :param limit:
+        Maximum number of chains to yield (all of them if `None`).
+
+    """
+    return itertools.islice(RebuildCauses(target).chains(), limit)
+
+
+def count_rebuild_chains(target: database.Target) -> int:
+    """
+    Count the chains of targets that caused a given target to be rebuilt.
+
+    This is fast, even when there are too many chains to list.
+    """
+    return RebuildCauses(target).count()
+
+
+class RebuildCauses:
+    """
+    All the causes of a target being rebuilt, as a DAG.
+
+    Each node is a target along with the chain of targets that Jam reports as
+    the reason for its rebuild (see `_basic_rebuild_chain`). Its successors are
+    the rebuilt dependencies of the last target in that chain. A rebuild chain
+    is then a path from the root to a node without successors.
+
+    Chains through shared dependencies share nodes, so the DAG stays small
+    even when the number of chains is exponential in its size.
+
+    Dependency cycles are broken by ignoring any dependency on a target that
+    would lead back to itself.
+
+    .. attribute:: root
+
+        Target whose rebuild is being explained.
+
+    """
+
+    def __init__(self, target: database.Target) -> None:
+        self.root = target
+        self._links: dict[database.Target, RebuildChain] = {}
+        self._causes: dict[database.Target, list[database.Target]] = {}
+        # Targets in the order their causes were completed, so that each comes
+        # after all of its causes.
+        self._finished: list[database.Target] = []
+        for node, causes in _postorder([target], self._find_causes):
+            self._causes[node] = causes
+            self._finished.append(node)
+
+    def _find_causes(
+        self, target: database.Target
+    ) -> Iterator[database.Target]:
+        """Find the potential causes of a node's rebuild."""
+        link = _basic_rebuild_chain(target)
+        self._links[target] = link
+        return deps_rebuilt(link[-1][0])
+
+    def count(self) -> int:
+        """Count the rebuild chains."""
+        counts: dict[database.Target, int] = {}
+        for node in self._finished:
+            causes = self._causes[node]
+            counts[node] = (
+                sum(counts[cause] for cause in causes) if causes else 1
+            )
+        return counts[self.root]
+
+    def chains(self) -> Iterator[RebuildChain]:
+        """Iterator that yields the rebuild chains, as they're found."""
+        path = [self.root]
+        stack = [iter(self._causes[self.root])]
+        while stack:
+            cause = next(stack[-1], None)
+            if cause is not None:
+                path.append(cause)
+                stack.append(iter(self._causes[cause]))
+                continue
+            if not self._causes[path[-1]]:
+                yield [link for node in path for link in self._links[node]]
+            path.pop()
+            stack.pop()
+
+
+class RootCause(NamedTuple):
+    """
+    Ultimate cause of some targets being rebuilt.
+
+    .. attribute:: target
+
+        Target at the end of the rebuild chains.
+
+    .. attribute:: reason
+
+        Why the target caused rebuilds (e.g. it's missing or was touched).
+
+    .. attribute:: rebuilds
+
+        Number of rebuilt targets with a rebuild chain ending in this cause.
+
+    """
+
+    target: database.Target
+    reason: Optional[database.RebuildReason]
+    rebuilds: int
+
+
+def root_causes(
+    db: database.Database,
+) -> dict[Optional[database.RebuildReason], list[RootCause]]:
+    """
+    Find the root causes of all the rebuilds in a database.
+
+    Each rebuilt target is assigned the causes at the ends of its rebuild
+    chains (as from `rebuild_chains`, so a target is its own root cause if
+    it has no rebuilt dependencies). The causes are worked out for all
+    targets in a single pass, reusing the results for shared dependencies.
+
+    :return:
+        Root causes grouped by reason, each group sorted by the number of
+        rebuilds explained (most first). Groups are ordered by their top
+        cause. A rebuild with several root causes counts towards each of
+        them.
+
+    """
+    # Indices (into `causes`) of the root causes of each target's rebuild.
+    # Targets with the same causes often share a set.
+    cause_ids: dict[database.Target, frozenset[int]] = {}
+    causes: dict[
+        tuple[database.Target, Optional[database.RebuildReason]], int
+    ] = {}
+    ends: dict[database.Target, database.Target] = {}
+
+    def find_causes(target: database.Target) -> Iterator[database.Target]:
+        ends[target] = _basic_rebuild_chain(target)[-1][0]
+        return deps_rebuilt(ends[target])
+
+    rebuilt = [target for target in db.targets() if target.rebuilt]
+    for node, node_causes in _postorder(rebuilt, find_causes):
+        if node_causes:
+            ids = cause_ids[node_causes[0]]
+            for cause in node_causes[1:]:
+                if not cause_ids[cause] <= ids:
+                    ids = ids | cause_ids[cause]
         else:
-            break
-    return chains
+            end = ends[node]
+            reason = end.rebuild_reason
+            if reason is None:
+                # The end of Jam's reason chain wasn't rebuilt itself: it's
+                # the reason for rebuilding the previous target that counts.
+                reason = _basic_rebuild_chain(node)[-1][1]
+            ids = frozenset([causes.setdefault((end, reason), len(causes))])
+        cause_ids[node] = ids
+
+    counts = [0] * len(causes)
+    for target in rebuilt:
+        for cause_id in cause_ids[target]:
+            counts[cause_id] += 1
+
+    groups: dict[Optional[database.RebuildReason], list[RootCause]] = {}
+    # (The causes dict is in ID order.)
+    for (target, reason), count in zip(causes, counts):
+        groups.setdefault(reason, []).append(RootCause(target, reason, count))
+    for group in groups.values():
+        group.sort(key=lambda cause: (-cause.rebuilds, cause.target.name))
+    return dict(sorted(groups.items(), key=lambda item: -item[1][0].rebuilds))
+
+
+class BuildProfile(NamedTuple):
+    """
+    Shape of a dependency graph: how deep and how wide it is.
+
+    Targets are layered by their dependencies: a target with none is at level
+    0, and any other target is one level above its highest dependency. So
+    targets on the same level don't depend on each other, and could all be
+    built in parallel once the levels below are done.
+
+    .. attribute:: critical_path
+
+        A longest chain of dependencies, from the target at the top of it down
+        to one without dependencies. Its length is the number of levels.
+
+    .. attribute:: widths
+
+        Number of targets on each level, indexed by level. The largest width
+        is the most parallelism the graph allows.
+
+    """
+
+    critical_path: Chain
+    widths: list[int]
+
+
+def build_profile(
+    db: database.Database,
+    *,
+    root: Optional[database.Target] = None,
+    rebuilt_only: bool = False,
+) -> BuildProfile:
+    """
+    Find the critical path and parallelism profile of a dependency graph.
+
+    Dependencies are as from `deps`: if X includes Y, the dependencies of Y
+    must be built before X too. Dependency cycles are broken by ignoring any
+    dependency that leads back to a target on the current path. Runs in time
+    linear in the size of the graph.
+
+    :param root:
+        Only consider this target and the targets it depends on, directly or
+        indirectly (rather than the whole database).
+    :param rebuilt_only:
+        Only consider rebuilt targets, and the dependencies between them.
+
+    """
+    if root is not None:
+        roots: Iterable[database.Target] = [root]
+    else:
+        roots = db.targets()
+    if rebuilt_only:
+        roots = (target for target in roots if target.rebuilt)
+    successors = deps_rebuilt if rebuilt_only else deps
+
+    levels: dict[database.Target, int] = {}
+    # The next target on the longest chain down from each target.
+    next_on_path: dict[database.Target, database.Target] = {}
+    widths: list[int] = []
+    top: Optional[database.Target] = None
+    for node, node_deps in _postorder(roots, successors):
+        level = 0
+        for dep in node_deps:
+            if levels[dep] >= level:
+                level = levels[dep] + 1
+                next_on_path[node] = dep
+        levels[node] = level
+        if level == len(widths):
+            widths.append(0)
+            top = node
+        widths[level] += 1
+
+    critical_path: Chain = []
+    while top is not None:
+        critical_path.append(top)
+        top = next_on_path.get(top)
+    return BuildProfile(critical_path, widths)
+
+
+_Node = TypeVar("_Node")
+
+
+def _postorder(
+    roots: Iterable[_Node], successors: Callable[[_Node], Iterable[_Node]]
+) -> Iterator[tuple[_Node, list[_Node]]]:
+    """
+    Depth-first search of a graph, yielding each node after its successors.
+
+    The search is iterative, so isn't limited by the recursion limit. Each
+    node reachable from the roots is yielded once, along with its successors
+    (in order) - except for any that lead back to the node itself, so that the
+    result is acyclic.
+
+    """
+    done: set[_Node] = set()
+    in_progress: set[_Node] = set()
+    for root in roots:
+        if root in done:
+            continue
+        in_progress.add(root)
+        stack: list[tuple[_Node, Iterator[_Node], list[_Node]]] = [
+            (root, iter(successors(root)), [])
+        ]
+        while stack:
+            node, candidates, kept = stack[-1]
+            for successor in candidates:
+                if successor in in_progress:
+                    # Back to a node on the current path: a cycle.
+                    continue
+                kept.append(successor)
+                if successor not in done:
+                    in_progress.add(successor)
+                    stack.append((successor, iter(successors(successor)), []))
+                    break
+            else:
+                stack.pop()
+                in_progress.discard(node)
+                done.add(node)
+                yield node, kept
 
 
 def _basic_rebuild_chain(target: database.Target) -> RebuildChain:
@@ -0,0 +1,151 @@
+# ------------------------------------------------------------------------------
+# server.py - Query server module
+#
+# Serving queries against a database loaded once, to many clients.
+# ------------------------------------------------------------------------------
+
+"""Query server, using a simple JSON protocol."""
+
+__all__ = (
+    "handle_request",
+    "serve",
+    "start_server",
+)
+
+
+import asyncio
+import concurrent.futures
+import json
+import pathlib
+import sys
+from typing import Any, Optional
+
+from . import batch
+from . import database
+
+# Maximum length of a request line.
+_MAX_REQUEST_SIZE = 1 << 20
+
+
+def handle_request(db: database.Database, line: bytes) -> dict[str, Any]:
+    """
+    Handle a single request.
+
+    A request is a JSON object with a ``command`` (a batch command line, e.g.
+    ``"deps <grist>foo.c"``: see `batch.COMMANDS`), and optionally an ``id``.
+    The response is the command's result as from `batch.run_command`, along
+    with the request's ``id`` if it had one.
+
+    """
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        return {"error": f"Invalid request: {e}"}
+    if not isinstance(request, dict) or not isinstance(
+        request.get("command"), str
+    ):
+        return {"error": "Invalid request: expected a 'command' string"}
+    # The database can't be being modified while it's served, so there's no
+    # need to lock it (which would stop queries running concurrently).
+    response = batch.run_command(db, request["command"], lock=False)
+    if "id" in request:
+        response["id"] = request["id"]
+    return response
+
+
+async def start_server(
+    db: database.Database,
+    executor: concurrent.futures.Executor,
+    *,
+    host: str = "127.0.0.1",
+    port: Optional[int] = None,
+    path: Optional[pathlib.Path] = None,
+) -> asyncio.Server:
+    """
+    Start serving queries against a database.
+
+    Clients send one request per line, and get one response per line, in the
+    same order (see `handle_request`). Any number of clients can connect at
+    once. Requests are run in the executor, so that a slow query doesn't hold
+    up the others.
+
+    The database mustn't be modified while it's being served.
+
+    :param host:
+        Address to listen on for TCP connections.
+    :param port:
+        Port to listen on for TCP connections (0 to pick a free one).
+    :param path:
+        Path of a Unix socket to listen on, instead of a TCP port.
+
+    """
+
+    async def handle_client(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial
+                    if not line.strip():
+                        break
+                except asyncio.LimitOverrunError:
+                    writer.write(b'{"error": "Request too long"}\n')
+                    break
+                if not line.strip():
+                    continue
+                response = await loop.run_in_executor(
+                    executor, handle_request, db, line
+                )
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    if path is not None:
+        return await asyncio.start_unix_server(
+            handle_client, path, limit=_MAX_REQUEST_SIZE
+        )
+    return await asyncio.start_server(
+        handle_client, host, port, limit=_MAX_REQUEST_SIZE
+    )
+
+
+def serve(
+    db: database.Database,
+    *,
+    host: str = "127.0.0.1",
+    port: Optional[int] = None,
+    path: Optional[pathlib.Path] = None,
+    workers: Optional[int] = None,
+) -> None:
+    """
+    Serve queries against a database until interrupted.
+
+    :param workers:
+        Number of threads to run queries in (by default, chosen by
+        `concurrent.futures.ThreadPoolExecutor`).
+
+    See `start_server` for the other parameters.
+
+    """
+
+    async def run() -> None:
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            server = await start_server(
+                db, executor, host=host, port=port, path=path
+            )
+            async with server:
+                for sock in server.sockets:
+                    print(
+                        "Serving on {}".format(sock.getsockname()),
+                        file=sys.stderr,
+                    )
+                await server.serve_forever()
+
+    asyncio.run(run())
@@ -0,0 +1,127 @@
+# ------------------------------------------------------------------------------
+# snapshot.py - Database snapshot cache
+#
+# Caching of parsed databases on disk, so that a log only needs parsing once.
+# ------------------------------------------------------------------------------
+
+"""On-disk cache of parsed databases."""
+
+__all__ = (
+    "LogKey",
+    "default_cache_dir",
+    "load",
+    "log_key",
+    "save",
+    "snapshot_path",
+)
+
+
+import hashlib
+import os
+import pathlib
+import uuid
+from typing import NamedTuple, Optional
+
+from . import database
+
+# Amount of data from each end of a log file to include in its fingerprint.
+_FINGERPRINT_SAMPLE_SIZE = 1 << 20
+
+
+class LogKey(NamedTuple):
+    """
+    Identifies the contents of a log file.
+
+    A snapshot is only reused for a log with an identical key.
+
+    """
+
+    path: str
+    size: int
+    mtime_ns: int
+    fingerprint: str
+
+
+def log_key(logfile: pathlib.Path) -> LogKey:
+    """
+    Get the key for a log file.
+
+    The fingerprint is a hash of the data at the start and end of the file:
+    together with the size and mtime, that catches a log being rewritten or
+    appended to, without having to read the whole thing.
+
+    """
+    with open(logfile, "rb") as f:
+        stat = os.fstat(f.fileno())
+        fingerprint = hashlib.blake2b(digest_size=16)
+        fingerprint.update(f.read(_FINGERPRINT_SAMPLE_SIZE))
+        if stat.st_size > _FINGERPRINT_SAMPLE_SIZE:
+            f.seek(max(stat.st_size - _FINGERPRINT_SAMPLE_SIZE, f.tell()))
+            fingerprint.update(f.read(_FINGERPRINT_SAMPLE_SIZE))
+    return LogKey(
+        str(logfile.resolve()),
+        stat.st_size,
+        stat.st_mtime_ns,
+        fingerprint.hexdigest(),
+    )
+
+
+def default_cache_dir() -> pathlib.Path:
+    """Get the default directory to keep snapshots in."""
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    if cache_home:
+        return pathlib.Path(cache_home) / "jamjar"
+    return pathlib.Path.home() / ".cache" / "jamjar"
+
+
+def snapshot_path(cache_dir: pathlib.Path, key: LogKey) -> pathlib.Path:
+    """
+    Get the path of the snapshot for a log file.
+
+    There's one snapshot per log file path, which is replaced if the contents
+    of the log change.
+
+    """
+    path_hash = hashlib.blake2b(key.path.encode(), digest_size=16)
+    return cache_dir / "{}.db".format(path_hash.hexdigest())
+
+
+def load(cache_dir: pathlib.Path, key: LogKey) -> Optional[database.Database]:
+    """
+    Load the database for a log file from its snapshot, if there's one.
+
+    :return:
+        The database, or `None` if there's no usable snapshot for the log
+        (including if it can't be read, e.g. because another user saved it).
+
+    """
+    try:
+        with open(snapshot_path(cache_dir, key), "rb") as f:
+            return database.Database.load(f, key)
+    except OSError:
+        return None
+
+
+def save(db: database.Database, cache_dir: pathlib.Path, key: LogKey) -> None:
+    """
+    Save a snapshot of the database for a log file.
+
+    The snapshot is replaced atomically, so concurrent readers never see a
+    partially-written one. It's created with the usual permissions (subject
+    to the umask), so that a cache directory can be shared between users.
+
+    :raises OSError:
+        If the snapshot can't be written.
+
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = snapshot_path(cache_dir, key)
+    tmp_path = path.with_name("{}.{}.tmp".format(path.name, uuid.uuid4().hex))
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            db.save(f, key)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,22 @@
+# ------------------------------------------------------------------------------
+# conftest.py - Shared test fixtures
+# ------------------------------------------------------------------------------
+
+"""Fixtures shared by the tests."""
+
+__all__ = ()
+
+
+import pytest
+
+
+@pytest.fixture(params=[False, True], ids=["normal", "compacted"])
+def compacted(request: pytest.FixtureRequest) -> bool:
+    """
+    Whether to compact the databases a test is run against.
+
+    Fixtures that build a database use this to have each test using them run
+    against both a normal and a compacted database.
+
+    """
+    return bool(request.param)
@@ -0,0 +1,119 @@
+# ------------------------------------------------------------------------------
+# test_batch.py - Batch query module tests
+# ------------------------------------------------------------------------------
+
+"""Batch query tests."""
+
+__all__ = ()
+
+
+import io
+import json
+import pathlib
+
+import pytest
+
+from .. import batch
+from .. import database
+
+
+@pytest.fixture
+def db(compacted: bool) -> database.Database:
+    """Database with a few rebuilt targets, one with a space in its name."""
+    db = database.Database()
+    prog = db.get_target("prog")
+    obj = db.get_target("<dir>my file.o")
+    hdr = db.get_target("gen.h")
+    prog.add_dependency(obj)
+    obj.add_dependency(hdr)
+    hdr.set_rebuild_reason(database.RebuildReason.MISSING)
+    obj.set_rebuild_reason(database.RebuildReason.UPDATED_DEPENDENCY, hdr)
+    prog.set_rebuild_reason(database.RebuildReason.UPDATED_DEPENDENCY, obj)
+    if compacted:
+        db.compact()
+    return db
+
+
+def test_run_command(db: database.Database) -> None:
+    """Test running commands, and the structure of their results."""
+    assert batch.run_command(db, "targets \\.o$") == {
+        "command": "targets \\.o$",
+        "result": ["<dir>my file.o"],
+    }
+    assert batch.run_command(db, "deps <dir>my file.o")["result"] == ["gen.h"]
+    assert batch.run_command(db, "impact gen.h")["result"] == {
+        "dependents": 2,
+        "direct": 1,
+        "rebuilt": 2,
+    }
+    chains = batch.run_command(db, "rebuild_chains prog")["result"]
+    assert chains["count"] == 1
+    assert [link["target"] for link in chains["chains"][0]] == [
+        "prog",
+        "<dir>my file.o",
+        "gen.h",
+    ]
+    show = batch.run_command(db, "show gen.h")["result"]
+    assert show["rebuild_reason"] == database.RebuildReason.MISSING.value
+    assert show["deps_rev"] == ["<dir>my file.o"]
+    assert batch.run_command(db, "critical_path rebuilt")["result"] == {
+        "critical_path": ["prog", "<dir>my file.o", "gen.h"],
+        "widths": [1, 1, 1],
+    }
+    root_causes = batch.run_command(db, "root_causes")["result"]
+    assert root_causes == [
+        {
+            "reason": database.RebuildReason.MISSING.value,
+            "causes": [{"target": "gen.h", "rebuilds": 3}],
+        }
+    ]
+    # Results can be serialized.
+    for name in batch.COMMANDS:
+        json.dumps(batch.run_command(db, f"{name} prog"))
+
+
+@pytest.mark.parametrize(
+    "line,error",
+    [
+        ("frobnicate", "Unknown command 'frobnicate'"),
+        ("deps nonexistent", "No target named 'nonexistent'"),
+        ("deps", "No target name given"),
+        ("cycles please", "Unexpected argument 'please'"),
+    ],
+)
+def test_run_command_errors(
+    line: str, error: str, db: database.Database
+) -> None:
+    """Test errors are reported in results, without adding targets."""
+    assert batch.run_command(db, line) == {"command": line, "error": error}
+    assert db.find_target("nonexistent") is None
+
+
+@pytest.mark.parametrize("fmt", batch.FORMATS)
+def test_write_results(fmt: str, db: database.Database) -> None:
+    """Test writing results in each format."""
+    results = batch.run_commands(db, ["targets prog", "deps missing"])
+    out = io.StringIO()
+    assert not batch.write_results(results, out, fmt)
+    if fmt == "json":
+        parsed = json.loads(out.getvalue())
+    else:
+        parsed = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert parsed == [
+        {"command": "targets prog", "result": ["prog"]},
+        {"command": "deps missing", "error": "No target named 'missing'"},
+    ]
+
+    out = io.StringIO()
+    assert batch.write_results([], out, fmt)
+    if fmt == "json":
+        assert json.loads(out.getvalue()) == []
+    else:
+        assert out.getvalue() == ""
+
+
+def test_read_script(tmp_path: pathlib.Path) -> None:
+    """Test reading commands from a script."""
+    script = tmp_path / "queries.txt"
+    script.write_text("# Build health\n\ncycles\n  deps prog  \n")
+    assert batch.read_script(script) == ["cycles", "deps prog"]
@@ -9,6 +9,7 @@
 __all__ = ()
 
 
+import datetime
 import unittest
 
 from .. import database
@@ -54,6 +55,105 @@ class DatabaseTest(unittest.TestCase):
         check_find("foo\d", ["foo1", "foo2"])
         check_find("f.*bar", ["foo-bar", "<f>bar"])
 
+    def test_targets_by_filename_and_grist(self):
+        """Test the targets_by_filename and targets_by_grist methods."""
+        for name in ["<a>x.c", "<b>x.c", "x.c", "<a>y.c", "<a>x+c", "xxc"]:
+            self._db.get_target(name)
+
+        def check(targets, expected_names):
+            self.assertEqual(
+                [target.name for target in targets], expected_names
+            )
+
+        check(self._db.targets_by_filename("x.c"), ["<a>x.c", "<b>x.c", "x.c"])
+        check(self._db.targets_by_filename("x+c"), ["<a>x+c"])
+        check(self._db.targets_by_filename("z.c"), [])
+        check(self._db.targets_by_grist("<a>"), ["<a>x.c", "<a>y.c", "<a>x+c"])
+        check(self._db.targets_by_grist(""), ["x.c", "xxc"])
+
+        self._db.compact()
+        check(self._db.targets_by_grist("<b>"), ["<b>x.c"])
+
+    def test_compact(self):
+        """Test compacting a database preserves its contents."""
+        foo = self._db.get_target("foo")
+        bar = self._db.get_target("<g>bar")
+        baz = self._db.get_target("baz")
+        foo.add_dependency(bar)
+        foo.add_dependency(baz)
+        bar.add_inclusion(baz)
+        foo.add_i_am_newer_than(baz)
+        baz.set_inherits_timestamp_from(bar)
+        bar.set_timestamp(datetime.datetime(2015, 11, 24, 14, 39, 20))
+        bar.set_binding("src/bar")
+        foo.set_fate(database.Fate.UPDATE)
+        foo.set_rebuild_reason(database.RebuildReason.OUTDATED, baz)
+        foo.add_source("phase1.log")
+        foo.add_source("phase2.log")
+        bar.add_source("phase2.log")
+        records = list(self._db.records())
+
+        self._db.compact()
+        self.assertTrue(self._db.compacted)
+        self.assertEqual(list(self._db.records()), records)
+        self.assertEqual(repr(self._db), "Database(3 targets)")
+
+        foo = self._db.get_target("foo")
+        self.assertEqual(repr(foo), "Target(foo)")
+        self.assertEqual(foo, database.Target("foo"))
+        self.assertEqual(foo.deps, (bar, baz))
+        self.assertEqual(self._db.get_target("baz").deps_rev, {foo})
+        self.assertEqual(self._db.get_target("baz").incs_rev, {bar})
+        self.assertEqual(self._db.get_target("baz").older_than, {foo})
+        self.assertEqual(
+            self._db.get_target("<g>bar").bequeaths_timestamp_to, {baz}
+        )
+        self.assertEqual(self._db.get_target("<g>bar").grist(), "<g>")
+        self.assertTrue(foo.rebuilt)
+        self.assertEqual(foo.sources, ("phase1.log", "phase2.log"))
+        self.assertEqual(self._db.get_target("baz").sources, ())
+        self.assertEqual(list(self._db.find_targets("ba")), [bar, baz])
+
+    def test_summary(self):
+        """Test the summary method."""
+        self.assertEqual(
+            self._db.summary(), database.DatabaseSummary(0, 0, 0, 0, 0, 0, 0)
+        )
+        foo = self._db.get_target("foo")
+        bar = self._db.get_target("bar")
+        baz = self._db.get_target("baz")
+        foo.add_dependency(bar)
+        foo.add_dependency(baz)
+        bar.add_inclusion(baz)
+        foo.add_i_am_newer_than(baz)
+        baz.set_inherits_timestamp_from(bar)
+        foo.set_rebuild_reason(database.RebuildReason.OUTDATED, baz)
+        bar.set_rebuild_reason(database.RebuildReason.MISSING)
+        expected = database.DatabaseSummary(
+            targets=3,
+            rebuilt=2,
+            deps=2,
+            incs=1,
+            newer_than=1,
+            inherits_timestamp=1,
+            rebuild_causes=1,
+        )
+        self.assertEqual(self._db.summary(), expected)
+        self._db.compact()
+        self.assertEqual(self._db.summary(), expected)
+
+    def test_compact_read_only(self):
+        """Test compacted databases can't be modified."""
+        self._db.get_target("foo")
+        self._db.compact()
+        with self.assertRaises(TypeError):
+            self._db.get_target("bar")
+        foo = self._db.get_target("foo")
+        with self.assertRaises(TypeError):
+            foo.add_dependency(foo)
+        with self.assertRaises(TypeError):
+            foo.set_fate(database.Fate.UPDATE)
+
 
 class TargetTest(unittest.TestCase):
     """Tests for the Target class."""
@@ -113,6 +213,36 @@ class TargetTest(unittest.TestCase):
         self.assertNotEqual(x, z)
         self.assertNotEqual(hash(x), hash(z))
 
+    def test_lazy_relationships(self):
+        """Test empty relationships share a sentinel until written."""
+        self.assertFalse(hasattr(self.first, "__dict__"))
+        self.assertIs(self.first.deps, self.second.deps)
+        self.assertIs(self.first.older_than, self.second.older_than)
+        self.assertEqual(len(self.first.deps), 0)
+        self.assertEqual(self.first.deps, [])
+        self.assertEqual(self.first.older_than, set())
+
+        self.first.add_i_am_newer_than(self.second)
+        self.first.add_i_am_newer_than(self.third)
+        self.assertEqual(
+            list(self.first.newer_than), [self.second, self.third]
+        )
+        self.assertEqual(set(self.third.older_than), {self.first})
+        self.assertEqual(len(self.second.newer_than), 0)
+        self.assertEqual(len(self.first.older_than), 0)
+
+    def test_add_source(self):
+        """Test the add_source method."""
+        self.first.add_source("a.log")
+        self.first.add_source("b.log")
+        self.first.add_source("a.log")
+        self.second.add_source("a.log")
+        self.second.add_source("b.log")
+        self.assertEqual(self.first.sources, ("a.log", "b.log"))
+        # Targets from the same logs share their sources.
+        self.assertIs(self.first.sources, self.second.sources)
+        self.assertEqual(self.third.sources, ())
+
     def test_filename(self):
         """Test the filename method."""
         tgt = database.Target("<grist nonsense>this_is-the_filename.abc")
@@ -123,6 +253,15 @@ class TargetTest(unittest.TestCase):
         tgt = database.Target("<grist!nonsense>this_is-the_filename.abc")
         self.assertEqual(tgt.grist(), "<grist!nonsense>")
 
+    def test_unclosed_grist(self):
+        """Test names with an unclosed grist are treated as ungristed."""
+        tgt = database.Target("<abc")
+        self.assertEqual(tgt.grist(), "")
+        self.assertEqual(tgt.filename(), "<abc")
+        self.assertEqual(tgt.brief_name(), "<abc")
+        db = database.Database()
+        self.assertIs(db.get_target("<abc"), db.get_target("<abc"))
+
     def test_brief_name(self):
         """Test the brief name method."""
         tgt = database.Target("<blah!grist!ablah!bblah>some_filename xyz.foo")
@@ -0,0 +1,101 @@
+# ------------------------------------------------------------------------------
+# test_diff.py - Database comparison module tests
+# ------------------------------------------------------------------------------
+
+"""Database comparison tests."""
+
+__all__ = ()
+
+
+import io
+import pathlib
+
+from .. import database
+from .. import diff
+from .. import parsers
+from .test_parsers import SAMPLE_LOG
+
+
+def _db(
+    deps: dict[str, list[str]],
+    rebuilt: dict[str, database.RebuildReason],
+    bindings: dict[str, str],
+) -> database.Database:
+    db = database.Database()
+    for name, dep_names in deps.items():
+        for dep_name in dep_names:
+            db.get_target(name).add_dependency(db.get_target(dep_name))
+    for name, reason in rebuilt.items():
+        db.get_target(name).set_rebuild_reason(reason)
+        db.get_target(name).set_fate(database.Fate.UPDATE)
+    for name, binding in bindings.items():
+        db.get_target(name).set_binding(binding)
+    return db
+
+
+def test_diff() -> None:
+    """Test finding the differences between two databases."""
+    missing = database.RebuildReason.MISSING
+    touched = database.RebuildReason.TOUCHED
+    update = database.Fate.UPDATE
+    old = _db(
+        {"prog": ["a.o", "b.o"], "a.o": ["a.c"], "b.o": ["b.c"]},
+        {"a.o": missing, "prog": missing},
+        {"a.c": "src/a.c", "b.c": "src/b.c"},
+    )
+    new = _db(
+        {"prog": ["a.o", "c.o"], "a.o": ["a.c"], "c.o": ["c.c"]},
+        {"a.o": touched, "c.o": missing, "a.c": touched},
+        {"a.c": "src/a.c", "c.c": "src/c.c"},
+    )
+    new.get_target("a.c").add_inclusion(new.get_target("a.h"))
+
+    result = diff.diff(old, new)
+    assert result.added == ["c.o", "c.c", "a.h"]
+    assert result.removed == ["b.o", "b.c"]
+    assert result.newly_rebuilt == ["c.o", "a.c"]
+    assert result.no_longer_rebuilt == ["prog"]
+    assert result.changed_reasons == [diff.Change("a.o", missing, touched)]
+    assert result.changed_fates == [
+        diff.Change("prog", update, None),
+        diff.Change("a.c", None, update),
+    ]
+    assert result.changed_bindings == []
+    assert result.added_deps == [("prog", "c.o")]
+    assert result.removed_deps == [("prog", "b.o")]
+    assert result.added_incs == [("a.c", "a.h")]
+    assert result.removed_incs == []
+
+    assert diff.diff(new, new) == diff.DatabaseDiff(*([] for _ in range(11)))
+
+    out = io.StringIO()
+    diff.write_report(result, out, limit=1)
+    report = out.getvalue()
+    assert "Added targets: 3\n    c.o\n    ... and 2 more\n" in report
+    assert (
+        "Changed rebuild reasons: 1\n"
+        f"    a.o: {missing.value} -> {touched.value}\n"
+    ) in report
+    assert "Changed fates: 2\n    prog: update -> none\n" in report
+
+
+def _parse(logfile: pathlib.Path) -> database.Database:
+    db = database.Database()
+    parsers.parse(db, logfile)
+    return db
+
+
+def test_load_pair(tmp_path: pathlib.Path) -> None:
+    """Test loading two logs at once."""
+    old_logfile = tmp_path / "old.log"
+    old_logfile.write_text(SAMPLE_LOG)
+    new_logfile = tmp_path / "new.log"
+    new_logfile.write_text(SAMPLE_LOG.replace("src/main.c", "src/new.c"))
+
+    old_db, new_db = diff.load_pair(_parse, old_logfile, new_logfile)
+    assert list(old_db.records()) == list(_parse(old_logfile).records())
+    result = diff.diff(old_db, new_db)
+    assert result.changed_bindings == [
+        diff.Change("<a>main.c", "src/main.c", "src/new.c")
+    ]
+    assert not result.added and not result.removed
@@ -0,0 +1,134 @@
+# ------------------------------------------------------------------------------
+# test_export.py - Export module tests
+# ------------------------------------------------------------------------------
+
+"""Export tests."""
+
+__all__ = ()
+
+
+import datetime
+import io
+import json
+
+import pytest
+
+from .. import database
+from .. import export
+
+
+@pytest.fixture
+def db(compacted: bool) -> database.Database:
+    """Database with targets using every exported attribute."""
+    db = database.Database()
+    prog = db.get_target("prog")
+    obj = db.get_target("<dir>main.o")
+    src = db.get_target("<dir>main.c")
+    hdr = db.get_target("<dir>main.h")
+    prog.add_dependency(obj)
+    obj.add_dependency(src)
+    src.add_inclusion(hdr)
+    obj.add_i_am_newer_than(src)
+    obj.set_binding("build/main.o")
+    obj.set_timestamp(datetime.datetime(2015, 11, 24, 14, 39, 20))
+    obj.set_fate(database.Fate.UPDATE)
+    obj.set_rebuild_reason(database.RebuildReason.OUTDATED, src)
+    hdr.set_inherits_timestamp_from(src)
+    if compacted:
+        db.compact()
+    return db
+
+
+def test_write_ndjson(db: database.Database) -> None:
+    """Test exporting one JSON object per target."""
+    out = io.StringIO()
+    assert export.export(db, out, "ndjson") == 4
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 4
+    objs = [json.loads(line) for line in lines]
+    assert [obj["name"] for obj in objs] == [
+        "prog",
+        "<dir>main.o",
+        "<dir>main.c",
+        "<dir>main.h",
+    ]
+    assert objs[1] == {
+        "name": "<dir>main.o",
+        "binding": "build/main.o",
+        "fate": database.Fate.UPDATE.value,
+        "timestamp": "2015-11-24T14:39:20",
+        "rebuild_reason": database.RebuildReason.OUTDATED.value,
+        "rebuild_reason_target": "<dir>main.c",
+        "deps": ["<dir>main.c"],
+        "incs": [],
+        "newer_than": ["<dir>main.c"],
+        "inherits_timestamp_from": None,
+        "sources": [],
+    }
+    assert objs[2]["incs"] == ["<dir>main.h"]
+    assert objs[3]["inherits_timestamp_from"] == "<dir>main.c"
+    assert objs[3]["fate"] is None
+
+
+def test_export_invalid_format(db: database.Database) -> None:
+    """Test exporting in an unknown format."""
+    with pytest.raises(ValueError):
+        export.export(db, io.StringIO(), "xml")
+
+
+def _dot_edges(dot: str) -> list[str]:
+    """Get the edges from a DOT graph, without their attributes."""
+    return [
+        line.strip().split(" [")[0].rstrip(";")
+        for line in dot.splitlines()
+        if " -> " in line
+    ]
+
+
+def test_write_dot(db: database.Database) -> None:
+    """Test writing the neighbourhood of a target as a DOT graph."""
+    out = io.StringIO()
+    obj = db.get_target("<dir>main.o")
+    assert export.write_dot(obj, out, depth=2) == 3
+    dot = out.getvalue()
+    assert dot.startswith("digraph jamjar {\n")
+    assert dot.endswith("}\n")
+    assert _dot_edges(dot) == [
+        '"<dir>main.o" -> "<dir>main.c"',
+        '"<dir>main.c" -> "<dir>main.h"',
+    ]
+    assert "style=dashed" in dot.splitlines()[-2]
+    assert 'label="<dir>main.o\\n(update)"' in dot
+    assert "fillcolor=lightpink" in dot
+    assert "Truncated" not in dot
+
+    out = io.StringIO()
+    src = db.get_target("<dir>main.c")
+    assert export.write_dot(src, out, direction="dependents", depth=5) == 3
+    assert _dot_edges(out.getvalue()) == [
+        '"<dir>main.o" -> "<dir>main.c"',
+        '"prog" -> "<dir>main.o"',
+    ]
+
+    out = io.StringIO()
+    assert export.write_dot(obj, out, direction="causes") == 2
+    assert _dot_edges(out.getvalue()) == ['"<dir>main.o" -> "<dir>main.c"']
+    assert 'label="it is older than"' in out.getvalue()
+
+
+def test_write_dot_max_nodes() -> None:
+    """Test the number of targets in a DOT graph is capped."""
+    db = database.Database()
+    hub = db.get_target('hub "h"\\')
+    for idx in range(1000):
+        db.get_target(f"t{idx}").add_dependency(hub)
+    out = io.StringIO()
+    assert (
+        export.write_dot(hub, out, direction="dependents", max_nodes=10) == 10
+    )
+    assert len(_dot_edges(out.getvalue())) == 9
+    assert 'label="Truncated at 10 targets";' in out.getvalue()
+    assert '"hub \\"h\\"\\\\"' in out.getvalue()
+
+    with pytest.raises(ValueError):
+        export.write_dot(hub, out, direction="sideways")
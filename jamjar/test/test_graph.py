@@ -0,0 +1,89 @@
+# ------------------------------------------------------------------------------
+# test_graph.py - Graph analysis module tests
+# ------------------------------------------------------------------------------
+
+"""Dependency graph analysis tests."""
+
+__all__ = ()
+
+
+import pytest
+
+from .. import database
+from .. import graph
+
+
+@pytest.fixture
+def cyclic_db(compacted: bool) -> database.Database:
+    """Database with some dependency and include cycles."""
+    db = database.Database()
+    deps = {
+        "all": ["a", "x"],
+        "a": ["b"],
+        "b": ["c"],
+        "c": ["a", "d"],
+        "d": [],
+        "x": ["x", "y"],
+        "y": ["d"],
+    }
+    incs = {"d": ["h1"], "h1": ["h2"], "h2": ["h1", "h3"], "h3": []}
+    for name, dep_names in deps.items():
+        for dep_name in dep_names:
+            db.get_target(name).add_dependency(db.get_target(dep_name))
+    for name, inc_names in incs.items():
+        for inc_name in inc_names:
+            db.get_target(name).add_inclusion(db.get_target(inc_name))
+    if compacted:
+        db.compact()
+    return db
+
+
+def _names(targets: list[database.Target]) -> list[str]:
+    return sorted(target.name for target in targets)
+
+
+def test_strongly_connected_components(cyclic_db: database.Database) -> None:
+    """Test finding strongly connected components."""
+    components = list(graph.strongly_connected_components(cyclic_db.targets()))
+    assert sorted(_names(component) for component in components) == [
+        ["a", "b", "c"],
+        ["all"],
+        ["d"],
+        ["h1", "h2"],
+        ["h3"],
+        ["x"],
+        ["y"],
+    ]
+
+
+def test_condensation(cyclic_db: database.Database) -> None:
+    """Test the condensation is a DAG in reverse topological order."""
+    condensation = graph.condense(cyclic_db)
+    assert len(condensation) == 7
+    for target in cyclic_db.targets():
+        idx = condensation.component_of[target]
+        assert target in condensation.components[idx]
+        for successor in graph.successors(target):
+            successor_idx = condensation.component_of[successor]
+            assert successor_idx <= idx
+            if successor_idx != idx:
+                assert successor_idx in condensation.successors[idx]
+    for idx, component_successors in enumerate(condensation.successors):
+        assert all(successor < idx for successor in component_successors)
+
+    assert [_names(cycle) for cycle in condensation.cycles()] == [
+        ["a", "b", "c"],
+        ["h1", "h2"],
+        ["x"],
+    ]
+
+
+def test_long_chain() -> None:
+    """Test graphs deeper than the recursion limit."""
+    db = database.Database()
+    for idx in range(20_000):
+        db.get_target(f"t{idx}").add_dependency(db.get_target(f"t{idx + 1}"))
+    db.get_target("t20000").add_inclusion(db.get_target("t0"))
+    condensation = graph.condense(db)
+    assert len(condensation) == 1
+    assert len(condensation.cycles()[0]) == 20_001
@@ -0,0 +1,438 @@
+# ------------------------------------------------------------------------------
+# test_parsers.py - Parser tests
+# ------------------------------------------------------------------------------
+
+"""Jam debug output parser tests."""
+
+__all__ = ()
+
+
+import bz2
+import datetime
+import gzip
+import io
+import lzma
+import pathlib
+import sys
+from typing import Any, Iterator
+from unittest import mock
+
+import pytest
+
+from .. import database
+from .. import parsers
+from ..parsers import _dm, _scan
+
+SAMPLE_LOG = """\
+...found 12 target(s)...
+Depends "all" : "<a>prog" ;
+Depends "<a>prog" : "<a>main.o" ;
+Depends "<a>prog" : "<a>util.o" ;
+Depends "<a>main.o" : "<a>main.c" ;
+Depends "<a>util.o" : "<a>util.c" ;
+Includes "<a>main.c" : "<a>util.h" ;
+Includes "<a>util.c" : "<a>util.h" ;
+Includes "<a>util.h" : "<a>types.h" ;
+Depends "<a>prog" : "<a>main.o" ;
+make\t--\tall
+make\t--\t <a>prog
+make\t--\t  <a>main.o
+bind\t--\t   <a>main.c: src/main.c
+time\t--\t   <a>main.c: Tue Nov 17 10:23:45 2015
+time\t--\t   <a>util.h: Mon Nov  2 09:03:05 2015
+time\t--\t   <a>types.h: missing
+newer <a>main.c
+newer than: <a>main.o
+time\t--\t  <a>main.o: Mon Nov 16 18:00:00 2015
+made+\tupdate\t  <a>main.o
+Rebuilding "<a>main.o": it is older than "<a>main.c"
+    "<a>main.d" inherits timestamp from "<a>main.o"
+    "<a>main.i" inherits timestamp from "<a>main.o"
+touched <a>util.c
+Rebuilding "<a>util.o": inclusion of dependency "<a>util.h" was updated
+made\tstable\t  <a>util.c
+missing <a>util.o
+Rebuilding "<a>util.o": it doesn't exist
+made*\tupdate\t  <a>util.o
+Rebuilding "<a>prog": dependency "<a>main.o" was updated
+Inclusions rebuilding for "<a>main.c": inclusion "<a>util.h" was updated
+    "<a>main.s" inherits timestamp from "<a>main.o"
+made\tupdate\t <a>prog
+temp <a>gen.h
+Some other output
+newer than: <a>prog
+Rebuilding "all": build action was updated
+...updated 3 target(s)...
+"""
+
+
+def _dump(db: database.Database) -> dict[str, dict[str, Any]]:
+    """Summarise the contents of a database, keyed by target name."""
+
+    def names(targets: Any) -> list[str]:
+        return [target.name for target in targets]
+
+    def maybe_name(target: Any) -> Any:
+        return None if target is None else target.name
+
+    return {
+        target.name: {
+            "deps": names(target.deps),
+            "deps_rev": sorted(names(target.deps_rev)),
+            "incs": names(target.incs),
+            "incs_rev": sorted(names(target.incs_rev)),
+            "newer_than": names(target.newer_than),
+            "older_than": sorted(names(target.older_than)),
+            "timestamp": target.timestamp,
+            "inherits_timestamp_from": maybe_name(
+                target.inherits_timestamp_from
+            ),
+            "bequeaths_timestamp_to": sorted(
+                names(target.bequeaths_timestamp_to)
+            ),
+            "binding": target.binding,
+            "fate": target.fate,
+            "rebuild_reason": target.rebuild_reason,
+            "rebuild_reason_target": maybe_name(target.rebuild_reason_target),
+        }
+        for target in db.find_targets("")
+    }
+
+
+def _parse_separately(logfile: pathlib.Path) -> database.Database:
+    """Parse a log file by running each parser over it in turn."""
+    db = database.Database()
+    for parser_cls in [parsers.DCParser, parsers.DDParser, parsers.DMParser]:
+        with open(logfile) as logs:
+            parser_cls(db).parse(logs)
+    return db
+
+
+@pytest.fixture
+def logfile(tmp_path: pathlib.Path) -> pathlib.Path:
+    """Sample log file containing '-ddmc' output."""
+    path = tmp_path / "jam.log"
+    path.write_text(SAMPLE_LOG)
+    return path
+
+
+def test_parse_matches_separate_parsers(logfile: pathlib.Path) -> None:
+    """
+    Test that single-pass parsing matches running each parser in turn,
+    including the order the targets are added in.
+
+    """
+    db = database.Database()
+    parsers.parse(db, logfile)
+    assert list(_dump(db).items()) == list(
+        _dump(_parse_separately(logfile)).items()
+    )
+
+
+def test_parse(logfile: pathlib.Path) -> None:
+    """Spot-check the information parsed from the sample log."""
+    db = database.Database()
+    parsers.parse(db, logfile)
+
+    prog = db.get_target("<a>prog")
+    assert [dep.name for dep in prog.deps] == ["<a>main.o", "<a>util.o"]
+    assert prog.rebuild_reason is database.RebuildReason.UPDATED_DEPENDENCY
+    assert prog.rebuild_reason_target is db.get_target("<a>main.o")
+    assert prog.fate is database.Fate.UPDATE
+    # The "newer than" line doesn't immediately follow the fate line.
+    assert prog.newer_than == []
+
+    main_c = db.get_target("<a>main.c")
+    assert main_c.binding == "src/main.c"
+    assert main_c.timestamp == datetime.datetime(2015, 11, 17, 10, 23, 45)
+    assert main_c.newer_than == [db.get_target("<a>main.o")]
+    assert main_c.rebuild_reason is database.RebuildReason.UPDATED_INCLUDE
+
+    util_h = db.get_target("<a>util.h")
+    assert util_h.timestamp == datetime.datetime(2015, 11, 2, 9, 3, 5)
+    assert [inc.name for inc in util_h.incs] == ["<a>types.h"]
+    assert db.get_target("<a>types.h").timestamp is None
+
+    main_o = db.get_target("<a>main.o")
+    assert main_o.bequeaths_timestamp_to == {
+        db.get_target(name) for name in ["<a>main.d", "<a>main.i", "<a>main.s"]
+    }
+    assert db.get_target("<a>util.o").rebuild_reason is (
+        database.RebuildReason.MISSING
+    )
+    assert db.get_target("<a>gen.h").fate is database.Fate.TEMP
+
+
+def test_dc_parser_streams() -> None:
+    """Test that the '-dc' parser handles each line as it's read."""
+    db = database.Database()
+
+    def logs() -> Iterator[str]:
+        yield 'Rebuilding "foo": it doesn\'t exist\n'
+        yield '  "bar" inherits timestamp from "foo"\n'
+        # Everything so far should've been handled before reading on.
+        assert db.get_target("foo").rebuilt
+        assert db.get_target("bar").inherits_timestamp_from is not None
+        yield "newer baz\n"
+
+    parsers.DCParser(db).parse(logs())
+    assert db.get_target("baz").fate is database.Fate.NEWER
+
+
+def test_scan_lines_crlf(tmp_path: pathlib.Path) -> None:
+    """Test that the scanner handles logs with Windows line endings."""
+    crlf_logfile = tmp_path / "crlf.log"
+    crlf_logfile.write_bytes(SAMPLE_LOG.replace("\n", "\r\n").encode())
+    lf_logfile = tmp_path / "lf.log"
+    lf_logfile.write_text(SAMPLE_LOG)
+    assert list(parsers.scan_lines(crlf_logfile)) == list(
+        parsers.scan_lines(lf_logfile)
+    )
+
+
+def test_scan_lines_region(logfile: pathlib.Path) -> None:
+    """Test scanning part of a log."""
+    data = logfile.read_bytes()
+    start = data.index(b"newer <a>main.c")
+    end = data.index(b"touched")
+    assert list(parsers.scan_lines(logfile, start, end)) == [
+        "newer <a>main.c",
+        "newer than: <a>main.o",
+        "time\t--\t  <a>main.o: Mon Nov 16 18:00:00 2015",
+        "made+\tupdate\t  <a>main.o",
+        'Rebuilding "<a>main.o": it is older than "<a>main.c"',
+        '    "<a>main.d" inherits timestamp from "<a>main.o"',
+        '    "<a>main.i" inherits timestamp from "<a>main.o"',
+    ]
+
+
+def test_scan_lines_blocks(
+    logfile: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that scanning in small blocks doesn't change the results."""
+    expected = list(parsers.scan_lines(logfile))
+    monkeypatch.setattr(_scan, "_BLOCK_SIZE", 16)
+    assert list(parsers.scan_lines(logfile)) == expected
+
+
+@pytest.mark.parametrize("jobs", [2, 3, 8])
+def test_parse_parallel(logfile: pathlib.Path, jobs: int) -> None:
+    """Test that parsing in parallel gives the same result as serially."""
+    serial_db = database.Database()
+    parsers.parse(serial_db, logfile)
+    parallel_db = database.Database()
+    parsers.parse(parallel_db, logfile, jobs=jobs)
+    # Check the order of the targets, as well as their contents.
+    assert list(_dump(parallel_db).items()) == list(_dump(serial_db).items())
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_parse_many(
+    logfile: pathlib.Path, tmp_path: pathlib.Path, jobs: int
+) -> None:
+    """Test parsing several log files into one database."""
+    # A second phase of the build, in which prog is found to be up to date,
+    # and a new target is added.
+    phase2 = tmp_path / "phase2.log"
+    phase2.write_text(
+        'Depends "<a>prog" : "<a>extra.o" ;\n'
+        "make\t--\t <a>prog\n"
+        "made\tstable\t <a>prog\n"
+    )
+    db = database.Database()
+    parsers.parse_many(db, [logfile, phase2], jobs=jobs)
+
+    first_db = database.Database()
+    parsers.parse(first_db, logfile)
+    expected = _dump(first_db)
+    dump = _dump(db)
+    assert list(dump) == [*expected, "<a>extra.o"]
+    assert dump["<a>main.o"] == expected["<a>main.o"]
+    prog = db.get_target("<a>prog")
+    assert prog.fate is database.Fate.STABLE
+    assert [dep.name for dep in prog.deps] == [
+        "<a>main.o",
+        "<a>util.o",
+        "<a>extra.o",
+    ]
+    assert prog.sources == (str(logfile), str(phase2))
+    assert db.get_target("<a>main.o").sources == (str(logfile),)
+    assert db.get_target("<a>extra.o").sources == (str(phase2),)
+
+    # The last log's fate wins, whichever order the logs are in.
+    db = database.Database()
+    parsers.parse_many(db, [phase2, logfile], jobs=jobs)
+    assert db.get_target("<a>prog").fate is database.Fate.UPDATE
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_parse_stats(logfile: pathlib.Path, jobs: int) -> None:
+    """Test collecting statistics while parsing."""
+    stats = parsers.ParseStats()
+    db = database.Database()
+    parsers.parse(db, logfile, jobs=jobs, stats=stats)
+    assert stats.bytes_read == len(SAMPLE_LOG)
+    assert stats.lines_read == SAMPLE_LOG.count("\n")
+    assert 0 < stats.candidate_lines < stats.lines_read
+    assert stats.matches["-dd"] == {"Depends": 6, "Includes": 3}
+    assert stats.matches["-dm"] == {"time": 4, "bind": 1, "made": 4}
+    assert stats.matches["-dc"]["Rebuilding"] == 5
+    assert stats.matches["-dc"]["Inclusions rebuilding"] == 1
+    assert stats.matches["-dc"]["inherits timestamp"] == 3
+    assert stats.matches["-dc"]["missing"] == 1
+    summary = db.summary()
+    assert stats.targets_created == summary.targets == 13
+    assert stats.edges_created == {
+        "deps": summary.deps,
+        "incs": summary.incs,
+        "newer_than": summary.newer_than,
+        "inherits_timestamp": summary.inherits_timestamp,
+        "rebuild_causes": summary.rebuild_causes,
+    }
+    assert stats.wall_time > 0
+    assert stats.cpu_time >= stats.scan_time >= 0
+
+    report = io.StringIO()
+    stats.write_report(report)
+    assert "-dd parser: 9 lines matched (Depends 6, Includes 3)" in (
+        report.getvalue()
+    )
+    assert "Targets created: 13" in report.getvalue()
+
+
+def test_parse_stats_stream(logfile: pathlib.Path) -> None:
+    """Test collecting statistics while parsing a compressed log."""
+    compressed_logfile = logfile.with_suffix(".gz")
+    compressed_logfile.write_bytes(gzip.compress(logfile.read_bytes()))
+    stats = parsers.ParseStats()
+    parsers.parse(database.Database(), compressed_logfile, stats=stats)
+    assert stats.bytes_read == len(SAMPLE_LOG)
+    assert stats.lines_read == SAMPLE_LOG.count("\n")
+    assert stats.matches["-dd"] == {"Depends": 6, "Includes": 3}
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_parse_many_stats(logfile: pathlib.Path, jobs: int) -> None:
+    """Test collecting statistics while parsing several log files."""
+    stats = parsers.ParseStats()
+    db = database.Database()
+    parsers.parse_many(db, [logfile, logfile], jobs=jobs, stats=stats)
+    assert stats.lines_read == 2 * SAMPLE_LOG.count("\n")
+    assert stats.matches["-dd"] == {"Depends": 12, "Includes": 6}
+    # Targets and edges found in both logs are only created once.
+    assert stats.targets_created == 13
+    assert stats.edges_created["deps"] == db.summary().deps == 5
+
+
+@pytest.mark.parametrize(
+    "compress", [gzip.compress, lzma.compress, bz2.compress]
+)
+def test_parse_compressed(
+    logfile: pathlib.Path, tmp_path: pathlib.Path, compress: Any
+) -> None:
+    """Test parsing compressed log files."""
+    compressed_logfile = tmp_path / "jam.log.z"
+    compressed_logfile.write_bytes(compress(logfile.read_bytes()))
+    db = database.Database()
+    parsers.parse(db, compressed_logfile)
+    assert list(_dump(db).items()) == list(
+        _dump(_parse_separately(logfile)).items()
+    )
+
+
+def test_parse_stdin(
+    logfile: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test parsing logs from stdin."""
+    stdin = io.TextIOWrapper(
+        io.BufferedReader(io.BytesIO(logfile.read_bytes()))
+    )
+    monkeypatch.setattr(sys, "stdin", stdin)
+    db = database.Database()
+    parsers.parse(db, parsers.STDIN)
+    assert list(_dump(db).items()) == list(
+        _dump(_parse_separately(logfile)).items()
+    )
+
+
+def test_scan_stream(logfile: pathlib.Path) -> None:
+    """Test that scanning a stream gives the same lines as a mapped file."""
+    expected = list(parsers.scan_lines(logfile))
+    for block_size in [1, 16, 1 << 20]:
+        with mock.patch.object(_scan, "_BLOCK_SIZE", block_size):
+            with open(logfile, "rb") as f:
+                assert list(parsers.scan_stream(f)) == expected
+
+
+@pytest.mark.parametrize(
+    "timestamp",
+    [
+        "Tue Nov 24 14:39:20 2015",
+        "Sun Feb  1 00:00:00 2015",
+        "Mon Dec 31 23:59:59 2018",
+        "Thu Feb 29 01:02:03 2024",
+        "Wed Jan 05 1:2:3 2022",
+    ],
+)
+def test_parse_timestamp(timestamp: str) -> None:
+    """Test the fast timestamp parsing matches strptime."""
+    assert _dm._parse_timestamp(timestamp) == datetime.datetime.strptime(
+        timestamp, _dm._TIMESTAMP_FORMAT
+    )
+
+
+@pytest.mark.parametrize(
+    "timestamp",
+    [
+        "Tue Nov 31 14:39:20 2015",
+        "Thu Feb 29 01:02:03 2023",
+        "Tue Nov 24 24:39:20 2015",
+        " Tue Nov 24 14:39:20 2015",
+        "Tue Foo 24 14:39:20 2015",
+        "24/11/2015",
+    ],
+)
+def test_parse_timestamp_invalid(timestamp: str) -> None:
+    """Test the fast timestamp parsing rejects what strptime rejects."""
+    with pytest.raises(ValueError):
+        _dm._parse_timestamp(timestamp)
+
+
+def test_follow(logfile: pathlib.Path, tmp_path: pathlib.Path) -> None:
+    """Test following a log file as it's written."""
+    followed_logfile = tmp_path / "followed.log"
+    # Split the logs mid-line, and between related '-dc' lines.
+    data = logfile.read_bytes()
+    split1 = data.index(b"newer than: <a>main.o")
+    split2 = data.index(b"inherits timestamp", split1)
+    followed_logfile.write_bytes(data[:split1])
+
+    db = database.Database()
+    follower = parsers.LogFollower(db, followed_logfile, poll_interval=0.01)
+    follower.start()
+    try:
+        assert follower.wait_caught_up(timeout=10)
+        with db.lock:
+            assert db.get_target("<a>main.c").fate == database.Fate.NEWER
+            assert db.get_target("<a>main.c").newer_than == []
+
+        for start, end in [(split1, split2), (split2, None)]:
+            with open(followed_logfile, "ab") as f:
+                f.write(data[start:end])
+            assert follower.wait_caught_up(timeout=10)
+    finally:
+        follower.stop()
+
+    assert list(_dump(db).items()) == list(
+        _dump(_parse_separately(logfile)).items()
+    )
+
+
+def test_follow_compressed(
+    logfile: pathlib.Path, tmp_path: pathlib.Path
+) -> None:
+    """Test compressed logs can't be followed."""
+    compressed_logfile = tmp_path / "jam.log.gz"
+    compressed_logfile.write_bytes(gzip.compress(logfile.read_bytes()))
+    with pytest.raises(ValueError):
+        parsers.LogFollower(database.Database(), compressed_logfile)
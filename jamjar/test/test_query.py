@@ -9,6 +9,9 @@
 __all__ = ()
 
 
+import itertools
+from typing import Optional
+
 import pytest
 
 from .. import database
@@ -16,7 +19,7 @@ from .. import query
 
 
 @pytest.fixture
-def deps_db() -> database.Database:
+def deps_db(compacted: bool) -> database.Database:
     """Database with helpful contents for testing dependency handling."""
     tgt_deps = {
         "a": ["b", "c"],
@@ -49,6 +52,8 @@ def deps_db() -> database.Database:
             inc_target = db.get_target(inc)
             target.add_inclusion(inc_target)
 
+    if compacted:
+        db.compact()
     return db
 
 
@@ -72,3 +77,255 @@ def test_deps(
         deps_db.get_target(expected_dep) for expected_dep in expected_deps
     )
     assert found == expected
+
+
+def _rebuilt_db(deps: dict[str, list[str]]) -> database.Database:
+    """Database where every target was rebuilt due to its dependencies."""
+    db = database.Database()
+    for name, dep_names in deps.items():
+        target = db.get_target(name)
+        target.set_rebuild_reason(database.RebuildReason.UPDATED_DEPENDENCY)
+        for dep_name in dep_names:
+            target.add_dependency(db.get_target(dep_name))
+    return db
+
+
+def _chain_names(chain: query.RebuildChain) -> list[str]:
+    return [target.name for target, _ in chain]
+
+
+def test_rebuild_chains() -> None:
+    """Test listing rebuild chains."""
+    db = _rebuilt_db(
+        {"a": ["b", "c"], "b": ["d"], "c": ["d", "e"], "d": [], "e": []}
+    )
+    # Jam's reason chain is followed before the rebuilt dependencies.
+    db.get_target("e").set_rebuild_reason(
+        database.RebuildReason.OUTDATED, db.get_target("f")
+    )
+    chains = query.rebuild_chains(db.get_target("a"))
+    assert [_chain_names(chain) for chain in chains] == [
+        ["a", "b", "d"],
+        ["a", "c", "d"],
+        ["a", "c", "e", "f"],
+    ]
+    assert chains[2][-1] == (
+        db.get_target("f"),
+        database.RebuildReason.OUTDATED,
+    )
+    assert query.count_rebuild_chains(db.get_target("a")) == 3
+    assert query.rebuild_chains(db.get_target("d")) == [
+        [(db.get_target("d"), None)]
+    ]
+
+
+def test_rebuild_chains_diamonds() -> None:
+    """Test rebuild chains through many shared dependencies."""
+    # A ladder of diamonds: 2**100 distinct chains.
+    deps = {}
+    for idx in range(100):
+        deps[f"top{idx}"] = [f"left{idx}", f"right{idx}"]
+        deps[f"left{idx}"] = [f"top{idx + 1}"]
+        deps[f"right{idx}"] = [f"top{idx + 1}"]
+    deps["top100"] = []
+    db = _rebuilt_db(deps)
+    top = db.get_target("top0")
+
+    assert query.count_rebuild_chains(top) == 2**100
+    chains = list(query.iter_rebuild_chains(top, limit=3))
+    assert len(chains) == 3
+    assert _chain_names(chains[0])[:4] == ["top0", "left0", "top1", "left1"]
+    assert _chain_names(chains[0])[-1] == "top100"
+
+
+def test_rebuild_chains_cycle() -> None:
+    """Test rebuild chains with a dependency cycle."""
+    db = _rebuilt_db({"a": ["b"], "b": ["c"], "c": ["a", "d"], "d": []})
+    chains = query.rebuild_chains(db.get_target("a"))
+    assert [_chain_names(chain) for chain in chains] == [["a", "b", "c", "d"]]
+    assert query.count_rebuild_chains(db.get_target("a")) == 1
+
+
+def test_dependents_closure(deps_db: database.Database) -> None:
+    """Test dependents_closure is the transitive reverse of deps."""
+    targets = list(deps_db.find_targets(""))
+    for target in targets:
+        expected = {
+            other: distance
+            for other in targets
+            if (distance := _deps_distance(other, target)) is not None
+        }
+        assert query.dependents_closure(target) == expected
+
+
+def _deps_distance(
+    source: database.Target, dest: database.Target
+) -> Optional[int]:
+    """Find the least number of steps from a target to one of its deps."""
+    seen = set()
+    frontier = [source]
+    for distance in itertools.count(1):
+        frontier = [
+            dep
+            for target in frontier
+            for dep in query.deps(target)
+            if dep not in seen
+        ]
+        if not frontier:
+            return None
+        if dest in frontier:
+            return distance
+        seen.update(frontier)
+    return None
+
+
+def test_dependents_closure_long_chain() -> None:
+    """Test dependents_closure doesn't recurse."""
+    db = database.Database()
+    for idx in range(10_000):
+        db.get_target(f"t{idx + 1}").add_dependency(db.get_target(f"t{idx}"))
+    dependents = query.dependents_closure(db.get_target("t0"))
+    assert len(dependents) == 10_000
+    assert dependents[db.get_target("t10000")] == 10_000
+
+
+def test_root_causes() -> None:
+    """Test ranking the root causes of rebuilds."""
+    db = _rebuilt_db(
+        {
+            "prog": ["a.o", "b.o", "c.o"],
+            "a.o": ["gen.h"],
+            "b.o": ["gen.h"],
+            "c.o": [],
+            "gen.h": [],
+        }
+    )
+    missing = database.RebuildReason.MISSING
+    outdated = database.RebuildReason.OUTDATED
+    db.get_target("gen.h").set_rebuild_reason(missing)
+    db.get_target("c.o").set_rebuild_reason(outdated, db.get_target("c.c"))
+
+    groups = query.root_causes(db)
+    assert list(groups) == [missing, outdated]
+    assert groups[missing] == [
+        query.RootCause(db.get_target("gen.h"), missing, 4)
+    ]
+    assert groups[outdated] == [
+        query.RootCause(db.get_target("c.c"), outdated, 2)
+    ]
+
+
+def test_root_causes_matches_chains(deps_db: database.Database) -> None:
+    """Test root causes agree with the ends of each target's chains."""
+    if deps_db.compacted:
+        pytest.skip("can't set rebuild reasons")
+    for target in deps_db.find_targets(""):
+        target.set_rebuild_reason(database.RebuildReason.UPDATED_DEPENDENCY)
+    deps_db.get_target("f").set_rebuild_reason(database.RebuildReason.TOUCHED)
+
+    expected: dict[str, int] = {}
+    for target in deps_db.find_targets(""):
+        for end in {chain[-1][0] for chain in query.rebuild_chains(target)}:
+            expected[end.name] = expected.get(end.name, 0) + 1
+    found = {
+        cause.target.name: cause.rebuilds
+        for causes in query.root_causes(deps_db).values()
+        for cause in causes
+    }
+    assert found == expected
+
+
+def test_effective_deps(deps_db: database.Database) -> None:
+    """Test effective deps and their closure against a brute-force walk."""
+    effective = query.EffectiveDeps()
+    for target in deps_db.find_targets(""):
+        includes = set()
+        frontier = list(target.incs)
+        while frontier:
+            inc = frontier.pop()
+            if inc not in includes:
+                includes.add(inc)
+                frontier.extend(inc.incs)
+        expected_deps = set(target.deps).union(*(inc.deps for inc in includes))
+        assert set(effective.includes(target)) == includes
+        assert set(effective.deps(target)) == expected_deps
+        assert len(effective.deps(target)) == len(expected_deps)
+        assert list(effective.deps(target)[: len(target.deps)]) == list(
+            target.deps
+        )
+
+        closure = set()
+        frontier = list(expected_deps)
+        while frontier:
+            dep = frontier.pop()
+            if dep not in closure:
+                closure.add(dep)
+                frontier.extend(effective.deps(dep))
+        assert set(effective.closure(target)) == closure
+        assert set(query.deps_closure(target)) == closure
+
+
+def test_effective_deps_include_chain() -> None:
+    """Test includes of includes are applied, through cycles and at depth."""
+    db = database.Database()
+    for idx in range(2_000):
+        db.get_target(f"h{idx}").add_inclusion(db.get_target(f"h{idx + 1}"))
+        db.get_target(f"h{idx}").add_dependency(db.get_target(f"d{idx}"))
+    db.get_target("h2000").add_inclusion(db.get_target("h1000"))
+    db.get_target("h2000").add_dependency(db.get_target("gen.h"))
+
+    found = query.effective_deps(db.get_target("h0"))
+    assert len(found) == 2_001
+    assert found[0] == db.get_target("d0")
+    assert db.get_target("gen.h") in found
+    # h1000 onwards include each other, so have the same effective deps.
+    effective = query.EffectiveDeps()
+    assert set(effective.deps(db.get_target("h1000"))) == set(
+        effective.deps(db.get_target("h2000"))
+    )
+    assert db.get_target("h1000") in effective.includes(db.get_target("h1000"))
+    assert db.get_target("h999") not in effective.includes(
+        db.get_target("h1000")
+    )
+    closure = effective.closure(db.get_target("h0"))
+    assert set(closure) == set(found)
+
+
+def test_build_profile(deps_db: database.Database) -> None:
+    """Test the critical path and level widths of a dependency graph."""
+    profile = query.build_profile(deps_db)
+    # Levels: f; d, e; b, c, r, z; a, q, y; p, x.
+    assert profile.widths == [1, 2, 4, 3, 2]
+    path = profile.critical_path
+    assert len(path) == 5
+    assert path[0].name in ("p", "x")
+    assert path[-1].name == "f"
+    for target, dep in zip(path, path[1:]):
+        assert dep in query.deps(target)
+
+    profile = query.build_profile(deps_db, root=deps_db.get_target("a"))
+    assert [target.name for target in profile.critical_path] == [
+        "a",
+        "b",
+        "d",
+        "f",
+    ]
+    assert profile.widths == [1, 2, 2, 1]
+
+
+def test_build_profile_rebuilt() -> None:
+    """Test build profiles of just the rebuilt targets, with a cycle."""
+    db = _rebuilt_db({"a": ["b", "c"], "b": ["c"], "c": ["a", "d"], "d": []})
+    db.get_target("d").add_dependency(db.get_target("e"))
+    profile = query.build_profile(db, rebuilt_only=True)
+    assert [target.name for target in profile.critical_path] == [
+        "a",
+        "b",
+        "c",
+        "d",
+    ]
+    assert profile.widths == [1, 1, 1, 1]
+    profile = query.build_profile(
+        db, root=db.get_target("e"), rebuilt_only=True
+    )
+    assert profile == ([], [])
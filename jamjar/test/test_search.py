@@ -0,0 +1,132 @@
+# ------------------------------------------------------------------------------
+# test_search.py - Target name search tests
+# ------------------------------------------------------------------------------
+
+"""Target name search tests."""
+
+__all__ = ()
+
+
+import re
+import types
+
+import pytest
+
+from .. import _search
+from .. import database
+
+NAMES = [
+    "all",
+    "<a>main.c",
+    "<a>main.o",
+    "<a!b>util.c",
+    "<a!b>util.h",
+    "<b>util.c",
+    "util.c",
+    "utilxc",
+    "<c>x+y.h",
+    "<c>x++.h",
+    "MAIN.C",
+    "<d>a.c.c",
+]
+
+
+@pytest.mark.parametrize(
+    "pattern,expected",
+    [
+        ("", []),
+        ("abc", ["abc"]),
+        (r"util\.c", ["util.c"]),
+        (r"^<a>main\.[co]$", ["<a>main."]),
+        ("x+y", ["x", "y"]),
+        (r"x\+y", ["x+y"]),
+        ("(?i)main", []),
+        ("main(?i:x)", ["main"]),
+        ("ab|cd", []),
+        ("a(bc)+d", ["a", "bc", "d"]),
+        ("a(bc)*d", ["a", "d"]),
+        ("a(?:bc)?d", ["a", "d"]),
+        ("(?x) a b  c", ["abc"]),
+        ("[ab]cd", ["cd"]),
+    ],
+)
+def test_required_literals(pattern: str, expected: list[str]) -> None:
+    """Test finding the literals that matches must contain."""
+    assert _search.required_literals(re.compile(pattern)) == expected
+
+
+def test_required_literals_ignorecase() -> None:
+    """Test case-insensitive regexes aren't narrowed."""
+    assert _search.required_literals(re.compile("main", re.IGNORECASE)) == []
+
+
+def test_required_literals_unknown_parser(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test regexes aren't narrowed if the regex parser isn't as expected."""
+    regex = re.compile("main")
+    parser = types.SimpleNamespace(parse=lambda *args: [(0,)])
+    monkeypatch.setattr(_search, "_sre_parse", parser)
+    assert _search.required_literals(regex) == []
+    monkeypatch.setattr(_search, "_OPCODES_FOUND", False)
+    assert _search.required_literals(regex) == []
+    index = _search.NameIndex(NAMES)
+    assert list(index.search(regex)) == ["<a>main.c", "<a>main.o"]
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "",
+        "util",
+        r"util\.c",
+        "util.c",
+        "^util",
+        r"\.c$",
+        "<a!b>",
+        r"x\+",
+        "x+",
+        "(?i)main",
+        "main(?i:.c)",
+        "main|util",
+        "(util)+",
+        "(util)*h",
+        ".c.c",
+        "c\n<",
+        "nonexistent",
+    ],
+)
+def test_find_targets(pattern: str) -> None:
+    """Test indexed searches find the same targets as a full scan."""
+    db = database.Database()
+    for name in NAMES:
+        db.get_target(name)
+    expected = [name for name in NAMES if re.search(pattern, name)]
+    assert [target.name for target in db.find_targets(pattern)] == expected
+
+
+def test_find_targets_updates_index() -> None:
+    """Test targets added after a search are found by later ones."""
+    db = database.Database()
+    db.get_target("foo.c")
+    assert [target.name for target in db.find_targets("foo")] == ["foo.c"]
+    db.get_target("foo.h")
+    assert [target.name for target in db.find_targets("foo")] == [
+        "foo.c",
+        "foo.h",
+    ]
+
+
+def test_find_targets_invalid() -> None:
+    """Test invalid regexes are reported."""
+    with pytest.raises(ValueError):
+        list(database.Database().find_targets("(foo"))
+
+
+def test_find_targets_invalid_eager() -> None:
+    """Test an invalid regex is reported before iterating over the results."""
+    db = database.Database()
+    with pytest.raises(ValueError):
+        db.find_targets("(foo")
+    with pytest.raises(ValueError):
+        db.find_rebuilt_targets("(foo")
@@ -0,0 +1,137 @@
+# ------------------------------------------------------------------------------
+# test_server.py - Query server module tests
+# ------------------------------------------------------------------------------
+
+"""Query server tests."""
+
+__all__ = ()
+
+
+import asyncio
+import concurrent.futures
+import json
+import pathlib
+import sys
+from typing import Any
+
+import pytest
+
+from .. import database
+from .. import server
+
+
+@pytest.fixture
+def db(compacted: bool) -> database.Database:
+    """Database with a short chain of rebuilt targets."""
+    db = database.Database()
+    prog = db.get_target("prog")
+    obj = db.get_target("<dir>main.o")
+    src = db.get_target("<dir>main.c")
+    dep = db.get_target("<dir>main.d")
+    prog.add_dependency(obj)
+    obj.add_dependency(src)
+    obj.set_rebuild_reason(database.RebuildReason.TOUCHED)
+    prog.set_rebuild_reason(database.RebuildReason.UPDATED_DEPENDENCY, obj)
+    dep.set_inherits_timestamp_from(obj)
+    if compacted:
+        db.compact()
+    return db
+
+
+async def _query(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    *requests: Any,
+) -> list[dict[str, Any]]:
+    """Send requests to a server, and get the responses."""
+    for request in requests:
+        if not isinstance(request, bytes):
+            request = json.dumps(request).encode()
+        writer.write(request + b"\n")
+    await writer.drain()
+    return [json.loads(await reader.readline()) for _ in requests]
+
+
+def test_handle_request(db: database.Database) -> None:
+    """Test handling individual requests."""
+    assert server.handle_request(db, b'{"id": 3, "command": "deps prog"}') == {
+        "id": 3,
+        "command": "deps prog",
+        "result": ["<dir>main.o"],
+    }
+    assert server.handle_request(
+        db, b'{"command": "timestamp_inheritance_chain <dir>main.d"}'
+    ) == {
+        "command": "timestamp_inheritance_chain <dir>main.d",
+        "result": ["<dir>main.d", "<dir>main.o"],
+    }
+    assert "error" in server.handle_request(
+        db, b'{"id": 4, "command": "deps missing"}'
+    )
+    assert "error" in server.handle_request(db, b"deps prog")
+    assert "error" in server.handle_request(db, b'{"id": 5}')
+
+
+def test_server(db: database.Database) -> None:
+    """Test several clients querying a server at once."""
+
+    async def client(port: int, idx: int) -> list[dict[str, Any]]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            return await _query(
+                reader,
+                writer,
+                {"id": idx, "command": "targets"},
+                b"not json",
+                {"id": idx, "command": "rebuild_chains prog"},
+                {"id": idx, "command": "show <dir>main.o"},
+            )
+        finally:
+            writer.close()
+
+    async def run() -> list[list[dict[str, Any]]]:
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            async with await server.start_server(db, executor, port=0) as srv:
+                port = srv.sockets[0].getsockname()[1]
+                return await asyncio.gather(
+                    *(client(port, idx) for idx in range(10))
+                )
+
+    for idx, responses in enumerate(asyncio.run(run())):
+        assert responses[0] == {
+            "id": idx,
+            "command": "targets",
+            "result": ["prog", "<dir>main.o", "<dir>main.c", "<dir>main.d"],
+        }
+        assert "error" in responses[1]
+        assert responses[2]["id"] == idx
+        assert responses[2]["result"]["count"] == 1
+        assert [
+            link["target"] for link in responses[2]["result"]["chains"][0]
+        ] == ["prog", "<dir>main.o"]
+        assert responses[3]["result"]["name"] == "<dir>main.o"
+
+
+@pytest.mark.skipif(
+    sys.platform == "win32", reason="Unix sockets not available"
+)
+def test_server_unix_socket(
+    db: database.Database, tmp_path: pathlib.Path
+) -> None:
+    """Test querying a server over a Unix socket."""
+    path = tmp_path / "jamjar.sock"
+
+    async def run() -> list[dict[str, Any]]:
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            async with await server.start_server(db, executor, path=path):
+                reader, writer = await asyncio.open_unix_connection(path)
+                try:
+                    return await _query(
+                        reader, writer, {"command": "deps <dir>main.o"}
+                    )
+                finally:
+                    writer.close()
+
+    assert asyncio.run(run()) == [
+        {"command": "deps <dir>main.o", "result": ["<dir>main.c"]}
+    ]
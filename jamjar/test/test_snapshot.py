@@ -0,0 +1,189 @@
+# ------------------------------------------------------------------------------
+# test_snapshot.py - Snapshot module tests
+# ------------------------------------------------------------------------------
+
+"""Database snapshot tests."""
+
+__all__ = ()
+
+
+import datetime
+import io
+import os
+import pathlib
+import pickle
+from typing import Any
+
+import pytest
+
+from .. import __main__
+from .. import database
+from .. import snapshot
+
+
+@pytest.fixture
+def db() -> database.Database:
+    """Database with a bit of everything in it."""
+    db = database.Database()
+    a = db.get_target("<grist>a.o")
+    b = db.get_target("a.c")
+    c = db.get_target("a.h")
+    a.add_dependency(b)
+    b.add_inclusion(c)
+    a.add_i_am_newer_than(b)
+    a.set_timestamp(datetime.datetime(2015, 11, 24, 14, 39, 20))
+    b.set_binding("/src/a.c")
+    c.set_inherits_timestamp_from(b)
+    a.set_fate(database.Fate.UPDATE)
+    a.set_rebuild_reason(database.RebuildReason.OUTDATED, b)
+    return db
+
+
+@pytest.fixture
+def logfile(tmp_path: pathlib.Path) -> pathlib.Path:
+    """Log file to key snapshots on."""
+    logfile = tmp_path / "jam.log"
+    logfile.write_text("make -- all\n")
+    return logfile
+
+
+def test_save_load(db: database.Database) -> None:
+    """Test a database survives being saved and loaded."""
+    f = io.BytesIO()
+    db.save(f, "key")
+    f.seek(0)
+    loaded = database.Database.load(f, "key")
+    assert loaded is not None
+    assert list(loaded.records()) == list(db.records())
+
+
+def test_load_wrong_key(db: database.Database) -> None:
+    """Test snapshots with a different key are rejected."""
+    f = io.BytesIO()
+    db.save(f, "key")
+    f.seek(0)
+    assert database.Database.load(f, "other key") is None
+
+
+def test_load_wrong_version(
+    db: database.Database, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test snapshots from other versions are rejected."""
+    f = io.BytesIO()
+    db.save(f, "key")
+    f.seek(0)
+    monkeypatch.setattr(database, "_SNAPSHOT_VERSION", -1)
+    assert database.Database.load(f, "key") is None
+
+
+@pytest.mark.parametrize(
+    "data", [b"", b"garbage", database._SNAPSHOT_MAGIC + b"garbage"]
+)
+def test_load_invalid(data: bytes) -> None:
+    """Test invalid snapshots are rejected."""
+    assert database.Database.load(io.BytesIO(data), "key") is None
+
+
+class _Touch:
+    """Object that creates a file when unpickled."""
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (pathlib.Path.touch, (self.path,))
+
+
+def test_load_pickle(tmp_path: pathlib.Path) -> None:
+    """Test snapshots are never unpickled, so can't run code."""
+    marker = tmp_path / "marker"
+    payload = pickle.dumps(_Touch(marker))
+    for data in [
+        database._SNAPSHOT_MAGIC + payload,
+        database._SNAPSHOT_MAGIC
+        + f'[{database._SNAPSHOT_VERSION}, "key"]\n'.encode()
+        + payload,
+    ]:
+        assert database.Database.load(io.BytesIO(data), "key") is None
+    assert not marker.exists()
+
+
+def test_cache(
+    db: database.Database, logfile: pathlib.Path, tmp_path: pathlib.Path
+) -> None:
+    """Test saving and loading snapshots in a cache directory."""
+    cache_dir = tmp_path / "cache"
+    key = snapshot.log_key(logfile)
+    assert snapshot.load(cache_dir, key) is None
+
+    snapshot.save(db, cache_dir, key)
+    path = snapshot.snapshot_path(cache_dir, key)
+    assert os.listdir(cache_dir) == [path.name]
+    loaded = snapshot.load(cache_dir, snapshot.log_key(logfile))
+    assert loaded is not None
+    assert list(loaded.records()) == list(db.records())
+
+
+def test_cache_shared(
+    db: database.Database, logfile: pathlib.Path, tmp_path: pathlib.Path
+) -> None:
+    """Test snapshots can be shared, and unreadable ones are ignored."""
+    cache_dir = tmp_path / "cache"
+    key = snapshot.log_key(logfile)
+    umask = os.umask(0o022)
+    try:
+        snapshot.save(db, cache_dir, key)
+    finally:
+        os.umask(umask)
+    path = snapshot.snapshot_path(cache_dir, key)
+    assert path.stat().st_mode & 0o777 == 0o644
+
+    path.unlink()
+    path.mkdir()
+    assert snapshot.load(cache_dir, key) is None
+
+
+def test_log_key_changes(logfile: pathlib.Path) -> None:
+    """Test the key changes when the log does."""
+    key = snapshot.log_key(logfile)
+    assert snapshot.log_key(logfile) == key
+
+    # Same size and mtime, different contents.
+    stat = logfile.stat()
+    logfile.write_text("make -- any\n")
+    os.utime(logfile, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert snapshot.log_key(logfile) != key
+
+    with open(logfile, "a") as f:
+        f.write("make -- more\n")
+    assert snapshot.log_key(logfile).size != key.size
+
+
+def test_stats_from_snapshot(
+    logfile: pathlib.Path,
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Test --stats reports loading a snapshot, rather than an empty parse."""
+    argv = [
+        "-f",
+        str(logfile),
+        "--cache-dir",
+        str(tmp_path / "cache"),
+        "--stats",
+        "--export",
+        "ndjson",
+        "-o",
+        str(tmp_path / "out"),
+    ]
+    __main__.main(argv)
+    report = capsys.readouterr().err
+    assert "snapshot" not in report
+    assert "Read 0.0 MiB, 1 lines" in report
+
+    __main__.main(argv)
+    report = capsys.readouterr().err
+    assert "Loaded 1 snapshot(s) in " in report
+    assert "Read " not in report
+    assert "lines matched" not in report
+    assert "Database: 0 targets" in report
@@ -9,13 +9,50 @@
 __all__ = ("UI",)
 
 import cmd
+import functools
+import itertools
 import sys
 
-from typing import Any, Iterable, Optional
+from typing import Any, Callable, Iterable, Optional, TypeVar
 
 from . import database
+from . import export
+from . import graph
 from . import query
 
+# Default maximum number of rebuild chains to show.
+_MAX_REBUILD_CHAINS = 10
+
+# Default maximum number of root causes to show for each reason.
+_MAX_ROOT_CAUSES = 10
+
+# Maximum number of targets to show for each cycle.
+_MAX_CYCLE_TARGETS = 20
+
+# Maximum number of levels to show in a build profile, and the width of the
+# bar for the widest level.
+_MAX_PROFILE_LEVELS = 50
+_PROFILE_BAR_WIDTH = 40
+
+_Cmd = TypeVar("_Cmd", bound=Callable[..., Any])
+
+
+def _locked(method: _Cmd) -> _Cmd:
+    """
+    Decorator for commands that read the database.
+
+    The database may be updated by another thread (when following a log), so
+    hold its lock for the duration of the command.
+
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        with self.database.lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
 
 class _BaseCmd(cmd.Cmd):
     """Base class for command submodes."""
@@ -60,7 +97,8 @@ class UI(_BaseCmd):
     def do_targets(self, match: str) -> None:
         """Get information about targets matching a regex."""
         try:
-            targets = list(self.database.find_targets(match))
+            with self.database.lock:
+                targets = list(self.database.find_targets(match))
         except ValueError as e:
             print(f"Invalid target search input: {e}")
         else:
@@ -69,12 +107,75 @@ class UI(_BaseCmd):
     def do_rebuilt_targets(self, match: str) -> None:
         """Get information about targets that were rebuilt matching a regex."""
         try:
-            targets = list(self.database.find_rebuilt_targets(match))
+            with self.database.lock:
+                targets = list(self.database.find_rebuilt_targets(match))
         except ValueError as e:
             print(f"Invalid target search input: {e}")
         else:
             self._maybe_enter_target_submode(targets)
 
+    def do_cycles(self, _: Any) -> None:
+        """
+        List the groups of targets that depend on or include each other.
+        """
+        with self.database.lock:
+            cycles = graph.condense(self.database).cycles()
+        if not cycles:
+            print("No cycles found")
+        for component in cycles:
+            print(f"{len(component)} targets:")
+            names = sorted(target.name for target in component)
+            for name in names[:_MAX_CYCLE_TARGETS]:
+                print(f"    {name}")
+            if len(names) > _MAX_CYCLE_TARGETS:
+                print(f"    ... and {len(names) - _MAX_CYCLE_TARGETS} more")
+
+    def do_root_causes(self, limit: str) -> None:
+        """
+        Rank the root causes of all the rebuilds, grouped by reason.
+
+        Shows the top 10 causes for each reason, or the given number.
+        """
+        if not limit:
+            max_causes = _MAX_ROOT_CAUSES
+        elif limit.strip().isdigit():
+            max_causes = int(limit)
+        else:
+            print(f"Invalid number of causes: {limit}")
+            return
+        with self.database.lock:
+            groups = query.root_causes(self.database)
+        if not groups:
+            print("No rebuilt targets")
+        for reason, causes in groups.items():
+            print(
+                "{} ({} causes):".format(
+                    "unknown" if reason is None else reason.value, len(causes)
+                )
+            )
+            for cause in causes[:max_causes]:
+                print(f"    {cause.rebuilds:>8} {cause.target.name}")
+            if len(causes) > max_causes:
+                print(f"    ... and {len(causes) - max_causes} more")
+
+    def do_critical_path(self, arg: str) -> None:
+        """
+        Show the longest dependency chain, and the build's parallelism.
+
+        Parallelism is shown as the number of targets on each level of the
+        dependency graph (targets on the same level can be built together).
+
+        Pass 'rebuilt' to only consider rebuilt targets.
+        """
+        rebuilt_only = _parse_rebuilt_arg(arg)
+        if rebuilt_only is None:
+            return
+        with self.database.lock:
+            profile = query.build_profile(
+                self.database, rebuilt_only=rebuilt_only
+            )
+        _print_build_profile(profile)
+
     def _maybe_enter_target_submode(
         self, candidates: list[database.Target]
     ) -> None:
@@ -134,25 +235,139 @@ class TargetSubmode(_BaseCmd):
         """Switch to the TargetSubmode for the specified target."""
         self.parent.do_targets(match)
 
+    @_locked
     def do_deps(self, _: Any) -> None:
         """
         Show all direct dependencies, including those arising from includes.
         """
         self._print_targets(query.deps(self.target))
 
+    @_locked
     def do_deps_rebuilt(self, _: Any) -> None:
         """Show direct dependencies that have been rebuilt."""
         self._print_targets(query.deps_rebuilt(self.target))
 
-    def do_rebuild_chains(self, _: Any) -> None:
-        """Show Jam's view on why this target was rebuilt."""
-        for chain in query.rebuild_chains(self.target):
+    @_locked
+    def do_effective_deps(self, _: Any) -> None:
+        """
+        Show direct dependencies, applying includes of includes as Jam does.
+
+        Also shows how many targets this target depends on in total.
+        """
+        effective = query.EffectiveDeps()
+        self._print_targets(effective.deps(self.target))
+        print(f"{len(effective.closure(self.target))} dependencies in total")
+
+    @_locked
+    def do_impact(self, limit: str) -> None:
+        """
+        Show how many targets depend on this target, directly or indirectly.
+
+        Lists the nearest dependents too, if given a number of them to list
+        (or 'all').
+        """
+        if not limit:
+            max_listed: Optional[int] = 0
+        elif limit.strip() == "all":
+            max_listed = None
+        elif limit.strip().isdigit():
+            max_listed = int(limit)
+        else:
+            print(f"Invalid number of dependents: {limit}")
+            return
+        distances = query.dependents_closure(self.target)
+        n_direct = sum(1 for distance in distances.values() if distance == 1)
+        n_rebuilt = sum(1 for dependent in distances if dependent.rebuilt)
+        print(
+            f"{len(distances)} dependents ({n_direct} direct, "
+            f"{n_rebuilt} rebuilt)"
+        )
+        dependents = sorted(
+            distances, key=lambda dep: (distances[dep], dep.name)
+        )
+        for dependent in itertools.islice(dependents, max_listed):
+            print(f"    {distances[dependent]:>3} {dependent.name}")
+
+    @_locked
+    def do_critical_path(self, arg: str) -> None:
+        """
+        Show the longest dependency chain under this target, and how wide each
+        level of its dependency graph is.
+
+        Pass 'rebuilt' to only consider rebuilt targets.
+        """
+        rebuilt_only = _parse_rebuilt_arg(arg)
+        if rebuilt_only is None:
+            return
+        _print_build_profile(
+            query.build_profile(
+                self.database, root=self.target, rebuilt_only=rebuilt_only
+            )
+        )
+
+    @_locked
+    def do_rebuild_chains(self, limit: str) -> None:
+        """
+        Show Jam's view on why this target was rebuilt.
+
+        Shows at most 10 chains, or the given number.
+        """
+        if not limit:
+            max_chains = _MAX_REBUILD_CHAINS
+        elif limit.strip().isdigit():
+            max_chains = int(limit)
+        else:
+            print(f"Invalid number of chains: {limit}")
+            return
+        causes = query.RebuildCauses(self.target)
+        for chain in itertools.islice(causes.chains(), max_chains):
             self._print_rebuild_chain(chain)
             timestamp_chain = query.timestamp_inheritance_chain(chain[-1][0])
             if timestamp_chain is not None:
                 print("")
                 self._print_timestamp_chain(timestamp_chain)
+        omitted = causes.count() - max_chains
+        if omitted > 0:
+            print(
+                f"... and {omitted} more chains (use 'rebuild_chains <N>' to "
+                f"show more)"
+            )
+
+    @_locked
+    def do_dot(self, args: str) -> None:
+        """
+        Write a Graphviz DOT graph of the targets around this target.
+
+        Usage: dot FILE [deps|dependents|causes] [DEPTH]
+
+        Follows dependencies and includes (by default), the targets that
+        depend on this one, or the causes of rebuilds, up to DEPTH edges away
+        (default 1). At most 500 targets are included.
+        """
+        words = args.split()
+        if not 1 <= len(words) <= 3:
+            print("Usage: dot FILE [deps|dependents|causes] [DEPTH]")
+            return
+        path, direction, depth = words[0], "deps", 1
+        for word in words[1:]:
+            if word in export.DOT_DIRECTIONS:
+                direction = word
+            elif word.isdigit():
+                depth = int(word)
+            else:
+                print(f"Invalid direction or depth: {word}")
+                return
+        try:
+            with open(path, "w") as f:
+                count = export.write_dot(
+                    self.target, f, direction=direction, depth=depth
+                )
+        except OSError as e:
+            print(f"Couldn't write {path}: {e}")
+        else:
+            print(f"Wrote {count} targets to {path}")
 
+    @_locked
     def do_show(self, _: Any) -> None:
         """Dump all available meta-data for this target."""
         print("name:", self.target.name)
@@ -180,6 +395,8 @@ class TargetSubmode(_BaseCmd):
             ):
                 print("    {}".format(inheritor))
         print("binding:", self.target.binding)
+        if self.target.sources:
+            print("found in:", ", ".join(self.target.sources))
         if self.target.fate is not None:
             print("fate:", self.target.fate.value)
         if self.target.rebuild_reason is not None:
@@ -187,21 +404,22 @@ class TargetSubmode(_BaseCmd):
             if self.target.rebuild_reason_target:
                 print("    due to:", self.target.rebuild_reason_target.name)
 
+    @_locked
     def do_alternative_grists(self, _: Any) -> None:
         """
         Show the grists of all the targets with the same
         filename as the current target.
         """
-        filename = self.target.filename()
-        targets = list(self.database.find_targets(filename))
-        grists = list()
-        for target in targets:
-            if target.filename() == filename:
-                grists.append(target.grist())
-        grists.sort()
-        for grist in grists:
+        targets = self.database.targets_by_filename(self.target.filename())
+        for grist in sorted(target.grist() for target in targets):
             print("    {}".format(grist))
 
+    @_locked
+    def do_grist_targets(self, _: Any) -> None:
+        """Show all the targets with the same grist as the current target."""
+        targets = self.database.targets_by_grist(self.target.grist())
+        self._print_targets(targets)
+
     def _print_rebuild_chain(self, chain: query.RebuildChain) -> None:
         """Print a sequence of targets forming a dependency chain."""
         links = []
@@ -222,3 +440,37 @@ class TargetSubmode(_BaseCmd):
         """Print a sequence of targets."""
         for target in targets:
             print("    {}".format(target.name))
+
+
+def _parse_rebuilt_arg(arg: str) -> Optional[bool]:
+    """
+    Parse the argument to a command that takes an optional 'rebuilt' flag.
+
+    Returns `None` (having printed an error) if the argument is invalid.
+    """
+    if not arg.strip():
+        return False
+    elif arg.strip() == "rebuilt":
+        return True
+    print(f"Invalid argument (expected 'rebuilt' or nothing): {arg}")
+    return None
+
+
+def _print_build_profile(profile: query.BuildProfile) -> None:
+    """Print a build profile's critical path and level widths."""
+    if not profile.critical_path:
+        print("No targets found")
+        return
+    print(f"Critical path ({len(profile.critical_path)} targets):")
+    print("\n -> ".join(target.name for target in profile.critical_path))
+    print("")
+    max_width = max(profile.widths)
+    widest = profile.widths.index(max_width)
+    print(f"Maximum parallelism: {max_width} targets (level {widest})")
+    print("Targets per level (level 0 has no dependencies):")
+    for level, width in enumerate(profile.widths[:_MAX_PROFILE_LEVELS]):
+        bar = "#" * max(1, width * _PROFILE_BAR_WIDTH // max_width)
+        print(f"    {level:>5} {width:>8} {bar}")
+    omitted = len(profile.widths) - _MAX_PROFILE_LEVELS
+    if omitted > 0:
+        print(f"    ... and {omitted} more levels")